@@ -1,33 +1,86 @@
 import sys
 import os
-from modules.config import DB_PATH
+import multiprocessing
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DB_PATH = os.path.join(BASE_DIR, "database", "inventory.db")
+# --profile-startup: içe aktarma süreleri ve açılış aşamaları raporlanır.
+# Tahmin süreci ve Prophet havuzu (spawn) bu dosyayı __mp_main__ olarak
+# yükler; GUI içe aktarmaları ve uygulama kurulumu bu yüzden main() içinde
+# durur, alt süreçler PyQt5 ve pencereleri yüklemez.
+PROFILE_STARTUP = __name__ == "__main__" and "--profile-startup" in sys.argv
+PREWARM = "--no-prewarm" not in sys.argv
+sys.argv = [arg for arg in sys.argv if arg not in ("--profile-startup", "--no-prewarm")]
 
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
-from PyQt5.QtWidgets import QApplication
-from modules.views.login_window import LoginRegisterWindow
-from modules.gui_main import InventoryApp
 
+def shutdown_charts():
+    # QtWebEngine açılışta yüklenmez; grafik havuzu yalnızca kullanıldıysa kapatılır.
+    chart_host = sys.modules.get("modules.widgets.chart_host")
+    if chart_host is not None:
+        chart_host.shutdown_chart_pool()
 
-if __name__ == "__main__":
+
+def mark(phase):
+    if PROFILE_STARTUP:
+        profiler.mark(phase)
+
+
+def main():
+    from PyQt5.QtCore import Qt, QCoreApplication, QTimer
+    from PyQt5.QtWidgets import QApplication
+    from modules.views.login_window import LoginRegisterWindow
+    from modules.gui_main import InventoryApp
+    from modules.db.connection import close_connection
+    from modules.db.migrations import run_migrations
+    from modules.widgets.background_task import cancel_all
+    from modules.logic.forecast_worker import shutdown_forecast_worker
+
+    mark("imports")
+    # QtWebEngine menüden ilk açılışta yüklenir; bu özellik QApplication'dan
+    # önce ayarlanmazsa sonradan içe aktarılamaz.
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
+    app.aboutToQuit.connect(cancel_all)
+    app.aboutToQuit.connect(shutdown_forecast_worker)
+    app.aboutToQuit.connect(shutdown_charts)
+    app.aboutToQuit.connect(close_connection)
+    mark("QApplication")
+    run_migrations()
+    mark("migrations")
 
     login_dialog = LoginRegisterWindow()
+    QTimer.singleShot(0, lambda: mark("login shown"))
     if login_dialog.exec_() == LoginRegisterWindow.Accepted:
         role = login_dialog.logged_in_role
         permissions = login_dialog.logged_in_permissions
         nickname = login_dialog.logged_in_nickname
         user_id = login_dialog.logged_in_user_id
+        mark("login accepted")
 
         window = InventoryApp(
             user_role=role,
             allowed_modules=permissions,
             nickname=nickname,
-            user_id=user_id
+            user_id=user_id,
+            prewarm=PREWARM
         )
         window.show()
+        if PROFILE_STARTUP:
+            def report():
+                mark("main window shown")
+                profiler.stop()
+                print(profiler.report())
+            QTimer.singleShot(0, report)
         sys.exit(app.exec_())
+
+
+if __name__ == "__main__":
+    # PyInstaller paketinde alt süreçler bu giriş noktasından başlar; GUI
+    # yerine işlerini çalıştırmaları için.
+    multiprocessing.freeze_support()
+    # Profilleyici diğer içe aktarmalardan önce kurulmalı.
+    if PROFILE_STARTUP:
+        from modules.startup_profile import profiler
+        profiler.start()
+    main()
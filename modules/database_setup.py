@@ -1,51 +1,16 @@
-import sqlite3
 import pandas as pd
 import os
-from modules.config import DB_PATH
+from modules.db.connection import get_connection, close_connection
+from modules.db.migrations import run_migrations
+from modules.db.stock_lots import rebuild_stock_lots
 
 PRODUCTS_CSV = "data/products.csv"
 SALES_CSV = "data/sales.csv"
-DB_FILE = "database/inventory.db"
 
-conn = sqlite3.connect(DB_FILE)
-cursor = conn.cursor()
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS products (
-    product_id INTEGER PRIMARY KEY,
-    product_name TEXT NOT NULL,
-    brand TEXT,
-    category TEXT,
-    cost_price REAL,
-    selling_price REAL,
-    expiry_date TEXT,
-    discount_price REAL,         -- ✅ kampanya fiyatı
-    discount_until TEXT          -- ✅ kampanya bitiş tarihi
-)
-""")
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS sales (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    date TEXT NOT NULL,
-    product_id INTEGER,
-    quantity_sold INTEGER,
-    FOREIGN KEY (product_id) REFERENCES products (product_id)
-)
-""")
-
-cursor.execute("DROP TABLE IF EXISTS stock_transactions")
-cursor.execute("""
-CREATE TABLE stock_transactions (
-    transaction_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    product_id INTEGER,
-    date TEXT,
-    quantity INTEGER,
-    note TEXT,
-    expiry_date TEXT,
-    FOREIGN KEY (product_id) REFERENCES products(product_id)
-)
-""")
+# Tablolar, anahtarlar ve indeksler migration'lar ile oluşturulur;
+# bu betik yalnızca CSV verisini mevcut şemaya yükler.
+run_migrations()
+conn = get_connection()
 
 if os.path.exists(PRODUCTS_CSV):
     df_products = pd.read_csv(PRODUCTS_CSV)
@@ -57,12 +22,18 @@ if os.path.exists(PRODUCTS_CSV):
         if col not in df_products.columns:
             df_products[col] = None
     df_products = df_products[expected_cols]
-    df_products.to_sql("products", conn, if_exists="replace", index=False)
+    conn.execute("DELETE FROM products")
+    df_products.to_sql("products", conn, if_exists="append", index=False)
 
 if os.path.exists(SALES_CSV):
     df_sales = pd.read_csv(SALES_CSV)
-    df_sales.to_sql("sales", conn, if_exists="replace", index=False)
+    df_sales = df_sales[df_sales["quantity_sold"] > 0]
+    sales_cols = [c for c in ["date", "product_id", "quantity_sold", "user_id"] if c in df_sales.columns]
+    conn.execute("DELETE FROM sales")
+    df_sales[sales_cols].to_sql("sales", conn, if_exists="append", index=False)
+    # Parti kalanları satış girişinde düşülür; toplu yüklenen satışlar için
+    # partiler yeniden dağıtılır.
+    rebuild_stock_lots()
 
 print("Veritabanı başarıyla oluşturuldu veya güncellendi.")
-conn.commit()
-conn.close()
+close_connection()
@@ -0,0 +1,78 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from modules.config import DB_PATH
+
+# Her thread kendi bağlantısını bir kez açar ve tekrar kullanır.
+# sqlite3 bağlantıları thread'ler arasında paylaşılamaz.
+_local = threading.local()
+
+BUSY_TIMEOUT_MS = 5000
+MMAP_SIZE = 256 * 1024 * 1024
+CACHE_SIZE_KB = 64 * 1024
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    f"PRAGMA mmap_size={MMAP_SIZE}",
+    f"PRAGMA cache_size=-{CACHE_SIZE_KB}",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+def _open_connection():
+    # isolation_level=None: sqlite3 modülü gizli BEGIN açmaz,
+    # yazma işlemleri transaction() ile açıkça yönetilir.
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        isolation_level=None
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def get_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _open_connection()
+        _local.conn = conn
+        _local.depth = 0
+    return conn
+
+
+@contextmanager
+def transaction():
+    conn = get_connection()
+    if _local.depth > 0:
+        # İç içe çağrılar dıştaki transaction'a katılır.
+        _local.depth += 1
+        try:
+            yield conn
+        finally:
+            _local.depth -= 1
+        return
+
+    # BEGIN IMMEDIATE yazma kilidini baştan alır; WAL modunda okuyucular
+    # beklemez, diğer yazıcılar busy_timeout kadar sırada bekler.
+    conn.execute("BEGIN IMMEDIATE")
+    _local.depth = 1
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    else:
+        conn.execute("COMMIT")
+    finally:
+        _local.depth = 0
+
+
+def close_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+        _local.depth = 0
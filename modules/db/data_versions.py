@@ -0,0 +1,46 @@
+from modules.db.connection import get_connection
+
+# data_versions her tablo grubu için bir sayaç tutar. Gruptaki tablolara
+# yapılan her yazma tetikleyicilerle sayacı artırır; bellekteki ara sonuçlar
+# bu sayacı anahtar olarak kullanır ve tabloları taramaz. Sayaç içerik özeti
+# değildir: eski değere geri dönen bir düzenleme de yeni sürüm sayılır.
+
+GROUPS = {
+    # Ürün, fiyat dönemi, depo bağlantısı ve kapasite (ml_module kataloğu).
+    "catalog": ("products", "product_storage_links", "shelves", "fridges", "price_periods"),
+    # Günlük satışlar ve ürün listesi (talep matrisi).
+    "demand": ("sales_daily", "products"),
+}
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS data_versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+"""
+
+
+def _triggers(name, table):
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        yield f"""
+        CREATE TRIGGER IF NOT EXISTS trg_version_{name}_{table}_{event.lower()} AFTER {event} ON {table}
+        BEGIN
+            UPDATE data_versions SET version = version + 1 WHERE name = '{name}';
+        END
+        """
+
+
+def create_data_versions(conn):
+    # Tekrar çağrılabilir; yeni eklenen gruplar ve tetikleyiciler kurulur.
+    conn.execute(CREATE_TABLE)
+    for name, tables in GROUPS.items():
+        conn.execute("INSERT OR IGNORE INTO data_versions (name) VALUES (?)", (name,))
+        for table in tables:
+            for trigger in _triggers(name, table):
+                conn.execute(trigger)
+
+
+def get_data_version(conn, name):
+    conn = conn or get_connection()
+    row = conn.execute("SELECT version FROM data_versions WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
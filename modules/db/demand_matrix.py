@@ -0,0 +1,364 @@
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from modules.db.connection import get_connection
+from modules.db.data_versions import get_data_version
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+# Ürün × gün talep matrisi. sales_daily'den üretilir; satışsız günler 0'dır
+# ve sütunlar takvim günleriyle hizalıdır. Veri diskte np.memmap olarak
+# durur. Dosya gün-ana sıralıdır (her gün tek bir satır), bu yüzden yeni
+# günler önceden ayrılmış boş satırlara yazılır ve dosya yeniden kurulmaz.
+# `values` ürün × gün görünümüdür, kopya değildir.
+#
+# Her yenileme önce data_versions'taki 'demand' sayacına bakar: sayaç ve
+# kapsanan günler aynıysa kilit alınmaz, sales_daily taranmaz. Sayaç
+# değiştiyse geçmiş günlerin imzası karşılaştırılır; eski tarihli satış ya
+# da silme varsa matris baştan kurulur, yoksa son gün yeniden okunur.
+#
+# Aynı klasörü GUI ve tahmin süreci birlikte kullanır. Yenileme bir dosya
+# kilidiyle sıraya girer ve kilit altında meta.json yeniden okunur; yeniden
+# kurulum her seferinde yeni adlı bir dosyaya yazar, böylece başka sürecin
+# eşlediği dosya kesilmez. Açık görünümlerdeki günler yerinde sıfırlanmaz.
+
+DTYPE = np.float32
+DAY_HEADROOM = 366
+PRODUCT_HEADROOM = 64
+
+SIGNATURE_QUERY = """
+    SELECT COUNT(*), COALESCE(SUM(quantity), 0),
+           COALESCE(SUM(quantity * product_id), 0),
+           COALESCE(SUM(quantity * julianday(day)), 0)
+    FROM sales_daily WHERE day < ?
+"""
+
+
+def _day_str(day):
+    return pd.Timestamp(day).strftime("%Y-%m-%d")
+
+
+@contextmanager
+def _file_lock(path):
+    # Süreçler arası özel kilit (kilit dosyasının ilk baytı).
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK ~10 sn denedikten sonra vazgeçer.
+                    time.sleep(0.1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _db_directory(conn):
+    # Bağlantının açık olduğu veritabanı dosyasının klasörü.
+    for _, name, path in conn.execute("PRAGMA database_list").fetchall():
+        if name == "main" and path:
+            return os.path.dirname(path)
+    return os.getcwd()
+
+
+class DemandMatrix:
+    def __init__(self, directory):
+        self.directory = directory
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.lock_path = os.path.join(directory, "matrix.lock")
+        self._lock = threading.RLock()
+        self._store = None
+        self.start = None
+        self.n_days = 0
+        self.day_capacity = 0
+        self.product_capacity = 0
+        self.product_ids = np.array([], dtype=np.int64)
+        self.product_index = {}
+        self.signature = None
+        self.data_version = None
+        self.version = 0
+        self.data_file = None
+        self._load()
+
+    # --- disk ---------------------------------------------------------------
+
+    def _read_meta(self):
+        if not os.path.exists(self.meta_path):
+            return None
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"[demand_matrix] Hata: {e}")
+            return None
+
+    def _load(self, meta=None):
+        meta = meta or self._read_meta()
+        if meta is None:
+            return
+        try:
+            path = os.path.join(self.directory, meta["data_file"])
+            store = np.memmap(path, dtype=DTYPE, mode="r+",
+                              shape=(meta["day_capacity"], meta["product_capacity"]))
+        except Exception as e:
+            print(f"[demand_matrix] Hata: {e}")
+            return
+        self._store = store
+        self.data_file = meta["data_file"]
+        self.start = pd.Timestamp(meta["start"])
+        self.n_days = meta["n_days"]
+        self.day_capacity = meta["day_capacity"]
+        self.product_capacity = meta["product_capacity"]
+        self._set_products(meta["product_ids"])
+        self.signature = meta["signature"]
+        self.data_version = meta.get("data_version")
+        self.version = meta["version"]
+
+    def _save_meta(self):
+        meta = {
+            "data_file": self.data_file,
+            "start": _day_str(self.start),
+            "n_days": self.n_days,
+            "day_capacity": self.day_capacity,
+            "product_capacity": self.product_capacity,
+            "product_ids": [int(pid) for pid in self.product_ids],
+            "signature": self.signature,
+            "data_version": self.data_version,
+            "version": self.version,
+        }
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self.meta_path)
+
+    def _set_products(self, product_ids):
+        self.product_ids = np.asarray(product_ids, dtype=np.int64)
+        self.product_index = {int(pid): i for i, pid in enumerate(self.product_ids)}
+
+    def _sync(self):
+        # Kilit altında çağrılır: başka süreç matrisi güncellediyse onun
+        # dosyasına ve sürümüne geçilir.
+        meta = self._read_meta()
+        if meta is not None and (meta["data_file"] != self.data_file or meta["version"] != self.version
+                                 or meta.get("data_version") != self.data_version):
+            self._load(meta)
+
+    def _remove_old_files(self):
+        # Windows'ta eşlenmiş dosya silinemez; kalan dosya bir sonraki
+        # kurulumda temizlenir. Linux'ta silinen dosyanın eşlemesi, onu
+        # kullanan süreçte geçerli kalır.
+        for name in os.listdir(self.directory):
+            if name.startswith("demand_") and name.endswith(".dat") and name != self.data_file:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    # --- yenileme ------------------------------------------------------------
+
+    def _is_current(self, data_version, end):
+        return (self._store is not None and data_version is not None and data_version == self.data_version
+                and self.start <= end and (end - self.start).days < self.n_days)
+
+    def refresh(self, conn=None, as_of=None):
+        conn = conn or get_connection()
+        end = pd.Timestamp(as_of or pd.Timestamp.today()).normalize()
+        # Doldurmadan önce okunur: arada yazılan satış sayacı yeniden artırır.
+        data_version = get_data_version(conn, "demand")
+        with self._lock:
+            if self._is_current(data_version, end):
+                return self
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, _file_lock(self.lock_path):
+            self._sync()
+            if self._is_current(data_version, end):
+                return self
+            self.data_version = data_version
+            if self._store is None or end < self.start:
+                self._rebuild(conn, end)
+                return self
+
+            last = self.start + pd.Timedelta(days=self.n_days - 1)
+            if self._signature(conn, last) != self.signature:
+                self._rebuild(conn, end)
+                return self
+
+            known = set(self.product_index)
+            new_ids = [pid for (pid,) in conn.execute(
+                "SELECT product_id FROM products UNION SELECT product_id FROM sales_daily"
+            ) if pid not in known]
+            n_days = max(self.n_days, (end - self.start).days + 1)
+            if (len(self.product_ids) + len(new_ids) > self.product_capacity
+                    or n_days > self.day_capacity):
+                self._rebuild(conn, end)
+                return self
+
+            if new_ids:
+                self._set_products(np.concatenate([self.product_ids, sorted(new_ids)]))
+            # Son gün yarım kalmış olabilir; o günden itibaren ayrı bir blokta
+            # hesaplanıp tek seferde yazılır. Görünümler sıfırlanmış günü görmez.
+            first = self.n_days - 1
+            new_last = self.start + pd.Timedelta(days=n_days - 1)
+            signature = self._signature(conn, new_last)
+            block = np.zeros((n_days - first, self.product_capacity), dtype=DTYPE)
+            self._fill(conn, last, block)
+            changed = bool(new_ids) or n_days != self.n_days or not np.array_equal(self._store[first], block[0])
+            if not changed:
+                self._save_meta()
+                return self
+            self._store[first:n_days] = block
+            self._store.flush()
+            self.n_days = n_days
+
+            # version yalnızca içerik değişince artar; önbellekler buna bakar.
+            self.signature = signature
+            self.version += 1
+            self._save_meta()
+        return self
+
+    def _rebuild(self, conn, end):
+        os.makedirs(self.directory, exist_ok=True)
+        first_day = conn.execute("SELECT MIN(day) FROM sales_daily").fetchone()[0]
+        start = min(pd.Timestamp(first_day), end) if first_day else end
+        product_ids = sorted(pid for (pid,) in conn.execute(
+            "SELECT product_id FROM products UNION SELECT product_id FROM sales_daily"
+        ))
+
+        self.version += 1
+        self.data_file = f"demand_{self.version}_{uuid.uuid4().hex[:8]}.dat"
+        self.start = start
+        self.n_days = (end - start).days + 1
+        self.day_capacity = self.n_days + DAY_HEADROOM
+        self.product_capacity = len(product_ids) + PRODUCT_HEADROOM
+        self._set_products(product_ids)
+        signature = self._signature(conn, end)
+        self._store = np.memmap(
+            os.path.join(self.directory, self.data_file), dtype=DTYPE, mode="w+",
+            shape=(self.day_capacity, self.product_capacity)
+        )
+        self._fill(conn, start, self._store[:self.n_days])
+        self._store.flush()
+
+        self.signature = signature
+        self._save_meta()
+        self._remove_old_files()
+
+    @staticmethod
+    def _signature(conn, last):
+        # Doldurmadan önce okunur: arada eklenen satış matrise girse bile
+        # imzada yoksa sonraki yenileme farkı görüp yeniden kurar.
+        return list(conn.execute(SIGNATURE_QUERY, (_day_str(last),)).fetchone())
+
+    def _fill(self, conn, since, target):
+        # target'ın ilk satırı since gününe karşılık gelir.
+        df = pd.read_sql_query(
+            "SELECT product_id, day, quantity FROM sales_daily WHERE day >= ?",
+            conn, params=(_day_str(since),)
+        )
+        if df.empty:
+            return
+        rows = (pd.to_datetime(df["day"]) - pd.Timestamp(since)).dt.days.to_numpy()
+        cols = df["product_id"].map(self.product_index).to_numpy()
+        mask = (rows >= 0) & (rows < len(target)) & pd.notna(cols)
+        np.add.at(target, (rows[mask], cols[mask].astype(np.int64)),
+                  df["quantity"].to_numpy(dtype=DTYPE)[mask])
+
+    # --- okuma ---------------------------------------------------------------
+
+    @property
+    def values(self):
+        # Ürün × gün görünümü (kopya değil).
+        if self._store is None:
+            return np.zeros((0, 0), dtype=DTYPE)
+        return self._store[:self.n_days, :len(self.product_ids)].T
+
+    @property
+    def days(self):
+        if self.start is None:
+            return pd.DatetimeIndex([])
+        return pd.date_range(self.start, periods=self.n_days, freq="D")
+
+    def day_slice(self, start=None, end=None):
+        first = 0 if start is None else max((pd.Timestamp(start) - self.start).days, 0)
+        last = self.n_days if end is None else min((pd.Timestamp(end) - self.start).days + 1, self.n_days)
+        return slice(first, max(first, last))
+
+    def window(self, start=None, end=None):
+        # Tarih aralığına düşen sütunlar; yine kopya değil.
+        return self.values[:, self.day_slice(start, end)]
+
+    def rows_for(self, product_ids):
+        return np.array([self.product_index[int(pid)] for pid in product_ids
+                         if int(pid) in self.product_index], dtype=np.int64)
+
+    def last_sales_day(self):
+        active = np.flatnonzero(self.values.any(axis=0))
+        return self.start + pd.Timedelta(days=int(active[-1])) if len(active) else None
+
+    def series(self, product_ids=None, start=None, end=None, trim=True):
+        # Ürünlerin toplam günlük satışı; trim=True ise ilk ve son satışlı
+        # gün dışındaki boş uçlar atılır, aradaki boş günler 0 kalır.
+        cols = self.day_slice(start, end)
+        values = self.values[:, cols]
+        if product_ids is None:
+            y = values.sum(axis=0)
+        else:
+            y = values[self.rows_for(product_ids)].sum(axis=0)
+        days = self.days[cols]
+        if trim:
+            active = np.flatnonzero(y)
+            if not len(active):
+                return pd.DataFrame({"date": pd.DatetimeIndex([]), "quantity_sold": np.array([], dtype=float)})
+            y = y[active[0]:active[-1] + 1]
+            days = days[active[0]:active[-1] + 1]
+        return pd.DataFrame({"date": days, "quantity_sold": y.astype(float)})
+
+    def daily_average(self, days=None, as_of=None):
+        # Tüm modüllerin ortak günlük ortalaması: pencere içindeki toplam
+        # satış / penceredeki takvim günü sayısı. days=None ise ilk satış
+        # gününden itibaren.
+        end = pd.Timestamp(as_of or pd.Timestamp.today()).normalize()
+        start = self.start if days is None else end - pd.Timedelta(days=days - 1)
+        span = max((end - max(start, self.start)).days + 1, 1) if self.start is not None else 1
+        totals = self.window(start, end).sum(axis=1, dtype=np.float64)
+        return pd.Series(totals / span, index=self.product_ids, name="daily_avg")
+
+
+_matrices = {}
+_matrices_lock = threading.Lock()
+
+
+def get_demand_matrix(conn=None, as_of=None):
+    # Süreç başına tek örnek; her çağrıda yalnızca yeni günler eklenir.
+    conn = conn or get_connection()
+    directory = os.path.join(_db_directory(conn), "demand_matrix")
+    with _matrices_lock:
+        matrix = _matrices.get(directory)
+        if matrix is None:
+            matrix = _matrices[directory] = DemandMatrix(directory)
+    return matrix.refresh(conn, as_of)
+
+
+if __name__ == "__main__":
+    dm = get_demand_matrix()
+    print(f"{len(dm.product_ids)} ürün × {dm.n_days} gün, sürüm {dm.version}")
+    print(dm.daily_average(30).sort_values(ascending=False).head(10))
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import pickle
+import time
+import pandas as pd
+from modules.db.connection import get_connection, transaction
+
+# Kurulmuş tahmin sonuçlarının diskteki önbelleği. Anahtar; model türü,
+# ürün, ufuk, model parametreleri ve girdi serisinin parmak izinden oluşur.
+# Yeni satış gelmedikçe parmak izi değişmez, sonuç modeli yeniden kurmadan
+# döner. En uzun süredir kullanılmayan kayıtlar MAX_ENTRIES aşılınca silinir.
+
+MAX_ENTRIES = 500
+# last_used yalnızca bu kadar eskiyse güncellenir; her isabette yazma
+# transaction'ı açılmaz. LRU sırası için saat düzeyi yeterlidir.
+TOUCH_INTERVAL_S = 3600
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS forecast_cache (
+        cache_key TEXT PRIMARY KEY,
+        model TEXT NOT NULL,
+        product TEXT NOT NULL,
+        horizon INTEGER NOT NULL,
+        params TEXT NOT NULL,
+        fingerprint TEXT NOT NULL,
+        payload BLOB NOT NULL,
+        created_at REAL NOT NULL,
+        last_used REAL NOT NULL
+    )
+"""
+
+
+def create_forecast_cache(conn):
+    conn.execute(CREATE_TABLE)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_forecast_cache_last_used ON forecast_cache(last_used)")
+
+
+def series_fingerprint(df):
+    # Son tarih + satır sayısı + içerik özeti; geçmişe yapılan düzeltmeler de
+    # özeti değiştirir.
+    if df.empty:
+        return "empty"
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).values.tobytes()).hexdigest()
+    return f"{df.iloc[:, 0].max()}|{len(df)}|{digest}"
+
+
+def make_key(model, product, horizon, params, fingerprint):
+    raw = json.dumps([model, str(product), int(horizon), params, fingerprint], sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def get_cached(key):
+    try:
+        row = get_connection().execute(
+            "SELECT payload, last_used FROM forecast_cache WHERE cache_key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[1] > TOUCH_INTERVAL_S:
+            with transaction() as conn:
+                conn.execute("UPDATE forecast_cache SET last_used = ? WHERE cache_key = ?", (now, key))
+        return pickle.loads(row[0])
+    except Exception as e:
+        print(f"[forecast_cache] Hata: {e}")
+        return None
+
+
+def put_cached(key, model, product, horizon, params, fingerprint, value):
+    try:
+        now = time.time()
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with transaction() as conn:
+            # Aynı ürün/parametre için eski parmak izli kayıtlar artık işe yaramaz.
+            conn.execute("""
+                DELETE FROM forecast_cache
+                WHERE model = ? AND product = ? AND horizon = ? AND params = ? AND fingerprint != ?
+            """, (model, str(product), int(horizon), json.dumps(params, sort_keys=True), fingerprint))
+            conn.execute("""
+                INSERT OR REPLACE INTO forecast_cache
+                    (cache_key, model, product, horizon, params, fingerprint, payload, created_at, last_used)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (key, model, str(product), int(horizon), json.dumps(params, sort_keys=True),
+                  fingerprint, payload, now, now))
+            conn.execute("""
+                DELETE FROM forecast_cache WHERE cache_key IN (
+                    SELECT cache_key FROM forecast_cache
+                    ORDER BY last_used DESC
+                    LIMIT -1 OFFSET ?
+                )
+            """, (MAX_ENTRIES,))
+    except Exception as e:
+        print(f"[forecast_cache] Hata: {e}")
+
+
+def cached_forecast(model, product, horizon, params, series, compute):
+    fingerprint = series_fingerprint(series)
+    key = make_key(model, product, horizon, params, fingerprint)
+    value = get_cached(key)
+    if value is None:
+        value = compute()
+        if value is not None:
+            put_cached(key, model, product, horizon, params, fingerprint, value)
+    return value
+
+
+def clear_forecast_cache():
+    with transaction() as conn:
+        conn.execute("DELETE FROM forecast_cache")
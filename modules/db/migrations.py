@@ -0,0 +1,366 @@
+from modules.db.connection import get_connection, transaction
+from modules.db.stock_levels import create_stock_levels
+from modules.db.sales_daily import (
+    create_sales_daily, replace_triggers as replace_sales_daily_triggers, revalue_sales_daily
+)
+from modules.db.forecast_cache import create_forecast_cache
+from modules.db.stock_lots import create_stock_lots, replace_triggers as replace_lot_triggers
+from modules.db.data_versions import create_data_versions
+from modules.db.price_periods import create_price_periods, replace_triggers as replace_price_triggers, HISTORY_START
+
+# Şema sürümü PRAGMA user_version içinde tutulur. Her migration bir kez,
+# kendi transaction'ı içinde çalışır ve sürümü bir artırır.
+
+
+def _table_exists(conn, name):
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone()
+    return row is not None
+
+
+def _columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _add_missing_columns(conn, table, columns):
+    existing = _columns(conn, table)
+    for name, decl in columns:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+
+def _drop_zero_quantity_sales(conn):
+    # Eski satış ekranı her satışta katalogdaki tüm ürünler için satır yazıyordu.
+    if _table_exists(conn, "sales"):
+        conn.execute("DELETE FROM sales WHERE quantity_sold = 0 OR quantity_sold IS NULL")
+
+
+def _create_base_tables(conn):
+    # Daha önce giriş ekranı ve pencere kurucularında dağınık duran DDL.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS products (
+            product_id INTEGER PRIMARY KEY,
+            product_name TEXT NOT NULL,
+            brand TEXT,
+            category TEXT,
+            cost_price REAL,
+            selling_price REAL,
+            expiry_date TEXT,
+            discount_price REAL,
+            discount_until TEXT
+        )
+    """)
+    _add_missing_columns(conn, "products", [
+        ("image_path", "TEXT"),
+        ("unit_volume", "REAL DEFAULT 1.0"),
+    ])
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sales (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            product_id INTEGER,
+            quantity_sold INTEGER,
+            FOREIGN KEY (product_id) REFERENCES products (product_id)
+        )
+    """)
+    _add_missing_columns(conn, "sales", [("user_id", "INTEGER")])
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS stock_transactions (
+            transaction_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER,
+            date TEXT,
+            quantity INTEGER,
+            note TEXT,
+            expiry_date TEXT,
+            FOREIGN KEY (product_id) REFERENCES products(product_id)
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE,
+            password_hash TEXT,
+            role TEXT CHECK(role IN ('admin', 'owner', 'worker')),
+            permissions TEXT
+        )
+    """)
+    _add_missing_columns(conn, "users", [
+        ("nickname", "TEXT DEFAULT ''"),
+        ("owner_id", "INTEGER"),
+        ("theme", "TEXT DEFAULT 'default'"),
+        ("view_self_only", "INTEGER DEFAULT 0"),
+        ("only_self_sales", "INTEGER DEFAULT 0"),
+    ])
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sales_summary (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT,
+            user_id INTEGER,
+            product_id INTEGER,
+            quantity_sold INTEGER
+        )
+    """)
+    _add_missing_columns(conn, "sales_summary", [("total_sales", "REAL")])
+
+    for table in ("fridges", "shelves"):
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY,
+                name TEXT,
+                type TEXT,
+                max_capacity INTEGER,
+                location TEXT
+            )
+        """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS storage_units (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            type TEXT CHECK(type IN ('shelf', 'fridge')),
+            capacity INTEGER,
+            location TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS product_storage_settings (
+            id INTEGER PRIMARY KEY,
+            product_id INTEGER,
+            location_type TEXT CHECK(location_type IN ('shelf', 'fridge')),
+            location_id INTEGER,
+            unit_volume REAL DEFAULT 1.0
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS product_storage_links (
+            product_id INTEGER,
+            storage_type TEXT CHECK(storage_type IN ('fridge', 'shelf')),
+            storage_id INTEGER
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS product_locations (
+            product_id INTEGER,
+            location_id INTEGER,
+            location_type TEXT,
+            PRIMARY KEY (product_id)
+        )
+    """)
+
+
+def _add_primary_keys(conn):
+    # products ve sales pandas to_sql ile oluşturulmuştu: anahtar ve tip yok.
+    # Aynı product_id'li satırlardan yalnızca ilki taşınır; atılanlar raporlanır.
+    duplicates = [pid for (pid,) in conn.execute("""
+        SELECT product_id FROM products
+        WHERE product_id IS NOT NULL AND product_name IS NOT NULL
+        GROUP BY product_id HAVING COUNT(*) > 1
+    """)]
+    if duplicates:
+        print(f"[migrations] Uyarı: yinelenen product_id değerlerinin yalnızca ilk satırı tutuldu: {duplicates}")
+    invalid = conn.execute(
+        "SELECT COUNT(*) FROM products WHERE product_id IS NULL OR product_name IS NULL"
+    ).fetchone()[0]
+    if invalid:
+        print(f"[migrations] Uyarı: product_id ya da adı olmayan {invalid} ürün satırı taşınmadı.")
+    conn.execute("""
+        CREATE TABLE products_new (
+            product_id INTEGER PRIMARY KEY,
+            product_name TEXT NOT NULL,
+            brand TEXT,
+            category TEXT,
+            cost_price REAL,
+            selling_price REAL,
+            expiry_date TEXT,
+            discount_price REAL,
+            discount_until TEXT,
+            image_path TEXT,
+            unit_volume REAL DEFAULT 1.0
+        )
+    """)
+    conn.execute("""
+        INSERT OR IGNORE INTO products_new (
+            product_id, product_name, brand, category, cost_price, selling_price,
+            expiry_date, discount_price, discount_until, image_path, unit_volume
+        )
+        SELECT product_id, product_name, brand, category, cost_price, selling_price,
+               expiry_date, CAST(NULLIF(discount_price, '') AS REAL), NULLIF(discount_until, ''),
+               image_path, COALESCE(unit_volume, 1.0)
+        FROM products
+        WHERE product_id IS NOT NULL AND product_name IS NOT NULL
+        ORDER BY rowid
+    """)
+    conn.execute("DROP TABLE products")
+    conn.execute("ALTER TABLE products_new RENAME TO products")
+
+    # Eski satış tablosunda aynı bilgiyi tutan üç ayrı özet sütunu vardı.
+    summary_cols = [c for c in ("sale_summary_id", "sales_summary_id", "sales_summary") if c in _columns(conn, "sales")]
+    summary_expr = f"COALESCE({', '.join(summary_cols)}, NULL)" if summary_cols else "NULL"
+    conn.execute("""
+        CREATE TABLE sales_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            product_id INTEGER NOT NULL,
+            quantity_sold INTEGER NOT NULL,
+            user_id INTEGER,
+            sale_summary_id INTEGER,
+            FOREIGN KEY (product_id) REFERENCES products (product_id)
+        )
+    """)
+    conn.execute(f"""
+        INSERT INTO sales_new (date, product_id, quantity_sold, user_id, sale_summary_id)
+        SELECT date, product_id, quantity_sold, user_id, {summary_expr}
+        FROM sales
+        WHERE date IS NOT NULL AND product_id IS NOT NULL AND quantity_sold IS NOT NULL
+        ORDER BY rowid
+    """)
+    conn.execute("DROP TABLE sales")
+    conn.execute("ALTER TABLE sales_new RENAME TO sales")
+
+
+def _create_price_periods(conn):
+    # Yeni satışların cirosu fiyat dönemlerinden hesaplanır; mevcut
+    # sales_daily satırları olduğu gibi kalır.
+    create_price_periods(conn)
+    replace_sales_daily_triggers(conn)
+
+
+def _add_cost_periods(conn):
+    # price_periods'a maliyet dönemleri eklenir; CHECK kısıtı değiştiği için
+    # tablo yeniden kurulur. Tabloyu okuyan tetikleyiciler yeniden adlandırma
+    # sırasında bozulmasın diye önce silinir, sonra yeni gövdeleriyle kurulur.
+    for (name,) in conn.execute("""
+        SELECT name FROM sqlite_master
+        WHERE type = 'trigger' AND (name LIKE 'trg_price_%' OR name LIKE 'trg_sales_daily_%')
+    """).fetchall():
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    conn.execute("""
+        CREATE TABLE price_periods_new (
+            period_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER NOT NULL,
+            kind TEXT NOT NULL CHECK (kind IN ('regular', 'promo', 'cost')),
+            price REAL NOT NULL,
+            valid_from TEXT NOT NULL,
+            valid_to TEXT
+        )
+    """)
+    conn.execute("""
+        INSERT INTO price_periods_new (period_id, product_id, kind, price, valid_from, valid_to)
+        SELECT period_id, product_id, kind, price, valid_from, valid_to FROM price_periods
+    """)
+    conn.execute("DROP TABLE price_periods")
+    conn.execute("ALTER TABLE price_periods_new RENAME TO price_periods")
+    # Mevcut maliyetler tüm geçmişi kapsar; sales_daily'deki maliyetler de
+    # satış anındaki cost_price'tan yazıldığı için satırlar olduğu gibi kalır.
+    create_price_periods(conn)
+    replace_sales_daily_triggers(conn)
+
+
+def _keep_ledgers_on_product_delete(conn):
+    # products satırı silinince türetilmiş tablolar artık boşaltılmaz;
+    # database_setup ürünleri silip yeniden yüklerken stok, parti ve fiyat
+    # geçmişi kaybolmamalı. Ürün silme ekranı ilgili satırları açıkça siler.
+    conn.execute("DROP TRIGGER IF EXISTS trg_products_stock_delete")
+    conn.execute("DROP TRIGGER IF EXISTS trg_products_lots_delete")
+    replace_price_triggers(conn)
+
+
+def _revalue_on_price_change(conn):
+    # Fiyat ve maliyet tetikleyicileri bugünün sales_daily satırlarını da
+    # yeniden değerler.
+    replace_price_triggers(conn)
+
+
+def _reconcile_sales_daily(conn):
+    # Migration 6 indirimi başlangıç tarihi olmadan, discount_until'e kadar
+    # tüm geçmiş satışlara uyguladı; migration 9 ise eski kampanyayı bugünden
+    # başlattı. Ürünün ilk kampanyasından önceki günlerde kampanya fiyatıyla
+    # yazılmış satış varsa kampanya geçmişin başına çekilir.
+    conn.execute(f"""
+        UPDATE price_periods SET valid_from = '{HISTORY_START}'
+        WHERE period_id IN (
+            SELECT pp.period_id FROM price_periods pp
+            WHERE pp.kind = 'promo'
+              AND NOT EXISTS (
+                  SELECT 1 FROM price_periods e
+                  WHERE e.product_id = pp.product_id AND e.kind = 'promo' AND e.valid_from < pp.valid_from
+              )
+              AND EXISTS (
+                  SELECT 1 FROM sales_daily d
+                  WHERE d.product_id = pp.product_id AND d.day < pp.valid_from
+                    AND ABS(d.revenue - d.quantity * pp.price) <= 1e-6 + 1e-9 * ABS(d.quantity * pp.price)
+              )
+        )
+    """)
+    # Fiyat dönemlerinde karşılığı olmayan geçmiş (migration 6-9 arasındaki
+    # fiyat değişiklikleri) dönemlere göre yeniden değerlenir ve raporlanır.
+    rows, revenue, cost = revalue_sales_daily(conn)
+    if rows:
+        print(f"[migrations] Uyarı: {rows} günlük satış satırı fiyat dönemlerine göre yeniden değerlendi "
+              f"(ciro farkı {revenue:+.2f}, maliyet farkı {cost:+.2f}).")
+
+
+def _allocate_lots_on_sales_change(conn):
+    # Partiler satış eklenince, silinince ya da düzeltilince tetikleyicilerle
+    # yeniden dağıtılır; uygulamanın tükettiği eski sürümün sapmaları düzelir.
+    replace_lot_triggers(conn)
+
+
+def _track_demand_version(conn):
+    # Talep matrisi değişikliği sales_daily'yi taramadan 'demand' sayacından anlar.
+    create_data_versions(conn)
+
+
+def _create_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_date_product ON sales(date, product_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_user_date ON sales(user_id, date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_stock_product_expiry ON stock_transactions(product_id, expiry_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_users_owner ON users(owner_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_products_name ON products(product_name)")
+
+
+MIGRATIONS = [
+    (1, _drop_zero_quantity_sales),
+    (2, _create_base_tables),
+    (3, _add_primary_keys),
+    (4, _create_indexes),
+    (5, create_stock_levels),
+    (6, create_sales_daily),
+    (7, create_forecast_cache),
+    (8, create_stock_lots),
+    (9, _create_price_periods),
+    (10, _add_cost_periods),
+    (11, _keep_ledgers_on_product_delete),
+    (12, _revalue_on_price_change),
+    (13, _reconcile_sales_daily),
+    (14, create_data_versions),
+    (15, _allocate_lots_on_sales_change),
+    (16, _track_demand_version),
+]
+
+
+def get_schema_version(conn=None):
+    conn = conn or get_connection()
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations():
+    current = get_schema_version()
+    for version, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        with transaction() as conn:
+            migrate(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+        print(f"[migrations] Şema sürümü {version} uygulandı: {migrate.__name__}")
+    get_connection().execute("PRAGMA optimize")
+    return get_schema_version()
+
+
+if __name__ == "__main__":
+    print(f"Şema sürümü: {run_migrations()}")
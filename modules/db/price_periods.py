@@ -0,0 +1,187 @@
+from modules.db.query_builder import SelectQuery
+
+# price_periods ürün fiyatlarını geçerlilik aralıklarıyla tutar:
+#  - regular: liste fiyatı. Ürün başına ardışık dönemler; fiyat değişince
+#    açık dönem dün kapanır, bugünden yeni dönem açılır.
+#  - cost: alış maliyeti; regular ile aynı şekilde products.cost_price'tan.
+#  - promo: kampanya fiyatı; valid_from..valid_to (ikisi de dahil).
+# Dönemler products üzerindeki tetikleyicilerle oluşur; ürün formu ve
+# indirim önerileri products'a yazmaya devam eder. Ürün satırı silinip
+# yeniden yüklendiğinde (database_setup) geçmiş korunur; ürün silme
+# ekranı dönemleri açıkça siler. Tarihler 'YYYY-MM-DD'.
+# Bir günün fiyatı: o günü kapsayan kampanya, yoksa o güne kadar başlamış
+# son liste dönemi, o da yoksa ürünün ilk liste dönemi (geriye tarihli satış).
+
+REGULAR = "regular"
+PROMO = "promo"
+COST = "cost"
+# Taşınan mevcut liste fiyatları tüm geçmişi kapsar.
+HISTORY_START = "1900-01-01"
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS price_periods (
+        period_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id INTEGER NOT NULL,
+        kind TEXT NOT NULL CHECK (kind IN ('regular', 'promo', 'cost')),
+        price REAL NOT NULL,
+        valid_from TEXT NOT NULL,
+        valid_to TEXT
+    )
+"""
+
+_TODAY = "date('now', 'localtime')"
+
+
+def price_sql(pid, day):
+    # Tetikleyici ve toplu sorgular için indeksli tarih aralığı araması.
+    return f"""COALESCE(
+        (SELECT pp.price FROM price_periods pp
+         WHERE pp.product_id = {pid} AND pp.kind = 'promo' AND pp.valid_from <= {day}
+           AND (pp.valid_to IS NULL OR pp.valid_to >= {day})
+         ORDER BY pp.valid_from DESC LIMIT 1),
+        (SELECT pp.price FROM price_periods pp
+         WHERE pp.product_id = {pid} AND pp.kind = 'regular' AND pp.valid_from <= {day}
+         ORDER BY pp.valid_from DESC LIMIT 1),
+        (SELECT pp.price FROM price_periods pp
+         WHERE pp.product_id = {pid} AND pp.kind = 'regular'
+         ORDER BY pp.valid_from LIMIT 1),
+        (SELECT p.selling_price FROM products p WHERE p.product_id = {pid})
+    )"""
+
+
+def cost_sql(pid, day):
+    return f"""COALESCE(
+        (SELECT pp.price FROM price_periods pp
+         WHERE pp.product_id = {pid} AND pp.kind = 'cost' AND pp.valid_from <= {day}
+         ORDER BY pp.valid_from DESC LIMIT 1),
+        (SELECT pp.price FROM price_periods pp
+         WHERE pp.product_id = {pid} AND pp.kind = 'cost'
+         ORDER BY pp.valid_from LIMIT 1),
+        (SELECT p.cost_price FROM products p WHERE p.product_id = {pid})
+    )"""
+
+
+def _open_period(kind, column):
+    # Ardışık dönemler (regular, cost): aynı gün içindeki düzeltme bugünkü
+    # dönemi günceller, önceki açık dönem fiyat farklıysa dün kapanır.
+    return f"""
+        UPDATE price_periods SET price = NEW.{column}
+        WHERE product_id = NEW.product_id AND kind = '{kind}' AND valid_to IS NULL AND valid_from >= {_TODAY};
+        UPDATE price_periods SET valid_to = date({_TODAY}, '-1 day')
+        WHERE product_id = NEW.product_id AND kind = '{kind}' AND valid_to IS NULL AND valid_from < {_TODAY}
+          AND price IS NOT NEW.{column};
+        INSERT INTO price_periods (product_id, kind, price, valid_from)
+        SELECT NEW.product_id, '{kind}', NEW.{column}, {_TODAY}
+        WHERE NEW.{column} IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM price_periods
+            WHERE product_id = NEW.product_id AND kind = '{kind}' AND valid_to IS NULL
+        );
+"""
+
+
+_OPEN_REGULAR = _open_period(REGULAR, "selling_price")
+_OPEN_COST = _open_period(COST, "cost_price")
+
+# Dönemler gün çözünürlüğündedir: bugün yapılan değişiklik bugünün tüm
+# satışlarına uygulanır. Bugünün (ve ileri tarihli) sales_daily satırları
+# yeniden değerlenir; artımlı toplam, sıfırdan kurulumla aynı kalır.
+_REVALUE_TODAY = f"""
+        UPDATE sales_daily SET
+            revenue = quantity * COALESCE({price_sql("NEW.product_id", "sales_daily.day")}, 0),
+            cost = quantity * COALESCE({cost_sql("NEW.product_id", "sales_daily.day")}, 0)
+        WHERE product_id = NEW.product_id AND day >= {_TODAY};
+"""
+
+# Aynı gün içindeki düzeltmeler bugünkü kampanyayı değiştirir; daha önce
+# başlamış kampanya dün kapanır.
+_OPEN_PROMO = f"""
+        DELETE FROM price_periods
+        WHERE product_id = NEW.product_id AND kind = 'promo' AND valid_from >= {_TODAY};
+        UPDATE price_periods SET valid_to = date({_TODAY}, '-1 day')
+        WHERE product_id = NEW.product_id AND kind = 'promo'
+          AND valid_from < {_TODAY} AND (valid_to IS NULL OR valid_to >= {_TODAY});
+        INSERT INTO price_periods (product_id, kind, price, valid_from, valid_to)
+        SELECT NEW.product_id, 'promo', NEW.discount_price, {_TODAY}, date(NEW.discount_until)
+        WHERE NEW.discount_price IS NOT NULL AND date(NEW.discount_until) >= {_TODAY};
+"""
+
+TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_price_products_insert AFTER INSERT ON products
+    BEGIN
+        {_OPEN_REGULAR}
+        {_OPEN_COST}
+        {_OPEN_PROMO}
+        {_REVALUE_TODAY}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_price_regular_update AFTER UPDATE OF selling_price ON products
+    WHEN NEW.selling_price IS NOT NULL AND NEW.selling_price IS NOT OLD.selling_price
+    BEGIN
+        {_OPEN_REGULAR}
+        {_REVALUE_TODAY}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_price_cost_update AFTER UPDATE OF cost_price ON products
+    WHEN NEW.cost_price IS NOT NULL AND NEW.cost_price IS NOT OLD.cost_price
+    BEGIN
+        {_OPEN_COST}
+        {_REVALUE_TODAY}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_price_promo_update AFTER UPDATE OF discount_price, discount_until ON products
+    WHEN NEW.discount_price IS NOT OLD.discount_price OR NEW.discount_until IS NOT OLD.discount_until
+    BEGIN
+        {_OPEN_PROMO}
+        {_REVALUE_TODAY}
+    END
+    """,
+)
+
+
+def create_price_periods(conn):
+    # Tekrar çağrılabilir; dönemi olmayan ürünler mevcut fiyatlarıyla eklenir.
+    conn.execute(CREATE_TABLE)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_price_periods_lookup ON price_periods(product_id, kind, valid_from)")
+    for trigger in TRIGGERS:
+        conn.execute(trigger)
+    for kind, column in ((REGULAR, "selling_price"), (COST, "cost_price")):
+        conn.execute(f"""
+            INSERT INTO price_periods (product_id, kind, price, valid_from)
+            SELECT product_id, '{kind}', {column}, '{HISTORY_START}'
+            FROM products p
+            WHERE {column} IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM price_periods pp WHERE pp.product_id = p.product_id AND pp.kind = '{kind}')
+        """)
+    # Eski kampanyaların başlangıcı bilinmez; bugünden (bitmişse bitiş
+    # gününden) başlamış sayılır. Önceki satışlar kampanya fiyatıyla
+    # yazılmışsa migration 13 kampanyayı geçmişin başına çeker.
+    conn.execute(f"""
+        INSERT INTO price_periods (product_id, kind, price, valid_from, valid_to)
+        SELECT product_id, 'promo', discount_price, MIN({_TODAY}, date(discount_until)), date(discount_until)
+        FROM products p
+        WHERE discount_price IS NOT NULL AND date(discount_until) IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM price_periods pp WHERE pp.product_id = p.product_id AND pp.kind = 'promo')
+    """)
+
+
+def replace_triggers(conn):
+    # Tetikleyici gövdesi değiştiğinde eski sürümler silinip yeniden kurulur.
+    for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'products' AND name LIKE 'trg_price_%'"
+    ).fetchall():
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    for trigger in TRIGGERS:
+        conn.execute(trigger)
+
+
+def get_price_periods(conn=None, product_ids=None, kind=None):
+    query = SelectQuery("price_periods")
+    query.columns("period_id", "product_id", "kind", "price", "valid_from", "valid_to")
+    query.where_in("product_id", [int(pid) for pid in product_ids] if product_ids is not None else None)
+    query.where_eq("kind", kind)
+    query.order_by("product_id", "kind", "valid_from")
+    return query.read(conn, parse_dates=["valid_from", "valid_to"])
@@ -0,0 +1,85 @@
+import pandas as pd
+from modules.db.connection import get_connection
+
+# Rapor pencerelerindeki filtreleri (tarih aralığı, marka, kategori) SQL'e
+# taşımak için küçük bir SELECT oluşturucu. Değerler her zaman parametre
+# olarak geçer; None olan filtreler sorguya hiç eklenmez.
+
+
+class SelectQuery:
+    def __init__(self, table):
+        self.table = table
+        self._columns = []
+        self._joins = []
+        self._where = []
+        self._params = []
+        self._group_by = []
+        self._order_by = []
+        self._limit = None
+
+    def columns(self, *columns):
+        self._columns.extend(columns)
+        return self
+
+    def join(self, table, on, how="JOIN"):
+        self._joins.append(f"{how} {table} ON {on}")
+        return self
+
+    def left_join(self, table, on):
+        return self.join(table, on, how="LEFT JOIN")
+
+    def where(self, clause, *params):
+        self._where.append(clause)
+        self._params.extend(params)
+        return self
+
+    def where_eq(self, column, value):
+        if value is not None:
+            self.where(f"{column} = ?", value)
+        return self
+
+    def where_in(self, column, values):
+        if values is not None:
+            values = list(values)
+            if not values:
+                # Boş liste hiçbir satırla eşleşmez.
+                return self.where("0")
+            self.where(f"{column} IN ({', '.join('?' * len(values))})", *values)
+        return self
+
+    def where_between(self, column, start=None, end=None):
+        # Tarihler ISO metin olarak saklandığı için karşılaştırma indeksi kullanır.
+        if start is not None:
+            self.where(f"{column} >= ?", str(start))
+        if end is not None:
+            self.where(f"{column} <= ?", str(end))
+        return self
+
+    def group_by(self, *columns):
+        self._group_by.extend(columns)
+        return self
+
+    def order_by(self, *columns):
+        self._order_by.extend(columns)
+        return self
+
+    def limit(self, count):
+        self._limit = int(count)
+        return self
+
+    def build(self):
+        parts = [f"SELECT {', '.join(self._columns) or '*'}", f"FROM {self.table}"]
+        parts.extend(self._joins)
+        if self._where:
+            parts.append("WHERE " + " AND ".join(self._where))
+        if self._group_by:
+            parts.append("GROUP BY " + ", ".join(self._group_by))
+        if self._order_by:
+            parts.append("ORDER BY " + ", ".join(self._order_by))
+        if self._limit is not None:
+            parts.append(f"LIMIT {self._limit}")
+        return "\n".join(parts), list(self._params)
+
+    def read(self, conn=None, parse_dates=None):
+        sql, params = self.build()
+        return pd.read_sql_query(sql, conn or get_connection(), params=params, parse_dates=parse_dates)
@@ -0,0 +1,226 @@
+import sys
+import numpy as np
+import pandas as pd
+from modules.db.connection import get_connection, transaction
+from modules.db.query_builder import SelectQuery
+from modules.db.price_periods import price_sql, cost_sql
+
+# sales_daily her (ürün, gün) için tek satır tutar: satılan adet, o günkü
+# fiyat ve maliyetten (price_periods) ciro ve maliyet. Satış eklendikçe
+# tetikleyicilerle artımlı güncellenir; sonradan yapılan fiyat değişiklikleri
+# geçmiş günleri etkilemez. Analizler ve kâr raporları ham satış satırları
+# yerine bu tabloyu okur.
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS sales_daily (
+        product_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        quantity INTEGER NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0,
+        cost REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (product_id, day)
+    ) WITHOUT ROWID
+"""
+
+
+def _price_expr(pid, day):
+    # Satış gününün fiyatı price_periods'tan (kampanya ya da liste fiyatı).
+    return price_sql(pid, day)
+
+
+def _cost_expr(pid, day):
+    return cost_sql(pid, day)
+
+
+# Migration 6 ile kurulan ilk sürüm fiyat ve maliyeti doğrudan products'tan
+# okur. Uygulanmış migration değiştirilmediği için korunur; migration 9 ve 10
+# tetikleyicileri price_periods okuyan TRIGGERS ile değiştirir.
+def _catalog_price_expr(pid, day):
+    # Satış günü indirim süresi içindeyse indirimli fiyat geçerlidir.
+    return f"""(
+        SELECT CASE
+            WHEN p.discount_price IS NOT NULL AND p.discount_until IS NOT NULL
+                 AND {day} <= date(p.discount_until) THEN p.discount_price
+            ELSE p.selling_price
+        END FROM products p WHERE p.product_id = {pid}
+    )"""
+
+
+def _catalog_cost_expr(pid, day):
+    return f"(SELECT p.cost_price FROM products p WHERE p.product_id = {pid})"
+
+
+def _add_new(price_expr, cost_expr):
+    return f"""
+        INSERT INTO sales_daily (product_id, day, quantity, revenue, cost)
+        VALUES (
+            NEW.product_id, date(NEW.date), NEW.quantity_sold,
+            NEW.quantity_sold * COALESCE({price_expr("NEW.product_id", "date(NEW.date)")}, 0),
+            NEW.quantity_sold * COALESCE({cost_expr("NEW.product_id", "date(NEW.date)")}, 0)
+        )
+        ON CONFLICT(product_id, day) DO UPDATE SET
+            quantity = quantity + excluded.quantity,
+            revenue = revenue + excluded.revenue,
+            cost = cost + excluded.cost;
+"""
+
+# Silinen satırın payı, günün ortalama birim fiyatı üzerinden düşülür;
+# böylece fiyat sonradan değişse bile satır kendi içinde tutarlı kalır.
+_REMOVE_OLD = """
+        UPDATE sales_daily SET
+            revenue = CASE WHEN quantity > 0 THEN revenue - revenue * OLD.quantity_sold / quantity ELSE 0 END,
+            cost = CASE WHEN quantity > 0 THEN cost - cost * OLD.quantity_sold / quantity ELSE 0 END,
+            quantity = quantity - OLD.quantity_sold
+        WHERE product_id = OLD.product_id AND day = date(OLD.date);
+        DELETE FROM sales_daily
+        WHERE product_id = OLD.product_id AND day = date(OLD.date) AND quantity <= 0;
+"""
+
+def _triggers(price_expr, cost_expr):
+    add_new = _add_new(price_expr, cost_expr)
+    return (
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_sales_daily_insert AFTER INSERT ON sales
+        BEGIN
+            {add_new}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_sales_daily_delete AFTER DELETE ON sales
+        BEGIN
+            {_REMOVE_OLD}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_sales_daily_update AFTER UPDATE OF date, product_id, quantity_sold ON sales
+        BEGIN
+            {_REMOVE_OLD}
+            {add_new}
+        END
+        """,
+    )
+
+
+TRIGGERS = _triggers(_price_expr, _cost_expr)
+CATALOG_TRIGGERS = _triggers(_catalog_price_expr, _catalog_cost_expr)
+
+# Fiyat günlük olduğundan önce (ürün, gün) toplanır; fiyat ve maliyet her
+# grup için bir kez, indeksli aralık aramasıyla bulunur.
+AGGREGATE_QUERY = f"""
+    SELECT g.product_id, g.day, g.quantity,
+           g.quantity * COALESCE({_price_expr("g.product_id", "g.day")}, 0) AS revenue,
+           g.quantity * COALESCE({_cost_expr("g.product_id", "g.day")}, 0) AS cost
+    FROM (
+        SELECT s.product_id, date(s.date) AS day, SUM(s.quantity_sold) AS quantity
+        FROM sales s
+        GROUP BY s.product_id, date(s.date)
+        HAVING SUM(s.quantity_sold) > 0
+    ) g
+"""
+
+
+CATALOG_AGGREGATE_QUERY = f"""
+    SELECT s.product_id, date(s.date) AS day, SUM(s.quantity_sold) AS quantity,
+           SUM(s.quantity_sold * COALESCE({_catalog_price_expr("s.product_id", "date(s.date)")}, 0)) AS revenue,
+           SUM(s.quantity_sold * COALESCE({_catalog_cost_expr("s.product_id", "date(s.date)")}, 0)) AS cost
+    FROM sales s
+    GROUP BY s.product_id, date(s.date)
+    HAVING SUM(s.quantity_sold) > 0
+"""
+
+
+def create_sales_daily(conn):
+    # Migration 6: ilk sürüm (katalog fiyatları). executescript() açık
+    # transaction'ı commit ettiği için tetikleyiciler migration transaction'ı
+    # içinde tek tek çalıştırılır.
+    conn.execute(CREATE_TABLE)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_daily_day ON sales_daily(day)")
+    for trigger in CATALOG_TRIGGERS:
+        conn.execute(trigger)
+    _fill(conn, CATALOG_AGGREGATE_QUERY)
+
+
+def replace_triggers(conn):
+    # Tetikleyici gövdesi değiştiğinde eski sürümler silinip yeniden kurulur.
+    for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'sales' AND name LIKE 'trg_sales_daily_%'"
+    ).fetchall():
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    for trigger in TRIGGERS:
+        conn.execute(trigger)
+
+
+def _fill(conn, query=AGGREGATE_QUERY):
+    conn.execute("DELETE FROM sales_daily")
+    conn.execute(f"INSERT INTO sales_daily (product_id, day, quantity, revenue, cost) {query}")
+
+
+def rebuild_sales_daily():
+    with transaction() as conn:
+        _fill(conn)
+
+
+def revalue_sales_daily(conn):
+    # Ciro ve maliyeti fiyat dönemleriyle uyuşmayan satırlar yeniden
+    # değerlenir. Döner: (satır sayısı, ciro farkı, maliyet farkı).
+    df = pd.read_sql_query(f"""
+        SELECT d.product_id, d.day, d.revenue, d.cost,
+               d.quantity * COALESCE({_price_expr("d.product_id", "d.day")}, 0) AS revenue_expected,
+               d.quantity * COALESCE({_cost_expr("d.product_id", "d.day")}, 0) AS cost_expected
+        FROM sales_daily d
+    """, conn, dtype={"revenue": float, "cost": float, "revenue_expected": float, "cost_expected": float})
+    mismatch = ~np.isclose(df["revenue_expected"], df["revenue"], rtol=1e-9, atol=1e-6)
+    mismatch |= ~np.isclose(df["cost_expected"], df["cost"], rtol=1e-9, atol=1e-6)
+    df = df[mismatch]
+    conn.executemany(
+        "UPDATE sales_daily SET revenue = ?, cost = ? WHERE product_id = ? AND day = ?",
+        zip(df["revenue_expected"].tolist(), df["cost_expected"].tolist(), df["product_id"].tolist(), df["day"].tolist()),
+    )
+    return len(df), float((df["revenue_expected"] - df["revenue"]).sum()), float((df["cost_expected"] - df["cost"]).sum())
+
+
+def verify_sales_daily():
+    # Adet, ciro ve maliyet karşılaştırılır. Fiyat değişiklikleri bugünün
+    # satırını yeniden değerlediği için artımlı toplam sıfırdan kurulumla
+    # aynı olmalıdır.
+    conn = get_connection()
+    dtype = {"revenue": float, "cost": float}
+    expected = pd.read_sql_query(AGGREGATE_QUERY, conn, dtype=dtype)
+    actual = pd.read_sql_query("SELECT product_id, day, quantity, revenue, cost FROM sales_daily", conn, dtype=dtype)
+    df = pd.merge(expected, actual, on=["product_id", "day"], how="outer", suffixes=("_expected", "_actual")).fillna(0)
+    mismatch = df["quantity_expected"] != df["quantity_actual"]
+    for column in ("revenue", "cost"):
+        mismatch |= ~np.isclose(df[f"{column}_expected"], df[f"{column}_actual"], rtol=1e-9, atol=1e-6)
+    return df[mismatch].reset_index(drop=True)
+
+
+def get_daily_sales(conn=None, product_ids=None, start=None, end=None, by_product=True):
+    query = SelectQuery("sales_daily")
+    if by_product:
+        query.columns("product_id", "day AS date", "quantity AS quantity_sold", "revenue", "cost")
+    else:
+        query.columns("day AS date", "SUM(quantity) AS quantity_sold", "SUM(revenue) AS revenue", "SUM(cost) AS cost")
+        query.group_by("day")
+    query.where_in("product_id", [int(pid) for pid in product_ids] if product_ids is not None else None)
+    query.where_between("day", start, end)
+    query.order_by("day")
+    return query.read(conn, parse_dates=["date"])
+
+
+def get_product_ids(conn=None, column="product_name", value=None):
+    conn = conn or get_connection()
+    rows = conn.execute(f"SELECT product_id FROM products WHERE {column} = ?", (value,)).fetchall()
+    return [row[0] for row in rows]
+
+
+if __name__ == "__main__":
+    if "--rebuild" in sys.argv:
+        rebuild_sales_daily()
+        print("Günlük satış tablosu yeniden oluşturuldu.")
+    diff = verify_sales_daily()
+    if diff.empty:
+        print("Günlük satış tablosu tutarlı.")
+    else:
+        print(f"{len(diff)} satırda tutarsızlık bulundu:")
+        print(diff.to_string(index=False))
+        sys.exit(1)
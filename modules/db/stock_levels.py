@@ -0,0 +1,134 @@
+import sys
+import pandas as pd
+from modules.db.connection import get_connection, transaction
+
+# stock_levels her ürün için tek satır tutar: toplam giriş (stock_in) ve
+# toplam satış (sold). Tablo, sales ve stock_transactions üzerindeki
+# tetikleyicilerle güncel kalır; mevcut stok = stock_in - sold.
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS stock_levels (
+        product_id INTEGER PRIMARY KEY,
+        stock_in INTEGER NOT NULL DEFAULT 0,
+        sold INTEGER NOT NULL DEFAULT 0
+    )
+"""
+
+TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stock_tx_insert AFTER INSERT ON stock_transactions
+    BEGIN
+        INSERT INTO stock_levels (product_id, stock_in) VALUES (NEW.product_id, COALESCE(NEW.quantity, 0))
+        ON CONFLICT(product_id) DO UPDATE SET stock_in = stock_in + excluded.stock_in;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stock_tx_delete AFTER DELETE ON stock_transactions
+    BEGIN
+        UPDATE stock_levels SET stock_in = stock_in - COALESCE(OLD.quantity, 0)
+        WHERE product_id = OLD.product_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stock_tx_update AFTER UPDATE OF product_id, quantity ON stock_transactions
+    BEGIN
+        UPDATE stock_levels SET stock_in = stock_in - COALESCE(OLD.quantity, 0)
+        WHERE product_id = OLD.product_id;
+        INSERT INTO stock_levels (product_id, stock_in) VALUES (NEW.product_id, COALESCE(NEW.quantity, 0))
+        ON CONFLICT(product_id) DO UPDATE SET stock_in = stock_in + excluded.stock_in;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_sales_stock_insert AFTER INSERT ON sales
+    BEGIN
+        INSERT INTO stock_levels (product_id, sold) VALUES (NEW.product_id, NEW.quantity_sold)
+        ON CONFLICT(product_id) DO UPDATE SET sold = sold + excluded.sold;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_sales_stock_delete AFTER DELETE ON sales
+    BEGIN
+        UPDATE stock_levels SET sold = sold - OLD.quantity_sold
+        WHERE product_id = OLD.product_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_sales_stock_update AFTER UPDATE OF product_id, quantity_sold ON sales
+    BEGIN
+        UPDATE stock_levels SET sold = sold - OLD.quantity_sold
+        WHERE product_id = OLD.product_id;
+        INSERT INTO stock_levels (product_id, sold) VALUES (NEW.product_id, NEW.quantity_sold)
+        ON CONFLICT(product_id) DO UPDATE SET sold = sold + excluded.sold;
+    END
+    """,
+)
+
+# Ham tablolardan sıfırdan hesaplanan değerler; yeniden kurma ve doğrulama
+# için ortak kullanılır.
+AGGREGATE_QUERY = """
+    SELECT product_id, SUM(stock_in) AS stock_in, SUM(sold) AS sold
+    FROM (
+        SELECT product_id, COALESCE(quantity, 0) AS stock_in, 0 AS sold
+        FROM stock_transactions WHERE product_id IS NOT NULL
+        UNION ALL
+        SELECT product_id, 0, quantity_sold FROM sales
+    )
+    GROUP BY product_id
+"""
+
+
+def create_stock_levels(conn):
+    # executescript() açık transaction'ı commit ettiği için tetikleyiciler
+    # migration transaction'ı içinde tek tek çalıştırılır.
+    conn.execute(CREATE_TABLE)
+    for trigger in TRIGGERS:
+        conn.execute(trigger)
+    _fill(conn)
+
+
+def _fill(conn):
+    conn.execute("DELETE FROM stock_levels")
+    conn.execute(f"INSERT INTO stock_levels (product_id, stock_in, sold) {AGGREGATE_QUERY}")
+
+
+def rebuild_stock_levels():
+    with transaction() as conn:
+        _fill(conn)
+
+
+def verify_stock_levels():
+    conn = get_connection()
+    expected = pd.read_sql_query(AGGREGATE_QUERY, conn)
+    actual = pd.read_sql_query("SELECT product_id, stock_in, sold FROM stock_levels", conn)
+    df = pd.merge(expected, actual, on="product_id", how="outer", suffixes=("_expected", "_actual")).fillna(0)
+    mismatch = (df["stock_in_expected"] != df["stock_in_actual"]) | (df["sold_expected"] != df["sold_actual"])
+    return df[mismatch].reset_index(drop=True)
+
+
+def get_stock_levels(conn=None):
+    conn = conn or get_connection()
+    return pd.read_sql_query("""
+        SELECT product_id, stock_in, sold, stock_in - sold AS current_stock
+        FROM stock_levels
+    """, conn)
+
+
+def get_current_stock(product_id, conn=None):
+    conn = conn or get_connection()
+    row = conn.execute(
+        "SELECT stock_in - sold FROM stock_levels WHERE product_id = ?", (product_id,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+if __name__ == "__main__":
+    if "--rebuild" in sys.argv:
+        rebuild_stock_levels()
+        print("Stok tablosu yeniden oluşturuldu.")
+    diff = verify_stock_levels()
+    if diff.empty:
+        print("Stok tablosu tutarlı.")
+    else:
+        print(f"{len(diff)} üründe tutarsızlık bulundu:")
+        print(diff.to_string(index=False))
+        sys.exit(1)
@@ -0,0 +1,252 @@
+import sys
+import pandas as pd
+from modules.db.connection import get_connection, transaction
+
+# stock_lots her stok girişi (parti) için kalan miktarı tutar. Parti,
+# stock_transactions satırıyla aynı kimliği taşır. Değişmez kural: bir ürünün
+# partilerinde kalan miktar, ürünün toplam satışının partilere ilk son
+# kullanma tarihi önce çıkar (FEFO) sırasıyla dağıtılmasıdır (AGGREGATE_QUERY).
+# sales ve stock_transactions üzerindeki her yazma, tetikleyicilerle o ürünün
+# partilerini yeniden dağıtır: silinen ya da düzeltilen satış partilere geri
+# döner, partilerin karşılayamadığı satış sonradan gelen girişten düşülür.
+# Böylece ürün başına açık miktar max(stock_in - sold, 0) olur ve
+# stock_levels ile uyuşur. SKT sorguları yalnızca açık partileri
+# (remaining > 0) kapsayan (product_id, expiry_date) kısmi indeksini kullanır.
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS stock_lots (
+        lot_id INTEGER PRIMARY KEY,
+        product_id INTEGER NOT NULL,
+        received_date TEXT,
+        expiry_date TEXT,
+        quantity INTEGER NOT NULL,
+        remaining INTEGER NOT NULL
+    )
+"""
+
+OPEN_LOTS_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_lots_open_expiry
+    ON stock_lots(product_id, expiry_date) WHERE remaining > 0
+"""
+
+# Ürünün toplam satışı her dağıtımda bu indeksten okunur.
+SALES_INDEX = "CREATE INDEX IF NOT EXISTS idx_sales_product_qty ON sales(product_id, quantity_sold)"
+
+# FEFO sırası: SKT'si en yakın parti önce, SKT'siz partiler en son, eşitlikte
+# önce gelen parti.
+FEFO_ORDER = "expiry_date IS NULL, expiry_date, lot_id"
+
+
+def _allocate(pid):
+    # pid ürününün partileri yeniden dağıtılır; yalnızca değişen satırlar yazılır.
+    return f"""
+        UPDATE stock_lots SET remaining = o.remaining
+        FROM (
+            SELECT lot_id, MAX(MIN(quantity,
+                       SUM(quantity) OVER (ORDER BY {FEFO_ORDER} ROWS UNBOUNDED PRECEDING)
+                       - (SELECT COALESCE(SUM(quantity_sold), 0) FROM sales WHERE product_id = {pid})
+                   ), 0) AS remaining
+            FROM stock_lots
+            WHERE product_id = {pid}
+        ) AS o
+        WHERE stock_lots.lot_id = o.lot_id AND stock_lots.remaining IS NOT o.remaining;
+"""
+
+
+TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_lots_tx_insert AFTER INSERT ON stock_transactions
+    WHEN NEW.product_id IS NOT NULL AND NEW.quantity > 0
+    BEGIN
+        INSERT INTO stock_lots (lot_id, product_id, received_date, expiry_date, quantity, remaining)
+        VALUES (NEW.transaction_id, NEW.product_id, NEW.date, NEW.expiry_date, NEW.quantity, NEW.quantity);
+        {_allocate("NEW.product_id")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_lots_tx_delete AFTER DELETE ON stock_transactions
+    BEGIN
+        DELETE FROM stock_lots WHERE lot_id = OLD.transaction_id;
+        {_allocate("OLD.product_id")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_lots_tx_update
+    AFTER UPDATE OF product_id, date, quantity, expiry_date ON stock_transactions
+    BEGIN
+        DELETE FROM stock_lots WHERE lot_id = OLD.transaction_id;
+        INSERT INTO stock_lots (lot_id, product_id, received_date, expiry_date, quantity, remaining)
+        SELECT NEW.transaction_id, NEW.product_id, NEW.date, NEW.expiry_date, NEW.quantity, NEW.quantity
+        WHERE NEW.product_id IS NOT NULL AND NEW.quantity > 0;
+        {_allocate("OLD.product_id")}
+        {_allocate("NEW.product_id")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_lots_sales_insert AFTER INSERT ON sales
+    BEGIN
+        {_allocate("NEW.product_id")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_lots_sales_delete AFTER DELETE ON sales
+    BEGIN
+        {_allocate("OLD.product_id")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_lots_sales_update AFTER UPDATE OF product_id, quantity_sold ON sales
+    BEGIN
+        {_allocate("OLD.product_id")}
+        {_allocate("NEW.product_id")}
+    END
+    """,
+)
+
+# Migration 8 ile kurulan ilk sürüm: partiler yalnızca stok girişleriyle
+# oluşuyor, satışlar uygulamadan tüketiyordu. Uygulanmış migration
+# değiştirilmediği için korunur; migration 15 TRIGGERS ile değiştirir.
+RECEIPT_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_lots_tx_insert AFTER INSERT ON stock_transactions
+    WHEN NEW.product_id IS NOT NULL AND NEW.quantity > 0
+    BEGIN
+        INSERT INTO stock_lots (lot_id, product_id, received_date, expiry_date, quantity, remaining)
+        VALUES (NEW.transaction_id, NEW.product_id, NEW.date, NEW.expiry_date, NEW.quantity, NEW.quantity);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_lots_tx_delete AFTER DELETE ON stock_transactions
+    BEGIN
+        DELETE FROM stock_lots WHERE lot_id = OLD.transaction_id;
+    END
+    """,
+    # Miktar düzeltmesi tüketilmiş kısmı korur: kalan, farkı kadar değişir.
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_lots_tx_update
+    AFTER UPDATE OF product_id, date, quantity, expiry_date ON stock_transactions
+    BEGIN
+        UPDATE stock_lots SET
+            product_id = NEW.product_id,
+            received_date = NEW.date,
+            expiry_date = NEW.expiry_date,
+            quantity = NEW.quantity,
+            remaining = MAX(MIN(remaining + NEW.quantity - quantity, NEW.quantity), 0)
+        WHERE lot_id = NEW.transaction_id;
+        DELETE FROM stock_lots WHERE lot_id = NEW.transaction_id AND (NEW.product_id IS NULL OR NEW.quantity <= 0);
+    END
+    """,
+)
+
+# Ham tablolardan sıfırdan hesaplanan partiler: geçmiş satışların toplamı
+# her ürünün partilerine FEFO sırasıyla dağıtılır.
+AGGREGATE_QUERY = """
+    SELECT t.lot_id, t.product_id, t.received_date, t.expiry_date, t.quantity,
+           MAX(MIN(t.quantity, t.cumulative - COALESCE(s.sold, 0)), 0) AS remaining
+    FROM (
+        SELECT transaction_id AS lot_id, product_id, date AS received_date, expiry_date, quantity,
+               SUM(quantity) OVER (
+                   PARTITION BY product_id ORDER BY expiry_date IS NULL, expiry_date, transaction_id
+                   ROWS UNBOUNDED PRECEDING
+               ) AS cumulative
+        FROM stock_transactions
+        WHERE product_id IS NOT NULL AND quantity > 0
+    ) t
+    LEFT JOIN (
+        SELECT product_id, SUM(quantity_sold) AS sold FROM sales GROUP BY product_id
+    ) s ON s.product_id = t.product_id
+"""
+
+
+def create_stock_lots(conn):
+    # executescript() açık transaction'ı commit ettiği için tetikleyiciler
+    # migration transaction'ı içinde tek tek çalıştırılır.
+    conn.execute(CREATE_TABLE)
+    conn.execute(OPEN_LOTS_INDEX)
+    for trigger in RECEIPT_TRIGGERS:
+        conn.execute(trigger)
+    _fill(conn)
+
+
+def replace_triggers(conn):
+    # Migration 15: satışlar partileri tetikleyicilerle tüketir ve geri verir.
+    # Uygulamanın eski tüketiminden kalan sapmalar yeniden dağıtımla düzelir.
+    for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_lots_%'"
+    ).fetchall():
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    conn.execute(SALES_INDEX)
+    for trigger in TRIGGERS:
+        conn.execute(trigger)
+    drifted = len(verify_stock_lots(conn))
+    if drifted:
+        print(f"[stock_lots] Uyarı: {drifted} üründe partiler satışlarla uyuşmuyordu; yeniden dağıtıldı.")
+    _fill(conn)
+
+
+def _fill(conn):
+    conn.execute("DELETE FROM stock_lots")
+    conn.execute(f"""
+        INSERT INTO stock_lots (lot_id, product_id, received_date, expiry_date, quantity, remaining)
+        {AGGREGATE_QUERY}
+    """)
+
+
+def rebuild_stock_lots():
+    with transaction() as conn:
+        _fill(conn)
+
+
+def verify_stock_lots(conn=None):
+    # Ürün başına açık miktar = max(parti toplamı - satılan, 0) olmalıdır.
+    conn = conn or get_connection()
+    expected = pd.read_sql_query(
+        f"SELECT product_id, SUM(remaining) AS remaining FROM ({AGGREGATE_QUERY}) GROUP BY product_id", conn
+    )
+    actual = pd.read_sql_query(
+        "SELECT product_id, SUM(remaining) AS remaining FROM stock_lots GROUP BY product_id", conn
+    )
+    df = pd.merge(expected, actual, on="product_id", how="outer", suffixes=("_expected", "_actual")).fillna(0)
+    return df[df["remaining_expected"] != df["remaining_actual"]].reset_index(drop=True)
+
+
+def get_open_lots(conn=None, product_id=None, with_expiry=False):
+    conn = conn or get_connection()
+    where = ["remaining > 0"]
+    params = []
+    if product_id is not None:
+        where.append("product_id = ?")
+        params.append(int(product_id))
+    if with_expiry:
+        where.append("expiry_date IS NOT NULL")
+    return pd.read_sql_query(f"""
+        SELECT lot_id, product_id, received_date, expiry_date, quantity, remaining
+        FROM stock_lots
+        WHERE {" AND ".join(where)}
+        ORDER BY product_id, {FEFO_ORDER}
+    """, conn, params=params)
+
+
+def get_earliest_expiry(conn=None):
+    # Ürün başına açık partilerin en yakın SKT'si; kısmi indeksten okunur.
+    conn = conn or get_connection()
+    df = pd.read_sql_query("""
+        SELECT product_id, MIN(expiry_date) AS expiry_date
+        FROM stock_lots
+        WHERE remaining > 0 AND expiry_date IS NOT NULL
+        GROUP BY product_id
+    """, conn)
+    return pd.to_datetime(df.set_index("product_id")["expiry_date"], errors="coerce")
+
+
+if __name__ == "__main__":
+    if "--rebuild" in sys.argv:
+        rebuild_stock_lots()
+        print("Parti tablosu yeniden oluşturuldu.")
+    diff = verify_stock_lots()
+    if diff.empty:
+        print("Parti tablosu tutarlı.")
+    else:
+        print(f"{len(diff)} üründe tutarsızlık bulundu:")
+        print(diff.to_string(index=False))
+        sys.exit(1)
@@ -2,38 +2,59 @@ from modules.lang.translator import translator as _
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QLabel, QWidget, QVBoxLayout, QMessageBox, QDialog, QAction
 )
-from modules.config import DB_PATH
+from modules.db.connection import get_connection
 from PyQt5.QtGui import QFont, QCursor
-from PyQt5.QtCore import Qt
-import sys, os, subprocess, re
-import sqlite3
-from modules.views.forecasting import FilteredForecastWindow
+from PyQt5.QtCore import Qt, QTimer
+import sys, os
 from modules.views.owner_create import OwnerCreateWindow
-from modules.logic.forecasting import get_forecast_with_arima
 from modules.views.user_preferences import UserPreferencesWindow
 from modules.views.product_manage import AddProductWindow, ManageProductWindow
 from modules.views.sales_entry import AddSaleWindow
-from modules.views.reports import ReportWindow, ProfitReportWindow, ExpiryReportWindow, check_stock_levels, backup_all_data
-from modules.views.date_filtered_forecast import DateFilteredForecastWindow
-from modules.views.graph_analysis import GraphWindow
 from modules.views.storage_unit_manage import StorageUnitManageWindow
 from modules.views.stock_alert import StockAlertWindow
 from modules.views.user_manage import UserManageWindow
 from modules.views.sales_overview import SalesOverviewWindow
-from modules.widgets.plotly_to_gui import PlotlyViewer
-from modules.views.owner_assistant_window import OwnerAssistantWindow
-from modules.views.ai_suggestions_window import AISuggestionsWindow
-from modules.logic.ml_assistant import InventoryForecastAssistant
 from modules.views.storage_settings_window import ProductStorageSettingsWindow
 from modules.views.product_location_linker import ProductLocationLinker
+from modules.widgets.background_task import run_in_background
+from modules.logic.forecast_worker import get_forecast_worker
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QLabel, QWidget, QVBoxLayout, QMessageBox, QDialog, QAction
 )
 from modules.lang.translator import translator
 
+# Prophet/statsmodels/sklearn/plotly/QtWebEngine çeken pencereler burada
+# içe aktarılmaz; ilgili menü ilk kez açıldığında yüklenir. Giriş sonrası
+# prewarm_modules() bunları arka planda önceden yükleyebilir.
+HEAVY_MODULES = (
+    "pandas",
+    "plotly.graph_objects",
+    "plotly.express",
+    "prophet",
+    "statsmodels.tsa.arima.model",
+    "sklearn.metrics",
+    "modules.logic.forecasting",
+    "modules.logic.ml_assistant",
+)
+PREWARM_DELAY_MS = 1500
+REORDER_MIN_DAYS = 7
+
+
+def prewarm_modules(progress=None):
+    # Yalnızca saf Python modülleri; Qt widget modülleri ana thread'de yüklenir.
+    import importlib
+    for i, name in enumerate(HEAVY_MODULES, 1):
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"[gui_main] Ön yükleme hatası: {name}: {e}")
+        if progress:
+            progress(i, len(HEAVY_MODULES), name)
+
+
 class InventoryApp(QMainWindow):
-    def __init__(self, user_role="owner", allowed_modules=None, nickname="", user_id=None):
+    def __init__(self, user_role="owner", allowed_modules=None, nickname="", user_id=None, prewarm=True):
         super().__init__()
         self.user_role = user_role
         self.allowed_modules = allowed_modules if allowed_modules else []
@@ -103,13 +124,14 @@ class InventoryApp(QMainWindow):
             analysis_menu.addAction(translator.translate("menu.graph_analysis"), self.show_graph)
             analysis_menu.addAction(translator.translate("menu.profit_report"), self.show_profit_report)
             analysis_menu.addAction(translator.translate("menu.expiry_report"), self.show_expiry_report)
+            analysis_menu.addAction(translator.translate("menu.waste_risk"), self.show_waste_risk)
 
         if self.user_role in ["admin", "owner"] or "stock" in self.allowed_modules:
             other_menu = menubar.addMenu(translator.translate("menu.stock_backup"))
             other_menu.addAction(translator.translate("menu.storage_settings"), self.show_storage_settings)
             other_menu.addAction(translator.translate("menu.manage_storage"), self.show_storage_manager)
             other_menu.addAction(translator.translate("menu.stock_alert"), self.show_stock_alert)
-            other_menu.addAction(translator.translate("menu.backup_data"), backup_all_data)
+            other_menu.addAction(translator.translate("menu.backup_data"), self.backup_data)
 
         if self.user_role in ["admin", "owner"]:
             ai_menu = menubar.addMenu(translator.translate("menu.ai_support"))
@@ -117,6 +139,7 @@ class InventoryApp(QMainWindow):
             ai_menu.addAction(translator.translate("menu.update_trends"), self.update_trends_from_api)
             ai_menu.addAction(translator.translate("menu.show_suggestions"), self.show_ai_suggestions)
             ai_menu.addAction(translator.translate("menu.reorder_advice"), self.show_reorder_advice)
+            ai_menu.addAction(translator.translate("menu.markdown"), self.show_markdown)
 
         welcome_label = QLabel(translator.translate("app.welcome_message"))
         welcome_label.setAlignment(Qt.AlignCenter)
@@ -128,16 +151,23 @@ class InventoryApp(QMainWindow):
         container.setLayout(layout)
         self.setCentralWidget(container)
 
+        if prewarm:
+            QTimer.singleShot(PREWARM_DELAY_MS, self.start_prewarm)
+
+    def start_prewarm(self):
+        # Ağır kütüphaneler ve tahmin süreci kullanıcı beklemeden hazırlanır.
+        self.prewarm_task = run_in_background(prewarm_modules)
+        self.worker_warm_task = run_in_background(lambda progress=None: get_forecast_worker().submit("ping"))
+        # Grafik görünümleri ana thread'de oluşturulur; plotly.js bu sırada yüklenir.
+        from modules.widgets.chart_host import warm_chart_pool
+        warm_chart_pool()
+
 
     def apply_user_theme(self):
         try:
-            BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-            DB_PATH = os.path.join(BASE_DIR, "../database/inventory.db")
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
+            cursor = get_connection().cursor()
             cursor.execute("SELECT theme FROM users WHERE id = ?", (self.user_id,))
             result = cursor.fetchone()
-            conn.close()
             theme = result[0] if result and result[0] else "Açık"
             if theme == "Koyu":
                 self.setStyleSheet("""
@@ -176,6 +206,7 @@ class InventoryApp(QMainWindow):
             self.setStyleSheet("")
 
     def show_ai_assistant(self):
+        from modules.views.owner_assistant_window import OwnerAssistantWindow
         self.ai_window = OwnerAssistantWindow()
         self.ai_window.exec_()
 
@@ -184,10 +215,12 @@ class InventoryApp(QMainWindow):
         self.storage_window.exec_()
 
     def show_ai_suggestions(self):
+        from modules.views.ai_suggestions_window import AISuggestionsWindow
         self.suggestion_window = AISuggestionsWindow()
         self.suggestion_window.exec_()
 
     def update_trends_from_api(self):
+        from modules.logic.ml_assistant import InventoryForecastAssistant
         try:
             assistant = InventoryForecastAssistant(enable_trends=False)
             assistant.update_trend_scores()
@@ -210,32 +243,36 @@ class InventoryApp(QMainWindow):
     def show_worker_manage(self): from modules.views.worker_manage import WorkerManageWindow; self.worker_manage_window = WorkerManageWindow(owner_id=self.user_id); self.worker_manage_window.exec_()
     def show_add_sale(self): self.sale_window = AddSaleWindow(user_id=self.user_id); self.sale_window.exec_()
     def show_filtered_forecast(self):
+        from modules.views.forecasting import FilteredForecastWindow
         self.filter_forecast_window = FilteredForecastWindow()
         self.filter_forecast_window.exec_()
-    def show_report(self): self.report_window = ReportWindow(); self.report_window.exec_()
+    def show_report(self): from modules.views.reports import ReportWindow; self.report_window = ReportWindow(); self.report_window.exec_()
     def show_forecast(self):
-        try:
-            base_path = os.path.dirname(os.path.abspath(__file__))
-            module_path = os.path.join(base_path, "ml_module.py")
-            result = subprocess.run([sys.executable, module_path], capture_output=True, text=True, cwd=base_path)
-            match = re.search(r"<<HTML_PATH>>(.*?)<<END>>", result.stdout)
-            if match:
-                html_path = match.group(1).strip()
-                viewer = PlotlyViewer((html_path, "Tahmin Grafiği"))
-                viewer.exec_()
-            else:
-                QMessageBox.warning(self, "Uyarı", "Tahmin grafiği oluşturulamadı.")
-        except Exception as e:
-            QMessageBox.critical(self, "Hata", f"Grafik gösterimi başarısız:\n{str(e)}")
-
-    def show_graph(self): self.graph_window = GraphWindow(); self.graph_window.exec_()
-    def show_date_forecast(self): self.date_forecast_window = DateFilteredForecastWindow(); self.date_forecast_window.exec_()
-    def show_profit_report(self): self.profit_window = ProfitReportWindow(); self.profit_window.exec_()
-    def show_expiry_report(self): self.expiry_window = ExpiryReportWindow(); self.expiry_window.exec_()
+        # Tahmin, oturum boyunca açık kalan tahmin sürecinde hesaplanır;
+        # yalnızca ilk çağrı içe aktarma maliyetini öder.
+        self.forecast_task = run_in_background(
+            lambda progress=None: get_forecast_worker().submit("outlook"),
+            on_result=self.display_forecast,
+            on_error=lambda error: QMessageBox.critical(self, "Hata", f"Grafik gösterimi başarısız:\n{error}")
+        )
+
+    def display_forecast(self, outlook):
+        if outlook is None:
+            QMessageBox.warning(self, "Uyarı", "Tahmin grafiği oluşturulamadı.")
+            return
+        from modules.widgets.plotly_to_gui import PlotlyViewer
+        viewer = PlotlyViewer((outlook.to_figure(), "Tahmin Grafiği"))
+        viewer.exec_()
+
+    def show_graph(self): from modules.views.graph_analysis import GraphWindow; self.graph_window = GraphWindow(); self.graph_window.exec_()
+    def show_date_forecast(self): from modules.views.date_filtered_forecast import DateFilteredForecastWindow; self.date_forecast_window = DateFilteredForecastWindow(); self.date_forecast_window.exec_()
+    def show_profit_report(self): from modules.views.reports import ProfitReportWindow; self.profit_window = ProfitReportWindow(); self.profit_window.exec_()
+    def show_expiry_report(self): from modules.views.reports import ExpiryReportWindow; self.expiry_window = ExpiryReportWindow(); self.expiry_window.exec_()
     def show_user_manage(self): self.user_manage_window = UserManageWindow(owner_id=self.user_id); self.user_manage_window.exec_()
     def show_user_admin_manage(self): from modules.views.user_admin_manage import UserAdminManageWindow; self.admin_user_manage_window = UserAdminManageWindow(); self.admin_user_manage_window.exec_()
+    def backup_data(self): from modules.views.reports import backup_all_data; backup_all_data()
     def show_sales_overview(self): self.sales_window = SalesOverviewWindow(user_role=self.user_role, user_id=self.user_id); self.sales_window.exec_()
-    def show_stock_alert(self): self.stock_alert_window = StockAlertWindow(); self.stock_alert_window.exec_(); check_stock_levels()
+    def show_stock_alert(self): from modules.views.reports import check_stock_levels; self.stock_alert_window = StockAlertWindow(); self.stock_alert_window.exec_(); check_stock_levels()
     def logout_and_restart(self):
         from modules.views.login_window import LoginRegisterWindow
         self.close()
@@ -252,15 +289,61 @@ class InventoryApp(QMainWindow):
         self.linker_window.exec_()
     def show_reorder_advice(self):
         from modules.logic.reorder_advisor import ReorderAdvisor
-        advisor = ReorderAdvisor()
-        suggestions = advisor.compute_reorder_advice(min_days=7)
-        if not suggestions:
-            QMessageBox.information(self, "Bilgi", "Tüm ürünlerde yeterli stok mevcut.")
-            return
 
-        text = ""
-        for item in suggestions:
-            text += f"📦 {item['product_name']} → {item['suggested_order']} adet önerilir.\n"
+        def compute(progress=None):
+            # Bağlantı thread'e özel; danışman arka planda oluşturulur.
+            advisor = ReorderAdvisor()
+            return advisor.compute_plan(min_days=REORDER_MIN_DAYS), advisor
+
+        self.reorder_task = run_in_background(
+            compute,
+            on_result=lambda result: self.display_reorder_advice(*result),
+            on_error=lambda error: QMessageBox.critical(self, "Hata", f"Stok önerisi hesaplanamadı:\n{error}")
+        )
 
-        QMessageBox.information(self, "Stok Yenileme Önerisi", text)
+    def display_reorder_advice(self, plan, advisor=None):
+        if not plan["needs_order"].any():
+            QMessageBox.information(self, _("info.title"), _("reorder.all_sufficient"))
+            return
+        from modules.views.reorder_advice_window import ReorderAdviceWindow
+        self.reorder_window = ReorderAdviceWindow(plan, advisor, REORDER_MIN_DAYS)
+        self.reorder_window.exec_()
+
+    def show_waste_risk(self):
+        from modules.logic.waste_risk import WasteRiskEngine
+
+        def compute(progress=None):
+            return WasteRiskEngine().compute()
+
+        self.waste_task = run_in_background(
+            compute,
+            on_result=self.display_waste_risk,
+            on_error=lambda error: QMessageBox.critical(self, "Hata", f"Fire riski hesaplanamadı:\n{error}")
+        )
+
+    def display_waste_risk(self, plan):
+        from modules.views.waste_risk_window import WasteRiskWindow
+        self.waste_window = WasteRiskWindow(plan)
+        self.waste_window.exec_()
+
+    def show_markdown(self):
+        from modules.logic.markdown_optimizer import MarkdownOptimizer
+
+        def compute(progress=None):
+            optimizer = MarkdownOptimizer()
+            return optimizer.optimize(), optimizer.elasticity
+
+        self.markdown_task = run_in_background(
+            compute,
+            on_result=lambda result: self.display_markdown(*result),
+            on_error=lambda error: QMessageBox.critical(self, "Hata", f"İndirim önerisi hesaplanamadı:\n{error}")
+        )
+
+    def display_markdown(self, plan, elasticity=None):
+        if plan.empty:
+            QMessageBox.information(self, _("info.title"), _("markdown.none"))
+            return
+        from modules.views.markdown_window import MarkdownWindow
+        self.markdown_window = MarkdownWindow(plan, elasticity)
+        self.markdown_window.exec_()
 
@@ -1,126 +1,156 @@
-import sqlite3
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-from modules.config import DB_PATH
+from dataclasses import dataclass
+from typing import Callable, Optional
+from modules.db.connection import get_connection
+from modules.db.stock_levels import get_stock_levels
+from modules.db.stock_lots import get_earliest_expiry
+from modules.db.demand_matrix import get_demand_matrix
 from modules.lang.translator import translator
 
+# Operasyonel öneriler: her kural tek birleşik tablo (ürün x depo bağlantısı)
+# üzerinde vektörel bir koşul ve bir mesaj şablonudur. Kurallar toplu
+# değerlendirilir; sonuç satır/ürün/kural/mesaj sütunlarından oluşur.
+# Kural listesi AISuggestionEngine(rules=...) ile değiştirilebilir.
+
+SLOW_DAILY_AVG = 0.3
+EXPIRY_WARNING_DAYS = 10
+FRONT_SHELF_DAYS = 7
+LOW_RECENT_DEMAND = 1
+CAPACITY_FULL_PCT = 90
+CAPACITY_LOW_PCT = 30
+
+
+@dataclass(frozen=True)
+class SuggestionRule:
+    name: str
+    template: str                       # çeviri anahtarı
+    when: Callable                      # tablo -> bool dizisi
+    params: Optional[Callable] = None   # tablo -> {şablon alanı: dizi}
+
+
+def _expires_within(df, days):
+    # SKT'si olmayan satırlarda NaN karşılaştırması False döner.
+    return df["days_to_expiry"] <= days
+
+
+def _usage_params(df):
+    return {"pct": df["usage_pct"].round(1)}
+
+
+DEFAULT_RULES = (
+    SuggestionRule("slow_moving", "ai.slow_selling_general",
+                   lambda df: df["is_slow"]),
+    SuggestionRule("expiring_and_slow", "ai.expiring_and_slow",
+                   lambda df: _expires_within(df, EXPIRY_WARNING_DAYS) & df["is_slow"]),
+    SuggestionRule("expiring_discount", "ai.expiring_discount",
+                   lambda df: _expires_within(df, EXPIRY_WARNING_DAYS) & ~df["is_slow"]),
+    SuggestionRule("unsold_with_stock", "ai.unsold_with_stock",
+                   lambda df: (df["daily_avg"] == 0) & (df["stock"] > 0)),
+    SuggestionRule("front_shelf_critical", "ai.front_shelf_critical",
+                   lambda df: _expires_within(df, FRONT_SHELF_DAYS) & (df["daily_avg_recent"] < LOW_RECENT_DEMAND)),
+    SuggestionRule("front_shelf", "ai.front_shelf",
+                   lambda df: _expires_within(df, FRONT_SHELF_DAYS) & (df["daily_avg_recent"] >= LOW_RECENT_DEMAND)),
+    SuggestionRule("low_demand_shelf", "ai.low_demand_shelf",
+                   lambda df: (df["days_to_expiry"] > FRONT_SHELF_DAYS) & (df["daily_avg_recent"] < LOW_RECENT_DEMAND)),
+    SuggestionRule("capacity_full", "ai.capacity_full",
+                   lambda df: df["usage_pct"] >= CAPACITY_FULL_PCT, _usage_params),
+    SuggestionRule("capacity_low", "ai.capacity_low",
+                   lambda df: df["usage_pct"] < CAPACITY_LOW_PCT, _usage_params),
+)
+
+
 class AISuggestionEngine:
-    def __init__(self):
-        self.conn = sqlite3.connect(DB_PATH)
+    def __init__(self, rules=None):
+        self.conn = get_connection()
         self.today = pd.Timestamp.today()
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
 
     def get_dataframes(self):
         products = pd.read_sql_query("SELECT * FROM products", self.conn)
-        sales = pd.read_sql_query("SELECT * FROM sales", self.conn)
-        stock = pd.read_sql_query("SELECT * FROM stock_transactions", self.conn)
+        earliest_expiry = get_earliest_expiry(self.conn)
         links = pd.read_sql_query("SELECT * FROM product_storage_links", self.conn)
-        fridges = pd.read_sql_query("SELECT id, max_capacity FROM fridges", self.conn)
-        shelves = pd.read_sql_query("SELECT id, max_capacity FROM shelves", self.conn)
-
-        sales['date'] = pd.to_datetime(sales['date'], errors='coerce')
-        stock['expiry_date'] = pd.to_datetime(stock['expiry_date'], errors='coerce')
-        return products, sales, stock, links, fridges, shelves
+        capacities = pd.read_sql_query("""
+            SELECT 'fridge' AS storage_type, id AS storage_id, max_capacity FROM fridges
+            UNION ALL
+            SELECT 'shelf' AS storage_type, id AS storage_id, max_capacity FROM shelves
+        """, self.conn)
+        return products, earliest_expiry, links, capacities
 
     def detect_slow_moving(self, avg_daily):
-        return avg_daily < 0.3
-
-    def analyze(self):
-        products, sales, stock, links, fridges, shelves = self.get_dataframes()
-        results = []
+        return avg_daily < SLOW_DAILY_AVG
+
+    def build_frame(self):
+        # Kuralların üzerinde çalıştığı tek tablo; depo kapasitesi tek join ile gelir.
+        products, earliest_expiry, links, capacities = self.get_dataframes()
+        demand = get_demand_matrix(self.conn)
+        daily_avg = demand.daily_average(as_of=self.today)
+        daily_avg_recent = demand.daily_average(30, self.today)
+        stock_levels = get_stock_levels(self.conn).set_index('product_id')['current_stock']
+
+        df = products
+        product_ids = df['product_id']
+        df['daily_avg'] = product_ids.map(daily_avg).fillna(0.0)
+        df['daily_avg_recent'] = product_ids.map(daily_avg_recent).fillna(0.0)
+        df['earliest_expiry'] = pd.to_datetime(product_ids.map(earliest_expiry))
+        df['stock'] = product_ids.map(stock_levels).fillna(0)
+        # Hacmi bilinmeyen ürünlerde doluluk NaN kalır; kapasite kuralları tetiklenmez.
+        df['unit_volume'] = pd.to_numeric(df['unit_volume'], errors='coerce')
 
-        span = max((self.today - sales['date'].min()).days, 1)
-        sale_totals = sales.groupby('product_id')['quantity_sold'].sum().reset_index()
-        sale_totals['daily_avg'] = sale_totals['quantity_sold'] / span
-
-        expiry = stock.dropna(subset=['expiry_date'])
-        earliest_expiry = expiry.groupby('product_id')['expiry_date'].min().reset_index()
-        earliest_expiry.columns = ['product_id', 'earliest_expiry']
-
-        recent_sales = sales[sales["date"] >= self.today - timedelta(days=30)]
-        avg_recent = recent_sales.groupby("product_id")["quantity_sold"].mean().reset_index()
-        avg_recent.columns = ["product_id", "daily_avg_recent"]
-
-        stock_total = stock.groupby('product_id')['quantity'].sum().reset_index()
-        stock_total.columns = ['product_id', 'stock']
-
-        df = pd.merge(products, sale_totals[['product_id', 'daily_avg']], on='product_id', how='left').fillna(0)
-        df = pd.merge(df, avg_recent, on='product_id', how='left').fillna(0)
-        df = pd.merge(df, earliest_expiry, on='product_id', how='left')
-        df = pd.merge(df, stock_total, on='product_id', how='left').fillna(0)
         df = pd.merge(df, links, on='product_id', how='left')
+        df = pd.merge(df, capacities, on=['storage_type', 'storage_id'], how='left')
+
+        df['days_to_expiry'] = (df['earliest_expiry'] - self.today).dt.days
+        df['is_slow'] = self.detect_slow_moving(df['daily_avg'])
+        capacity = df['max_capacity'].where(df['max_capacity'] > 0)
+        df['usage_pct'] = df['stock'] * df['unit_volume'] / capacity * 100
+        return df.reset_index(drop=True)
+
+    def evaluate(self, df=None):
+        # Döner: (tablo, öneriler); öneriler satır sırasına, her satırda kural
+        # sırasına göre dizilir.
+        if df is None:
+            df = self.build_frame()
+        parts = []
+        for order, rule in enumerate(self.rules):
+            rows = np.flatnonzero(np.asarray(rule.when(df), dtype=bool))
+            if not len(rows):
+                continue
+            template = translator(rule.template)
+            if rule.params is None:
+                messages = [template] * len(rows)
+            else:
+                params = {key: np.asarray(values)[rows] for key, values in rule.params(df).items()}
+                messages = [template.format(**dict(zip(params, values))) for values in zip(*params.values())]
+            parts.append(pd.DataFrame({
+                "row": rows,
+                "order": order,
+                "product_id": df['product_id'].values[rows],
+                "rule": rule.name,
+                "message": messages,
+            }))
+
+        if not parts:
+            return df, pd.DataFrame(columns=["row", "product_id", "rule", "message"])
+        hits = pd.concat(parts, ignore_index=True).sort_values(["row", "order"], kind="stable")
+        return df, hits.drop(columns="order").reset_index(drop=True)
 
-        for _, row in df.iterrows():
-            suggestions = []
-            pid = row["product_id"]
-            pname = row["product_name"]
-            avg = row["daily_avg"]
-            avg_recent = row["daily_avg_recent"]
-            expiry = row["earliest_expiry"]
-            stock_amt = row["stock"]
-            volume = row.get("unit_volume", 1)
-            storage_type = row.get("storage_type", None)
-            storage_id = row.get("storage_id", None)
-
-            if self.detect_slow_moving(avg):
-                suggestions.append(translator("ai.slow_selling_general"))
-
-            if isinstance(expiry, pd.Timestamp) and pd.notna(expiry):
-                days_left = (expiry - self.today).days
-                if days_left <= 10:
-                    if self.detect_slow_moving(avg):
-                        suggestions.append(translator("ai.expiring_and_slow"))
-                    else:
-                        suggestions.append(translator("ai.expiring_discount"))
-
-            if avg == 0 and stock_amt > 0:
-                suggestions.append(translator("ai.unsold_with_stock"))
-
-            if isinstance(expiry, pd.Timestamp) and pd.notna(expiry):
-                try:
-                    days_to_exp = (expiry - self.today).days
-                    if days_to_exp <= 7 and avg_recent < 1:
-                        suggestions.append(translator("ai.front_shelf_critical"))
-                    elif days_to_exp <= 7:
-                        suggestions.append(translator("ai.front_shelf"))
-                    elif avg_recent < 1:
-                        suggestions.append(translator("ai.low_demand_shelf"))
-                except Exception:
-                    pass
-
-            if pd.notna(storage_id) and pd.notna(storage_type):
-                max_cap = None
-                if storage_type == "fridge":
-                    row_cap = fridges[fridges['id'] == storage_id]
-                    if not row_cap.empty:
-                        max_cap = row_cap["max_capacity"].values[0]
-                elif storage_type == "shelf":
-                    row_cap = shelves[shelves['id'] == storage_id]
-                    if not row_cap.empty:
-                        max_cap = row_cap["max_capacity"].values[0]
-
-                if max_cap:
-                    used = stock_amt * volume
-                    usage_pct = (used / max_cap) * 100
-                    if usage_pct >= 90:
-                        suggestions.append(translator("ai.capacity_full").format(pct=round(usage_pct, 1)))
-                    elif usage_pct < 30:
-                        suggestions.append(translator("ai.capacity_low").format(pct=round(usage_pct, 1)))
-
-            if suggestions:
-                if isinstance(expiry, pd.Timestamp) and pd.notna(expiry):
-                    expiry_str = expiry.strftime('%Y-%m-%d')
-                else:
-                    expiry_str = translator("common.no_expiry")
-
-                results.append({
-                    "product_id": pid,
-                    "product_name": pname,
-                    "daily_avg": round(avg, 2),
-                    "stock": int(stock_amt),
-                    "storage_type": storage_type if storage_type else translator("common.unknown"),
-                    "storage_id": storage_id if storage_id else "-",
-                    "earliest_expiry": expiry_str,
-                    "suggestions": suggestions
-                })
-
-        return results
+    def analyze(self):
+        df, hits = self.evaluate()
+        if hits.empty:
+            return []
+
+        suggestions = hits.groupby("row", sort=True)["message"].agg(list)
+        flagged = df.loc[suggestions.index]
+        storage_id = flagged['storage_id'].astype('Int64').astype(object)
+        results = pd.DataFrame({
+            "product_id": flagged['product_id'].values,
+            "product_name": flagged['product_name'].values,
+            "daily_avg": [round(avg, 2) for avg in flagged['daily_avg']],
+            "stock": flagged['stock'].astype(int).values,
+            "storage_type": flagged['storage_type'].fillna(translator("common.unknown")).values,
+            "storage_id": storage_id.where(storage_id.notna(), "-").values,
+            "earliest_expiry": flagged['earliest_expiry'].dt.strftime('%Y-%m-%d').fillna(translator("common.no_expiry")).values,
+            "suggestions": suggestions.values,
+        })
+        return results.to_dict("records")
@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+from modules.lang.translator import translator
+
+# Uzun zaman serileri grafiğe gönderilmeden önce seyreltilir.
+#  - Görünen aralığın gün sayısına ve grafik genişliğine göre çözünürlük
+#    seçilir: günlük, haftalık ya da aylık (kova ortalaması; ölçek
+#    yakınlaştırmada değişmez).
+#  - Kalan nokta sayısı genişliği aşarsa LTTB ya da min/max kovalama ile
+#    piksel başına PX_PER_POINT noktaya indirilir.
+#  - ZoomableFigure, yakınlaştırmada yalnızca görünen aralığı yeniden
+#    örnekler; chart_host bunu grafik görünümüne geri gönderir.
+
+DEFAULT_WIDTH_PX = 1000
+PX_PER_POINT = 2
+MIN_POINTS = 20
+# Çözünürlük inceliği: kova sayısı noktaların bu katına kadar ise daha ince
+# çözünürlük seçilir, fazlası LTTB ile seyreltilir.
+RESOLUTION_SLACK = 4
+RESOLUTIONS = {"D": 1, "W": 7, "M": 30.44}
+_RESAMPLE_RULES = {"W": {"rule": "W-MON", "label": "left", "closed": "left"}, "M": {"rule": "MS"}}
+
+
+def lttb_indices(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: ilk ve son nokta korunur, her kovadan
+    # bir önceki seçilen nokta ve sonraki kovanın ortalamasıyla en büyük
+    # üçgeni oluşturan nokta seçilir.
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (threshold - 2)
+    edges = (np.arange(threshold - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        indices[i + 1] = a
+    return indices
+
+
+def minmax_indices(y, threshold):
+    # Her kovadan en küçük ve en büyük nokta; tepe ve dipler kaybolmaz.
+    n = len(y)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    buckets = threshold // 2
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    picked = [0, n - 1]
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            chunk = y[start:end]
+            picked.append(start + int(chunk.argmin()))
+            picked.append(start + int(chunk.argmax()))
+    return np.unique(picked)
+
+
+def choose_resolution(span_days, max_points):
+    for resolution, days in RESOLUTIONS.items():
+        if span_days / days <= max_points * RESOLUTION_SLACK:
+            return resolution
+    return "M"
+
+
+class TimeSeriesSampler:
+    def __init__(self, dates, columns, method="lttb"):
+        # columns: {ad: günlük değerler}; tarihler günlük ve boşluksuz olmalı.
+        self.frame = pd.DataFrame(
+            {name: np.asarray(values, dtype=np.float64) for name, values in columns.items()},
+            index=pd.DatetimeIndex(dates)
+        ).sort_index()
+        self.method = method
+        self._levels = {"D": self.frame}
+
+    def level(self, resolution):
+        if resolution not in self._levels:
+            self._levels[resolution] = self.frame.resample(**_RESAMPLE_RULES[resolution]).mean()
+        return self._levels[resolution]
+
+    def sample(self, start=None, end=None, width_px=None):
+        # Döner: (çözünürlük, {ad: (tarihler, değerler)})
+        if self.frame.empty:
+            return "D", {name: (self.frame.index.values, self.frame[name].values) for name in self.frame}
+        start = pd.Timestamp(start) if start is not None else self.frame.index[0]
+        end = pd.Timestamp(end) if end is not None else self.frame.index[-1]
+        max_points = max(int(width_px or DEFAULT_WIDTH_PX) // PX_PER_POINT, MIN_POINTS)
+        resolution = choose_resolution((end - start).days + 1, max_points)
+        frame = self.level(resolution)
+
+        # Kenarlarda birer kova fazlası: çizgi görünür alanın dışına uzanır.
+        lo = max(frame.index.searchsorted(start, side="left") - 1, 0)
+        hi = min(frame.index.searchsorted(end, side="right") + 1, len(frame))
+        window = frame.iloc[lo:hi]
+        x = window.index.values
+        sampled = {}
+        for name in window.columns:
+            y = window[name].values
+            if self.method == "minmax":
+                idx = minmax_indices(y, max_points)
+            else:
+                idx = lttb_indices(x.astype(np.int64), y, max_points)
+            sampled[name] = (x[idx], y[idx])
+        return resolution, sampled
+
+
+def _resolution_suffix(resolution):
+    if resolution == "W":
+        return f" ({translator('chart.resolution_week')})"
+    if resolution == "M":
+        return f" ({translator('chart.resolution_month')})"
+    return ""
+
+
+class ZoomableFigure:
+    # Plotly figürü + yakınlaştırmada yeniden örneklenecek izler.
+    # traces: {iz_indeksi: sampler sütunu}
+    def __init__(self, figure, sampler, traces, width_px=DEFAULT_WIDTH_PX):
+        self.figure = figure
+        self.sampler = sampler
+        self.traces = dict(traces)
+        self.base_names = {i: figure.data[i].name for i in self.traces}
+        resolution, sampled = sampler.sample(width_px=width_px)
+        for i, name in self.traces.items():
+            x, y = sampled[name]
+            self.figure.data[i].update(x=x, y=y, name=self.base_names[i] + _resolution_suffix(resolution))
+
+    def zoom_update(self, start=None, end=None, width_px=None):
+        # Plotly.restyle için: {"indices": [...], "x": [[...]], "y": [[...]], "name": [...]}
+        resolution, sampled = self.sampler.sample(start, end, width_px)
+        update = {"indices": [], "x": [], "y": [], "name": []}
+        for i, name in self.traces.items():
+            x, y = sampled[name]
+            update["indices"].append(i)
+            update["x"].append(np.datetime_as_string(x, unit="D").tolist())
+            update["y"].append(np.round(y, 4).tolist())
+            update["name"].append(self.base_names[i] + _resolution_suffix(resolution))
+        return update
+
+    def to_json(self):
+        return self.figure.to_json()
+
+    def full_figure(self):
+        # Dışa aktarım için tüm günlük noktalar.
+        import plotly.graph_objects as go
+        figure = go.Figure(self.figure)
+        for i, name in self.traces.items():
+            figure.data[i].update(x=self.sampler.frame.index, y=self.sampler.frame[name].values, name=self.base_names[i])
+        return figure
+
+    def write_html(self, *args, **kwargs):
+        return self.full_figure().write_html(*args, **kwargs)
@@ -1,34 +1,27 @@
-import sqlite3
 import pandas as pd
 
-from modules.config import DB_PATH
+from modules.db.connection import get_connection
 
 def get_profit_report():
     try:
-        conn = sqlite3.connect(DB_PATH)
-        df_sales = pd.read_sql_query("SELECT * FROM sales", conn)
-        df_products = pd.read_sql_query("SELECT * FROM products", conn)
-        conn.close()
+        conn = get_connection()
+        # Satış günündeki fiyat ve maliyetlerle değerlenmiş günlük özet.
+        grouped = pd.read_sql_query("""
+            SELECT p.product_name, SUM(d.quantity) AS quantity_sold,
+                   SUM(d.revenue) AS revenue, SUM(d.cost) AS cost
+            FROM sales_daily d
+            JOIN products p ON p.product_id = d.product_id
+            GROUP BY p.product_name
+        """, conn, index_col="product_name")
 
-        df_merged = pd.merge(df_sales, df_products, on="product_id")
-        grouped = df_merged.groupby("product_name")
-
-        report = []
-        for name, group in grouped:
-            total_qty = group["quantity_sold"].sum()
-            revenue = (group["quantity_sold"] * group["selling_price"]).sum()
-            cost = (group["quantity_sold"] * group["cost_price"]).sum()
-            profit = revenue - cost
-
-            report.append({
-                "Product": name,
-                "Quantity Sold": total_qty,
-                "Revenue": revenue,
-                "Cost": cost,
-                "Profit": profit
-            })
-
-        return report
+        report = pd.DataFrame({
+            "Product": grouped.index,
+            "Quantity Sold": grouped["quantity_sold"].values,
+            "Revenue": grouped["revenue"].values,
+            "Cost": grouped["cost"].values,
+            "Profit": (grouped["revenue"] - grouped["cost"]).values,
+        })
+        return report.to_dict("records")
     except Exception as e:
         print(f"[finance] Hata: {e}")
         return []
@@ -0,0 +1,181 @@
+import multiprocessing
+import threading
+from collections import OrderedDict
+
+# Oturum boyunca açık kalan tahmin süreci. İlk iş geldiğinde bir kez
+# başlatılır; pandas/Prophet/cmdstan içe aktarımı ve son kurulan modeller
+# süreçte bellekte kalır. GUI işleri bir multiprocessing Pipe üzerinden
+# toplu gönderir ve her iş için {"ok": ..., "value"/"error": ...} sözlüğü
+# alır; stdout'tan metin ayıklanmaz.
+
+RECENT_MODELS = 32
+
+
+# --- çocuk süreç --------------------------------------------------------------
+
+def _job_ping():
+    return "pong"
+
+
+def _job_outlook(as_of=None, horizon=30, output_dir=None):
+    # Ara tablolar süreçte bellekte kaldığından tekrar çağrılar hızlıdır.
+    # Grafik GUI'de to_figure() ile çizilir; HTML yalnızca istenirse yazılır.
+    from modules.ml_module import compute_30_day_outlook
+    outlook = compute_30_day_outlook(as_of, horizon)
+    if output_dir:
+        outlook.write_html(output_dir)
+    return outlook
+
+
+_recent = OrderedDict()
+
+
+def _job_prophet_arima(series, periods=10, product="", scope="all"):
+    # Aynı seri tekrar gelirse SQLite önbelleğine bile gidilmez.
+    from modules.db.forecast_cache import series_fingerprint
+    from modules.logic.forecasting import fit_prophet_arima
+    key = (product, periods, scope, series_fingerprint(series))
+    if key in _recent:
+        _recent.move_to_end(key)
+        return _recent[key]
+    value = fit_prophet_arima(series, periods, product, scope)
+    _recent[key] = value
+    while len(_recent) > RECENT_MODELS:
+        _recent.popitem(last=False)
+    return value
+
+
+JOBS = {
+    "ping": _job_ping,
+    "outlook": _job_outlook,
+    "prophet_arima": _job_prophet_arima,
+}
+
+
+def _warm_imports():
+    import pandas  # noqa: F401
+    import prophet  # noqa: F401
+    import modules.logic.forecasting  # noqa: F401
+
+
+def _worker_main(pipe, db_path):
+    import modules.db.connection as connection
+    connection.DB_PATH = db_path
+    try:
+        _warm_imports()
+    except Exception as e:
+        print(f"[forecast_worker] Hata: {e}")
+
+    while True:
+        try:
+            message = pipe.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        results = []
+        for kind, kwargs in message:
+            if kind not in JOBS:
+                results.append({"ok": False, "error": f"Bilinmeyen iş: {kind}"})
+                continue
+            try:
+                results.append({"ok": True, "value": JOBS[kind](**kwargs)})
+            except Exception as e:
+                print(f"[forecast_worker] Hata: {kind}: {e}")
+                results.append({"ok": False, "error": str(e)})
+        try:
+            pipe.send(results)
+        except (BrokenPipeError, OSError):
+            break
+    connection.close_connection()
+
+
+# --- GUI tarafı ----------------------------------------------------------------
+
+class ForecastWorkerError(Exception):
+    pass
+
+
+class ForecastWorker:
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self._process = None
+        self._pipe = None
+        self._lock = threading.Lock()
+
+    def is_running(self):
+        return self._process is not None and self._process.is_alive()
+
+    def _start(self):
+        if self.db_path is None:
+            import modules.db.connection as connection
+            self.db_path = connection.DB_PATH
+        # spawn: Qt içeren ana süreç fork edilmez.
+        ctx = multiprocessing.get_context("spawn")
+        pipe, child = ctx.Pipe()
+        process = ctx.Process(target=_worker_main, args=(child, self.db_path), daemon=True)
+        try:
+            process.start()
+        finally:
+            child.close()
+        self._process, self._pipe = process, pipe
+
+    def _exchange(self, jobs):
+        if not self.is_running():
+            self._start()
+        self._pipe.send(jobs)
+        # Süreç ölürse karşı uç kapanır ve recv EOFError fırlatır.
+        return self._pipe.recv()
+
+    def submit_batch(self, jobs):
+        # jobs: [(iş_adı, {parametreler}), ...]; sonuçlar aynı sırayla döner.
+        jobs = [(kind, dict(kwargs or {})) for kind, kwargs in jobs]
+        with self._lock:
+            try:
+                return self._exchange(jobs)
+            except (EOFError, BrokenPipeError, OSError) as e:
+                # Süreç çöktüyse bir kez yeniden başlatılır.
+                print(f"[forecast_worker] Yeniden başlatılıyor: {e}")
+                self._stop_process()
+                return self._exchange(jobs)
+
+    def submit(self, kind, **kwargs):
+        result = self.submit_batch([(kind, kwargs)])[0]
+        if not result["ok"]:
+            raise ForecastWorkerError(result["error"])
+        return result["value"]
+
+    def _stop_process(self):
+        if self._process is None:
+            return
+        try:
+            self._pipe.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self._process.join(3)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._pipe.close()
+        self._process = None
+        self._pipe = None
+
+    def shutdown(self):
+        with self._lock:
+            self._stop_process()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_forecast_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = ForecastWorker()
+        return _worker
+
+
+def shutdown_forecast_worker():
+    if _worker is not None:
+        _worker.shutdown()
@@ -1,55 +1,89 @@
-import sqlite3
 import pandas as pd
 import plotly.graph_objects as go
 import numpy as np
 from prophet import Prophet
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 from statsmodels.tsa.arima.model import ARIMA 
-from modules.config import DB_PATH
+from modules.db.connection import get_connection
+from modules.db.sales_daily import get_product_ids
+from modules.db.demand_matrix import get_demand_matrix
+from modules.db.forecast_cache import cached_forecast
+from modules.logic.forecast_worker import get_forecast_worker
+from modules.logic.downsample import TimeSeriesSampler, ZoomableFigure
+
+PROPHET_PARAMS = {"daily_seasonality": True}
+
+
+def fit_prophet_arima(df_prophet, periods=10, product="", scope="all"):
+    # Aynı seri için modeller yeniden kurulmaz; sonuç önbellekten gelir.
+    # scope (tüm geçmiş ya da tarih aralığı) anahtara girer; farklı
+    # pencerelerin kayıtları birbirinin yerine geçmez.
+    return cached_forecast(
+        "prophet_arima", product, periods, {**PROPHET_PARAMS, "scope": scope}, df_prophet,
+        lambda: _fit_prophet_arima(df_prophet, periods)
+    )
+
+
+def fit_prophet_arima_in_worker(df_prophet, periods=10, product="", scope="all"):
+    # GUI tarafı modeli kalıcı tahmin sürecinde kurdurur; son modeller orada
+    # bellekte kalır, GUI süreci Prophet/ARIMA kurmaz.
+    return get_forecast_worker().submit(
+        "prophet_arima", series=df_prophet, periods=periods, product=product, scope=scope
+    )
+
+
+def _fit_prophet_arima(df_prophet, periods):
+    # Prophet
+    model = Prophet(**PROPHET_PARAMS)
+    model.fit(df_prophet)
+    future = model.make_future_dataframe(periods=periods)
+    forecast = model.predict(future)
+    merged = pd.merge(df_prophet, forecast, on="ds", how="left")
+    mae_prophet = mean_absolute_error(merged["y"], merged["yhat"])
+    rmse_prophet = mean_squared_error(merged["y"], merged["yhat"]) ** 0.5
+    forecast["yhat"] = forecast["yhat"].clip(lower=0)
+    forecast["yhat_upper"] = forecast["yhat_upper"].clip(lower=0)
+    forecast["yhat_lower"] = forecast["yhat_lower"].clip(lower=0)
+
+    # ARIMA
+    y = df_prophet["y"].values
+    order = (1, 1, 1) if len(y) > 5 else (0, 1, 0)
+    arima_fit = ARIMA(y, order=order).fit()
+    arima_forecast = arima_fit.forecast(steps=periods)
+    arima_index = pd.date_range(df_prophet["ds"].max() + pd.Timedelta(days=1), periods=periods, freq="D")
+    arima_series = pd.Series(np.maximum(arima_forecast, 0), index=arima_index)
+    arima_in_sample = arima_fit.predict(start=0, end=len(y)-1)
+    mae_arima = mean_absolute_error(y, arima_in_sample)
+    rmse_arima = mean_squared_error(y, arima_in_sample) ** 0.5
+
+    return {
+        "forecast": forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]],
+        "arima_series": arima_series,
+        "mae_prophet": mae_prophet,
+        "rmse_prophet": rmse_prophet,
+        "mae_arima": mae_arima,
+        "rmse_arima": rmse_arima,
+    }
+
 
 def get_forecast_with_arima(product_name, periods=10):
     try:
-        conn = sqlite3.connect(DB_PATH)
-        sales = pd.read_sql_query("SELECT * FROM sales", conn)
-        products = pd.read_sql_query("SELECT * FROM products", conn)
-        conn.close()
+        conn = get_connection()
+        product_ids = get_product_ids(conn, "product_name", product_name)
+        # Satışsız günler 0 olarak modele girer.
+        df_grouped = get_demand_matrix(conn).series(product_ids)
 
-        df = pd.merge(sales, products, on="product_id")
-        df = df[df["product_name"] == product_name]
-
-        if df.empty:
+        if df_grouped.empty:
             print("DEBUG: DataFrame boş, ürün bulunamadı!")
-            return None, None, None, None, None
+            return None, None, None, None, None, None, None
 
-        df["date"] = pd.to_datetime(df["date"])
-        df_grouped = df.groupby("date")["quantity_sold"].sum().reset_index()
         df_prophet = df_grouped.rename(columns={"date": "ds", "quantity_sold": "y"})
-
-        # Prophet
-        model = Prophet(daily_seasonality=True)
-        model.fit(df_prophet)
-        future = model.make_future_dataframe(periods=periods)
-        forecast = model.predict(future)
-        merged = pd.merge(df_prophet, forecast, on="ds", how="left")
-        mae_prophet = mean_absolute_error(merged["y"], merged["yhat"])
-        rmse_prophet = mean_squared_error(merged["y"], merged["yhat"]) ** 0.5
+        fit = fit_prophet_arima_in_worker(df_prophet, periods, product_name)
+        forecast = fit["forecast"]
         forecast_future = forecast[forecast["ds"] > df_prophet["ds"].max()]
-        forecast["yhat"] = forecast["yhat"].clip(lower=0)
-        forecast["yhat_upper"] = forecast["yhat_upper"].clip(lower=0)
-        forecast["yhat_lower"] = forecast["yhat_lower"].clip(lower=0)
-        y = df_prophet["y"].values
-        order = (1, 1, 1) if len(y) > 5 else (0, 1, 0)
-        # ARIMA  
-        arima_model = ARIMA(y, order=order)
-        arima_fit = arima_model.fit()
-        arima_forecast = arima_fit.forecast(steps=periods)
-        arima_index = pd.date_range(df_prophet["ds"].max() + pd.Timedelta(days=1), periods=periods, freq="D")
-        arima_series = pd.Series(arima_forecast, index=arima_index)
-
-        arima_in_sample = arima_fit.predict(start=0, end=len(y)-1)
-        mae_arima = mean_absolute_error(y, arima_in_sample)
-        rmse_arima = mean_squared_error(y, arima_in_sample) ** 0.5
-        arima_series = pd.Series(np.maximum(arima_forecast, 0), index=arima_index)
+        arima_series = fit["arima_series"]
+        mae_prophet, rmse_prophet = fit["mae_prophet"], fit["rmse_prophet"]
+        mae_arima, rmse_arima = fit["mae_arima"], fit["rmse_arima"]
 
         fig = go.Figure()
 
@@ -102,8 +136,165 @@ def get_forecast_with_arima(product_name, periods=10):
             bgcolor="lightgreen", bordercolor="green", borderwidth=1
         )
 
+        # Gerçek satış izi uzun geçmişte seyreltilir; yakınlaştırınca yeniden örneklenir.
+        fig = ZoomableFigure(fig, TimeSeriesSampler(df_prophet["ds"], {"y": df_prophet["y"]}), {0: "y"})
         return df_prophet, forecast, mae_prophet, rmse_prophet, mae_arima, rmse_arima, fig
 
     except Exception as e:
         print(f"[forecasting] Hata: {e}")
         return None, None, None, None, None, None, None
+
+
+# --- Hızlı yol: tüm ürünler için tek geçişte NumPy tahmini ---------------
+# Satırlar ürün, sütunlar gün olan talep matrisi üzerinde çalışır. Zaman
+# boyunca döngü vardır ama her adım tüm ürünler için vektörel yapılır.
+
+FAST_ENGINES = ("ses", "holt", "croston", "sba", "mean")
+SES_ALPHA = 0.3
+HOLT_BETA = 0.1
+CROSTON_ALPHA = 0.1
+
+# Syntetos-Boylan sınıflandırma eşikleri.
+ADI_CUTOFF = 1.32
+CV2_CUTOFF = 0.49
+MIN_HOLT_DAYS = 14
+
+
+def build_demand_matrix(df_daily, start=None, end=None):
+    # df_daily: product_id, date, quantity_sold (sales_daily satırları).
+    if df_daily.empty:
+        return np.zeros((0, 0)), np.array([], dtype=int), pd.DatetimeIndex([])
+    dates = pd.to_datetime(df_daily["date"]).dt.normalize()
+    days = pd.date_range(start or dates.min(), end or dates.max(), freq="D")
+    product_ids = np.sort(df_daily["product_id"].unique())
+
+    rows = np.searchsorted(product_ids, df_daily["product_id"].to_numpy())
+    cols = (dates - days[0]).dt.days.to_numpy()
+    mask = (cols >= 0) & (cols < len(days))
+
+    matrix = np.zeros((len(product_ids), len(days)))
+    np.add.at(matrix, (rows[mask], cols[mask]), df_daily["quantity_sold"].to_numpy(dtype=float)[mask])
+    return matrix, product_ids, days
+
+
+def _first_demand(Y):
+    has_demand = Y > 0
+    first = np.where(has_demand.any(axis=1), has_demand.argmax(axis=1), Y.shape[1])
+    return has_demand, first
+
+
+def ses_forecast(Y, alpha=SES_ALPHA):
+    has_demand, first = _first_demand(Y)
+    level = Y[np.arange(len(Y)), np.minimum(first, Y.shape[1] - 1)].astype(float)
+    for t in range(Y.shape[1]):
+        active = t > first
+        level = np.where(active, alpha * Y[:, t] + (1 - alpha) * level, level)
+    return level
+
+
+def holt_forecast(Y, horizon, alpha=SES_ALPHA, beta=HOLT_BETA):
+    has_demand, first = _first_demand(Y)
+    level = Y[np.arange(len(Y)), np.minimum(first, Y.shape[1] - 1)].astype(float)
+    trend = np.zeros(len(Y))
+    for t in range(Y.shape[1]):
+        active = t > first
+        new_level = alpha * Y[:, t] + (1 - alpha) * (level + trend)
+        new_trend = beta * (new_level - level) + (1 - beta) * trend
+        level = np.where(active, new_level, level)
+        trend = np.where(active, new_trend, trend)
+    steps = np.arange(1, horizon + 1)
+    return np.maximum(level[:, None] + trend[:, None] * steps[None, :], 0)
+
+
+def croston_forecast(Y, alpha=CROSTON_ALPHA, sba=False):
+    # z: talep büyüklüğü, p: talepler arası süre, q: son talepten beri geçen gün.
+    has_demand, first = _first_demand(Y)
+    n = len(Y)
+    z = Y[np.arange(n), np.minimum(first, Y.shape[1] - 1)].astype(float)
+    p = np.ones(n)
+    q = np.ones(n)
+    for t in range(Y.shape[1]):
+        active = t > first
+        demand = active & has_demand[:, t]
+        z = np.where(demand, z + alpha * (Y[:, t] - z), z)
+        p = np.where(demand, p + alpha * (q - p), p)
+        q = np.where(demand, 1, np.where(active, q + 1, q))
+    rate = z / np.maximum(p, 1e-9)
+    return rate * (1 - alpha / 2) if sba else rate
+
+
+def classify_demand(Y):
+    has_demand = Y > 0
+    counts = has_demand.sum(axis=1)
+    _, first = _first_demand(Y)
+    span = np.maximum(Y.shape[1] - first, 1)
+    adi = np.where(counts > 0, span / np.maximum(counts, 1), np.inf)
+
+    # Yalnızca talep olan günlerin büyüklüğü üzerinden CV².
+    sizes = np.where(has_demand, Y, 0)
+    safe_counts = np.maximum(counts, 1)
+    mean = sizes.sum(axis=1) / safe_counts
+    var = (np.where(has_demand, (Y - mean[:, None]) ** 2, 0)).sum(axis=1) / safe_counts
+    cv2 = np.where(mean > 0, var / np.maximum(mean, 1e-9) ** 2, 0)
+
+    engines = np.full(len(Y), "ses", dtype=object)
+    smooth = adi < ADI_CUTOFF
+    engines[smooth & (span >= MIN_HOLT_DAYS) & (cv2 < CV2_CUTOFF)] = "holt"
+    engines[~smooth & (cv2 < CV2_CUTOFF)] = "croston"
+    engines[~smooth & (cv2 >= CV2_CUTOFF)] = "sba"
+    engines[counts < 2] = "mean"
+    return engines
+
+
+def forecast_matrix(Y, horizon=7, engines=None):
+    # engines: ürün başına motor adı ("auto" ya da FAST_ENGINES). Sonuç
+    # geçersizse (NaN/negatif) önce SES'e, o da olmazsa ortalamaya düşülür.
+    n = len(Y)
+    if n == 0:
+        return np.zeros((0, horizon)), np.array([], dtype=object)
+    chosen = classify_demand(Y)
+    if engines is not None:
+        requested = np.asarray(engines, dtype=object)
+        manual = np.isin(requested, FAST_ENGINES)
+        chosen = np.where(manual, requested, chosen)
+
+    _, first = _first_demand(Y)
+    mean = Y.sum(axis=1) / np.maximum(Y.shape[1] - np.minimum(first, Y.shape[1]), 1)
+    ses = ses_forecast(Y)
+    flat = {
+        "mean": mean,
+        "ses": ses,
+        "croston": croston_forecast(Y),
+        "sba": croston_forecast(Y, sba=True),
+    }
+
+    result = np.repeat(mean[:, None], horizon, axis=1)
+    for name, values in flat.items():
+        rows = chosen == name
+        result[rows] = values[rows, None]
+    holt_rows = chosen == "holt"
+    if holt_rows.any():
+        result[holt_rows] = holt_forecast(Y[holt_rows], horizon)
+
+    invalid = ~np.isfinite(result).all(axis=1) | (result < 0).any(axis=1)
+    if invalid.any():
+        fallback = np.where(np.isfinite(ses) & (ses >= 0), ses, np.nan_to_num(mean))
+        result[invalid] = fallback[invalid, None]
+        chosen = np.where(invalid & np.isfinite(ses) & (ses >= 0), "ses", np.where(invalid, "mean", chosen))
+    return result, chosen
+
+
+def forecast_all_products(df_daily, horizon=7, engines=None, start=None, end=None):
+    # engines: {product_id: motor} sözlüğü; olmayan ürünler otomatik seçilir.
+    Y, product_ids, days = build_demand_matrix(df_daily, start, end)
+    requested = None
+    if engines:
+        requested = [engines.get(pid, "auto") for pid in product_ids]
+    forecast, chosen = forecast_matrix(Y, horizon, requested)
+    return pd.DataFrame({
+        "product_id": product_ids,
+        "engine": chosen,
+        "history_days": (Y > 0).sum(axis=1),
+        "forecast_avg": forecast.mean(axis=1) if horizon else np.zeros(len(product_ids)),
+        "forecast_total": forecast.sum(axis=1),
+    })
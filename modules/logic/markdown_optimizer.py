@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+from modules.db.connection import get_connection, transaction
+from modules.logic.pricing import PriceBook
+from modules.logic.waste_risk import WasteRiskEngine, fefo_expected_sold
+
+# SKT kaynaklı indirim (markdown) önerisi.
+#  - Talep artışı modeli: talep(indirim) = talep * exp(esneklik * indirim).
+#    Esneklik, geçmiş satış günlerinde gerçekleşen birim fiyatın o günkü
+#    liste fiyatına (pricing) göre indirim oranından, ürün ortalamaları
+#    çıkarılarak log(adet) üzerine tek katsayılı regresyonla bulunur. Yeterli indirimli
+#    gün yoksa DEFAULT_ELASTICITY kullanılır.
+#  - Fire beklenen ürünlerde (waste_risk) indirim, fire beklenen son
+#    partinin SKT'sine kadar sürer. Her ürün × indirim düzeyi için partiler
+#    FEFO ile yeniden tüketilir; amaç = beklenen marj - fire maliyeti.
+#  - En iyi düzey mevcut duruma göre kazanç sağlıyorsa önerilir; öneriler
+#    products.discount_price / discount_until alanlarına tek transaction'da
+#    yazılır.
+
+DISCOUNT_LEVELS = np.round(np.arange(0.0, 0.55, 0.05), 2)
+DEFAULT_ELASTICITY = 2.0
+MAX_ELASTICITY = 8.0
+MIN_DISCOUNT_DAYS = 10
+MIN_DEPTH = 0.01
+
+
+def fit_uplift(conn=None):
+    # Döner: (esneklik, indirimli gün sayısı)
+    conn = conn or get_connection()
+    df = pd.read_sql_query(
+        "SELECT product_id, day, quantity, revenue FROM sales_daily WHERE quantity > 0", conn
+    )
+    list_price = PriceBook(conn).prices(df["product_id"], df["day"], promotions=False)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        depth = pd.Series(1 - df["revenue"].to_numpy() / df["quantity"].to_numpy() / list_price, index=df.index)
+    valid = depth.between(0, 0.9)
+    df = df[valid].assign(depth=depth[valid].where(depth[valid] >= MIN_DEPTH, 0.0))
+    discounted = int((df["depth"] > 0).sum())
+    if discounted < MIN_DISCOUNT_DAYS:
+        return DEFAULT_ELASTICITY, discounted
+
+    y = np.log(df["quantity"].to_numpy(dtype=np.float64))
+    x = df["depth"].to_numpy()
+    groups = df["product_id"].to_numpy()
+    y = y - pd.Series(y).groupby(groups).transform("mean").to_numpy()
+    x = x - pd.Series(x).groupby(groups).transform("mean").to_numpy()
+    denominator = float((x * x).sum())
+    if denominator <= 0:
+        return DEFAULT_ELASTICITY, discounted
+    return float(np.clip((x * y).sum() / denominator, 0, MAX_ELASTICITY)), discounted
+
+
+class MarkdownOptimizer:
+    def __init__(self, levels=DISCOUNT_LEVELS, elasticity=None, waste_engine=None):
+        self.conn = get_connection()
+        self.levels = np.asarray(levels, dtype=np.float64)
+        self.waste_engine = waste_engine or WasteRiskEngine()
+        self.today = self.waste_engine.today
+        self.elasticity = elasticity
+        self.discount_days = None
+
+    def fit(self):
+        if self.elasticity is None:
+            self.elasticity, self.discount_days = fit_uplift(self.conn)
+        return self.elasticity
+
+    def optimize(self):
+        # Döner: fire beklenen her ürün için en iyi indirim; önerilecek olanlar
+        # recommended=True.
+        self.fit()
+        lots = self.waste_engine.lot_demand()
+        lots = lots[lots["days_left"] >= 0].reset_index(drop=True)
+        remaining = lots["remaining"].to_numpy(dtype=np.float64)
+        demand_until = lots["demand_until"].to_numpy()
+        group = lots["group"].to_numpy()
+
+        # İndirimsiz durumda fire beklenen ürünler ve indirim bitiş tarihi.
+        waste = remaining - fefo_expected_sold(remaining, demand_until, group)
+        at_risk = waste > 1e-6
+        until = lots["expiry_date"].where(at_risk).groupby(lots["product_id"]).transform("max")
+        keep = until.notna() & (lots["expiry_date"] <= until)
+        lots = lots[keep].assign(discount_until=until[keep]).reset_index(drop=True)
+        if lots.empty:
+            return pd.DataFrame(columns=[
+                "product_id", "product_name", "selling_price", "cost_price", "discount", "discount_price",
+                "discount_until", "waste_before", "waste_after", "objective_before", "objective_after",
+                "gain", "recommended",
+            ])
+
+        product_ids, group = np.unique(lots["product_id"].to_numpy(), return_inverse=True)
+        starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+        remaining = lots["remaining"].to_numpy(dtype=np.float64)
+        price = pd.to_numeric(lots["selling_price"], errors="coerce").fillna(0).to_numpy()
+        cost = pd.to_numeric(lots["cost_price"], errors="coerce").fillna(0).to_numpy()
+
+        # Parti × indirim düzeyi; tüm mağaza tek matriste.
+        uplift = np.exp(self.elasticity * self.levels)
+        demand = lots["demand_until"].to_numpy()[:, None] * uplift[None, :]
+        sold = fefo_expected_sold(remaining, demand, group)
+        wasted = remaining[:, None] - sold
+        unit_price = price[:, None] * (1 - self.levels[None, :])
+        objective = sold * (unit_price - cost[:, None]) - wasted * cost[:, None]
+
+        # Ürün × indirim düzeyi
+        objective = np.add.reduceat(objective, starts, axis=0)
+        wasted = np.add.reduceat(wasted, starts, axis=0)
+        best = objective.argmax(axis=1)
+        rows = np.arange(len(product_ids))
+
+        first = lots.iloc[starts]
+        discount = self.levels[best]
+        gain = objective[rows, best] - objective[:, 0]
+        plan = pd.DataFrame({
+            "product_id": product_ids,
+            "product_name": first["product_name"].to_numpy(),
+            "selling_price": price[starts],
+            "cost_price": cost[starts],
+            "discount": discount,
+            "discount_price": np.round(price[starts] * (1 - discount), 2),
+            "discount_until": first["discount_until"].to_numpy(),
+            "waste_before": wasted[:, 0].round(1),
+            "waste_after": wasted[rows, best].round(1),
+            "objective_before": objective[:, 0].round(2),
+            "objective_after": objective[rows, best].round(2),
+            "gain": gain.round(2),
+            "recommended": (discount > 0) & (gain > 0),
+        })
+        return plan.sort_values("gain", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def apply_markdowns(plan):
+    # Önerilen indirimler tek transaction'da yazılır; çağıran thread'in
+    # bağlantısı kullanılır. Döner: güncellenen ürün sayısı.
+    chosen = plan[plan["recommended"]]
+    rows = [
+        (float(price), pd.Timestamp(until).strftime("%Y-%m-%d"), int(pid))
+        for pid, price, until in zip(chosen["product_id"], chosen["discount_price"], chosen["discount_until"])
+    ]
+    with transaction() as conn:
+        conn.executemany("UPDATE products SET discount_price = ?, discount_until = ? WHERE product_id = ?", rows)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    optimizer = MarkdownOptimizer()
+    plan = optimizer.optimize()
+    print(f"Esneklik: {optimizer.elasticity:.2f} ({optimizer.discount_days} indirimli gün)")
+    print(plan[plan["recommended"]].to_string(index=False))
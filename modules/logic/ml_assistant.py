@@ -1,16 +1,48 @@
-import sqlite3
+import numpy as np
 import pandas as pd
 from prophet import Prophet
 import os
-from modules.config import DB_PATH
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from modules.db.connection import get_connection
+from modules.db.sales_daily import get_daily_sales
+from modules.db.forecast_cache import cached_forecast, series_fingerprint, make_key, get_cached, put_cached
+from modules.db.demand_matrix import get_demand_matrix
+from modules.logic.forecasting import forecast_all_products, forecast_matrix, FAST_ENGINES, ADI_CUTOFF
 from datetime import datetime
 from modules.logic.trend_fetcher import GoogleTrendsFetcher
 from unidecode import unidecode
 import geocoder
 
+FORECAST_HORIZON = 7
+# Seçilebilir motorlar. "auto": uzun ve yoğun seriler Prophet'e, kısa ya da
+# aralıklı talep hızlı motorlara gider.
+ENGINES = ("auto", "prophet") + FAST_ENGINES
+PROPHET_AUTO_MIN_DAYS = 90
+
+
+def prefers_prophet(sale_days, span):
+    # span: ilk satıştan son güne kadarki gün sayısı. Talepler arası ortalama
+    # süre ADI_CUTOFF'un altındaysa seri yoğun sayılır.
+    return (span >= PROPHET_AUTO_MIN_DAYS) & (sale_days * ADI_CUTOFF >= span)
+
+
+def _fit_prophet(df, periods):
+    # Süreç havuzunda çalışır; bu yüzden modül seviyesinde ve DB'siz.
+    model = Prophet()
+    model.fit(df)
+    future = model.make_future_dataframe(periods=periods)
+    forecast = model.predict(future)
+    return forecast[["ds", "yhat"]].tail(periods)
+
+
 class InventoryForecastAssistant:
-    def __init__(self, enable_trends=False):
-        self.conn = sqlite3.connect(DB_PATH)
+    def __init__(self, enable_trends=False, engine="auto", engines=None):
+        self.conn = get_connection()
+        # engine: varsayılan motor ("auto", "prophet" ya da hızlı motorlardan
+        # biri); engines: {product_id: motor} ile ürün bazında seçim.
+        self.engine = engine
+        self.engines = dict(engines or {})
         self.today = datetime.today().date()
         self.trends_enabled = enable_trends
         self.geo_region = 'TR'
@@ -37,87 +69,177 @@ class InventoryForecastAssistant:
         if self.trends_enabled:
             try:
                 self.trend_fetcher = GoogleTrendsFetcher(geo=self.geo_region, gprop='froogle')
-            except:
+            except Exception as e:
+                # Ürün başına değil, bir kez bildirilir.
+                print(f"Uyarı: Trend desteği devre dışı | Hata: {e}")
                 self.trends_enabled = False
 
     def get_sales_data(self):
-        query = "SELECT product_id, date, quantity_sold FROM sales"
-        df = pd.read_sql_query(query, self.conn)
-        df["date"] = pd.to_datetime(df["date"], errors="coerce")
-        return df.dropna()
+        df = get_daily_sales(self.conn)
+        return df[["product_id", "date", "quantity_sold"]]
 
     def get_stock_data(self):
-        query = """
-        SELECT product_id, SUM(quantity) AS stock
-        FROM stock_transactions
-        GROUP BY product_id
-        """
+        query = "SELECT product_id, MAX(stock_in - sold, 0) AS stock FROM stock_levels"
         return pd.read_sql_query(query, self.conn)
 
     def get_product_names(self):
         query = "SELECT product_id, product_name, brand FROM products"
         return pd.read_sql_query(query, self.conn)
 
-    def forecast_product(self, df_product):
-        df = df_product.groupby("date")["quantity_sold"].sum().reset_index()
-        df = df.rename(columns={"date": "ds", "quantity_sold": "y"})
-        if len(df) < 5:
+    def engine_for(self, product_id):
+        return self.engines.get(product_id, self.engine)
+
+    def uses_prophet(self, product_id, sale_days, span):
+        engine = self.engine_for(product_id)
+        return engine == "prophet" or (engine == "auto" and prefers_prophet(sale_days, span))
+
+    def forecast_product(self, df_product, product_id=None):
+        if product_id is None:
+            product_id = df_product["product_id"].iloc[0]
+        df = df_product[["date", "quantity_sold"]].rename(columns={"date": "ds", "quantity_sold": "y"})
+        dates = pd.to_datetime(df["ds"])
+        span = (dates.max() - dates.min()).days + 1 if len(df) else 0
+        if len(df) >= 5 and self.uses_prophet(product_id, int((df["y"] > 0).sum()), span):
+            return cached_forecast("prophet", product_id, FORECAST_HORIZON, {}, df, lambda: _fit_prophet(df, FORECAST_HORIZON))
+
+        # Prophet seçilmemişse ya da veri azsa hızlı yola düşülür.
+        fast = forecast_all_products(
+            df_product.assign(product_id=product_id), FORECAST_HORIZON,
+            {product_id: self.engine_for(product_id)}
+        )
+        if fast.empty:
             return None
-        model = Prophet()
-        model.fit(df)
-        future = model.make_future_dataframe(periods=7)
-        forecast = model.predict(future)
-        return forecast[["ds", "yhat"]].tail(7)
+        start = pd.to_datetime(df["ds"]).max() + pd.Timedelta(days=1)
+        return pd.DataFrame({
+            "ds": pd.date_range(start, periods=FORECAST_HORIZON, freq="D"),
+            "yhat": fast["forecast_avg"].iloc[0],
+        })
 
     def detect_slow_moving(self, avg_daily):
         return avg_daily < 0.3
 
-    def run_analysis(self):
-        df_sales = self.get_sales_data()
+    def run_analysis(self, progress=None, max_workers=None, only_changed=False):
+        return list(self.iter_analysis(progress, max_workers, only_changed))
+
+    def iter_analysis(self, progress=None, max_workers=None, only_changed=False):
+        # Hızlı motorlu ürünler tek vektörel geçişte hesaplanıp hemen döner.
+        # Prophet'e giden ürünlerden (seçilen ya da "auto" ile uzun ve yoğun
+        # seriler) önbellekte olanlar ardından döner;
+        # kalanlar süreç havuzunda kurulur ve biten sırayla döner.
+        # only_changed=True yalnızca Prophet yolunu etkiler: verisi değişen
+        # (önbellekte olmayan) ürünler döner, hızlı yol her zaman döner.
+        demand = get_demand_matrix(self.conn)
         df_stock = self.get_stock_data()
         df_names = self.get_product_names()
 
-        results = []
-        grouped = df_sales.groupby("product_id")
+        products = df_names.drop_duplicates("product_id").set_index("product_id")[["product_name", "brand"]].to_dict("index")
+        stocks = dict(zip(df_stock["product_id"], df_stock["stock"]))
+
+        # Seriler son satışlı güne kadar alınır; aradaki boş günler 0'dır.
+        last_day = demand.last_sales_day()
+        Y = demand.window(end=last_day)
+        sale_days = (Y > 0).sum(axis=1)
+        span = Y.shape[1] - np.where(sale_days > 0, (Y > 0).argmax(axis=1), Y.shape[1])
+        active = (sale_days > 0) & np.isin(demand.product_ids, list(products))
+        prophet_rows = active & (sale_days >= 5) & np.array(
+            [self.uses_prophet(pid, n, days) for pid, n, days in zip(demand.product_ids, sale_days, span)], dtype=bool
+        )
+        fast_rows = active & ~prophet_rows
+
+        series = {
+            pid: demand.series([pid], end=last_day).rename(columns={"date": "ds", "quantity_sold": "y"})
+            for pid in demand.product_ids[prophet_rows]
+        }
+        fast_ids = demand.product_ids[fast_rows]
+        fast_forecast, fast_engines = forecast_matrix(
+            Y[fast_rows], FORECAST_HORIZON, [self.engine_for(pid) for pid in fast_ids]
+        )
+        total = len(series) + len(fast_ids)
+        done = 0
+
+        for pid, avg_forecast, engine in zip(fast_ids, fast_forecast.mean(axis=1), fast_engines):
+            done += 1
+            if progress:
+                progress(done, total, products[pid]["product_name"])
+            yield self._build_result(pid, avg_forecast, engine, products, stocks)
 
-        for pid, group in grouped:
-            forecast = self.forecast_product(group)
+        pending = {}
+        for pid, df in series.items():
+            fingerprint = series_fingerprint(df)
+            key = make_key("prophet", pid, FORECAST_HORIZON, {}, fingerprint)
+            forecast = get_cached(key)
             if forecast is None:
+                pending[pid] = (key, fingerprint)
                 continue
+            done += 1
+            if only_changed:
+                continue
+            if progress:
+                progress(done, total, products[pid]["product_name"])
+            yield self._build_result(pid, forecast["yhat"].mean(), "prophet", products, stocks)
 
-            avg_forecast = forecast["yhat"].mean()
+        fits = self._fit_many({pid: series[pid] for pid in pending}, max_workers)
+        try:
+            for pid, forecast in fits:
+                key, fingerprint = pending[pid]
+                put_cached(key, "prophet", pid, FORECAST_HORIZON, {}, fingerprint, forecast)
+                done += 1
+                if progress:
+                    progress(done, total, products[pid]["product_name"])
+                yield self._build_result(pid, forecast["yhat"].mean(), "prophet", products, stocks)
+        finally:
+            fits.close()
 
-            product_info = df_names[df_names["product_id"] == pid].iloc[0]
-            pname = product_info["product_name"]
-            brand = product_info["brand"]
-            search_query = unidecode(f"{brand} {pname}")
+    def _fit_many(self, series, max_workers=None):
+        if not series:
+            return
+        workers = min(max_workers or max(1, (os.cpu_count() or 2) - 1), len(series))
+        if workers <= 1:
+            for pid, df in series.items():
+                yield pid, _fit_prophet(df, FORECAST_HORIZON)
+            return
 
-            trend_multiplier = 1.0
-            if self.trends_enabled:
+        # spawn: havuz Qt iş parçacığından kurulur; Qt içeren süreç fork edilmez.
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            futures = {pool.submit(_fit_prophet, df, FORECAST_HORIZON): pid for pid, df in series.items()}
+            for future in as_completed(futures):
+                pid = futures[future]
                 try:
-                    trend_score = self.trend_fetcher.get_trend_score(search_query)
-                    trend_multiplier += trend_score / 100
+                    yield pid, future.result()
                 except Exception as e:
-                    print(f"Trend alınamadı: {search_query} | Hata: {e}")
-            else:
-                print(f"Uyarı: Trend desteği devre dışı -> {search_query}")
-
-            adjusted_forecast = avg_forecast * trend_multiplier
-
-            stock_row = df_stock[df_stock["product_id"] == pid]
-            stock = stock_row["stock"].values[0] if not stock_row.empty else 0
-            days_left = stock / adjusted_forecast if adjusted_forecast > 0 else float("inf")
-
-            results.append({
-                "product_id": pid,
-                "product_name": pname,
-                "stock": stock,
-                "forecast_avg": round(adjusted_forecast, 2),
-                "days_to_depletion": round(days_left, 1),
-                "is_slow": self.detect_slow_moving(adjusted_forecast)
-            })
-
-        return results
+                    print(f"[ml_assistant] {pid} için tahmin başarısız: {e}")
+        finally:
+            # İptal edilirse sıradaki işler başlatılmaz.
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _build_result(self, pid, avg_forecast, engine, products, stocks):
+        pname = products[pid]["product_name"]
+        brand = products[pid]["brand"]
+        search_query = unidecode(f"{brand} {pname}")
+
+        trend_multiplier = 1.0
+        if self.trends_enabled:
+            try:
+                trend_score = self.trend_fetcher.get_trend_score(search_query)
+                trend_multiplier += trend_score / 100
+            except Exception as e:
+                print(f"Trend alınamadı: {search_query} | Hata: {e}")
+
+        adjusted_forecast = avg_forecast * trend_multiplier
+
+        stock = stocks.get(pid, 0)
+        days_left = stock / adjusted_forecast if adjusted_forecast > 0 else float("inf")
+
+        return {
+            "product_id": pid,
+            "product_name": pname,
+            "stock": stock,
+            "forecast_avg": round(adjusted_forecast, 2),
+            "days_to_depletion": round(days_left, 1),
+            "is_slow": self.detect_slow_moving(adjusted_forecast),
+            "engine": engine
+        }
 
     def update_trend_scores(self):
         if not self.trends_enabled:
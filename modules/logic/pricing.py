@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+from modules.db.connection import get_connection
+from modules.db.price_periods import get_price_periods, REGULAR, PROMO, COST
+
+# Etkin fiyatın tek kaynağı. (ürün, tarih) dizileri için fiyatlar
+# price_periods üzerinde pd.merge_asof ile toplu çözülür:
+#  - liste fiyatı: tarihe kadar başlamış son regular dönem; satış ilk
+#    dönemden önceyse ilk dönem, hiç dönem yoksa products.selling_price,
+#  - kampanya: tarihi valid_from..valid_to aralığında olan son promo dönemi;
+#    varsa liste fiyatının yerine geçer,
+#  - maliyet: liste fiyatı gibi cost dönemlerinden (products.cost_price).
+# SQL tarafındaki karşılıkları price_periods.price_sql / cost_sql'dir (sales_daily).
+
+
+def _as_dates(dates, n):
+    # Tek tarih verilirse tüm satırlara uygulanır.
+    if np.ndim(dates) == 0:
+        dates = [dates] * n
+    return pd.Series(pd.to_datetime(np.asarray(dates))).dt.normalize().astype("datetime64[ns]")
+
+
+class PriceBook:
+    def __init__(self, conn=None, product_ids=None):
+        conn = conn or get_connection()
+        periods = get_price_periods(conn, product_ids)
+        periods["product_id"] = periods["product_id"].astype(np.int64)
+        for column in ("valid_from", "valid_to"):
+            periods[column] = pd.to_datetime(periods[column], errors="coerce").astype("datetime64[ns]")
+        self.regular = periods[periods["kind"] == REGULAR].sort_values("valid_from").reset_index(drop=True)
+        self.promo = periods[periods["kind"] == PROMO].sort_values("valid_from").reset_index(drop=True)
+        self.cost = periods[periods["kind"] == COST].sort_values("valid_from").reset_index(drop=True)
+        # Dönemi hiç olmayan ürünler ve geriye tarihli satışlar için.
+        catalog = pd.read_sql_query("SELECT product_id, selling_price, cost_price FROM products", conn)
+        catalog.index = catalog["product_id"].astype(np.int64)
+        self.fallback = self.regular.groupby("product_id")["price"].first().combine_first(
+            pd.to_numeric(catalog["selling_price"], errors="coerce")
+        )
+        self.cost_fallback = self.cost.groupby("product_id")["price"].first().combine_first(
+            pd.to_numeric(catalog["cost_price"], errors="coerce")
+        )
+
+    def _lookup(self, query, periods, check_end):
+        merged = pd.merge_asof(
+            query, periods[["product_id", "valid_from", "valid_to", "price"]],
+            left_on="date", right_on="valid_from", by="product_id", direction="backward"
+        )
+        price = merged["price"]
+        if check_end:
+            price = price.where(merged["valid_to"].isna() | (merged["date"] <= merged["valid_to"]))
+        return price.to_numpy(dtype=np.float64, copy=True)
+
+    def _resolve(self, product_ids, dates, periods, fallback, promotions):
+        product_ids = np.asarray(product_ids, dtype=np.int64).ravel()
+        n = len(product_ids)
+        if n == 0:
+            return np.zeros(0)
+        query = pd.DataFrame({"row": np.arange(n), "product_id": product_ids, "date": _as_dates(dates, n)})
+        query = query.sort_values("date", kind="stable").reset_index(drop=True)
+
+        price = self._lookup(query, periods, check_end=False)
+        missing = np.isnan(price)
+        if missing.any():
+            price[missing] = query["product_id"][missing].map(fallback).to_numpy(dtype=np.float64)
+        if promotions and not self.promo.empty:
+            promo = self._lookup(query, self.promo, check_end=True)
+            price = np.where(np.isnan(promo), price, promo)
+
+        result = np.empty(n)
+        result[query["row"].to_numpy()] = price
+        return result
+
+    def prices(self, product_ids, dates, promotions=True):
+        # Döner: girdi sırasıyla fiyat dizisi (bilinmeyen ürünlerde NaN).
+        return self._resolve(product_ids, dates, self.regular, self.fallback, promotions)
+
+    def costs(self, product_ids, dates):
+        # Döner: girdi sırasıyla o günkü birim maliyet.
+        return self._resolve(product_ids, dates, self.cost, self.cost_fallback, promotions=False)
+
+    def price_for(self, product_id, date):
+        return float(self.prices([product_id], [date])[0])
+
+    def current_prices(self, as_of=None, product_ids=None):
+        # Ürün başına as_of günündeki etkin fiyat.
+        if product_ids is None:
+            product_ids = self.fallback.index.to_numpy()
+        as_of = pd.Timestamp(as_of or pd.Timestamp.today()).normalize()
+        return pd.Series(self.prices(product_ids, as_of), index=np.asarray(product_ids, dtype=np.int64), name="price")
+
+    def value_sales(self, sales, date_column="date", quantity_column="quantity_sold"):
+        # Satış tablosuna o günün fiyatını, maliyetini, ciroyu ve toplam
+        # maliyeti ekler.
+        sales = sales.copy()
+        sales["unit_price"] = self.prices(sales["product_id"], sales[date_column])
+        sales["unit_cost"] = self.costs(sales["product_id"], sales[date_column])
+        sales["revenue"] = sales[quantity_column] * np.nan_to_num(sales["unit_price"])
+        sales["cost"] = sales[quantity_column] * np.nan_to_num(sales["unit_cost"])
+        return sales
+
+
+def resolve_prices(product_ids, dates, conn=None, promotions=True):
+    return PriceBook(conn, product_ids=np.unique(np.asarray(product_ids, dtype=np.int64))).prices(
+        product_ids, dates, promotions
+    )
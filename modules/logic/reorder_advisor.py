@@ -1,95 +1,144 @@
-import sqlite3
+import numpy as np
 import pandas as pd
-from datetime import datetime
-from modules.config import DB_PATH
+from statistics import NormalDist
+from modules.db.connection import get_connection
+from modules.db.stock_levels import get_stock_levels
+from modules.db.demand_matrix import get_demand_matrix
 
-class ReorderAdvisor:
-    def __init__(self):
-        self.conn = sqlite3.connect(DB_PATH)
-        self.today = pd.Timestamp.today()
-        self.ensure_table_exists()
+# Stok yenileme planı; tüm ürünler için tek seferde, sütun işlemleriyle:
+#  - talep ortalaması ve sapması son satış gününe kadarki HISTORY_DAYS günden,
+#  - emniyet stoğu = z(hizmet düzeyi) * sapma * sqrt(tedarik süresi),
+#  - yeniden sipariş noktası = ortalama * tedarik süresi + emniyet stoğu,
+#  - sipariş miktarı EOQ = sqrt(2 * yıllık talep * sipariş maliyeti / tutma maliyeti),
+#    en az yeniden sipariş noktasına ve min_days kadar talebe yetecek kadar,
+#  - aynı depoyu paylaşan ürünlerin toplam hacmi boş kapasiteyi aşarsa
+#    siparişler orantılı olarak küçültülür.
 
-    def ensure_table_exists(self):
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS product_storage_links (
-                product_id INTEGER,
-                storage_type TEXT CHECK(storage_type IN ('fridge', 'shelf')),
-                storage_id INTEGER
-            )
-        """)
-        self.conn.commit()
-    def load_data(self):
-        products = pd.read_sql_query("SELECT product_id, product_name, unit_volume FROM products", self.conn)
-        sales = pd.read_sql_query("SELECT product_id, quantity_sold, date FROM sales", self.conn)
-        stock = pd.read_sql_query("SELECT product_id, quantity FROM stock_transactions", self.conn)
-        links = pd.read_sql_query("SELECT * FROM product_storage_links", self.conn)
-        fridges = pd.read_sql_query("SELECT id, name, max_capacity FROM fridges", self.conn)
-        shelves = pd.read_sql_query("SELECT id, name, max_capacity FROM shelves", self.conn)
+SERVICE_LEVEL = 0.95
+LEAD_TIME_DAYS = 3
+HISTORY_DAYS = 90
+ORDER_COST = 50.0           # sipariş başına sabit maliyet (TL)
+HOLDING_RATE = 0.25         # yıllık stok tutma maliyeti / birim maliyet
 
-        sales['date'] = pd.to_datetime(sales['date'], errors='coerce')
-        return products, sales, stock, links, fridges, shelves
 
-    def compute_reorder_advice(self, min_days=5):
-        products, sales, stock, links, fridges, shelves = self.load_data()
-        today = self.today
-        span = max((today - sales['date'].min()).days, 1)
+class ReorderAdvisor:
+    def __init__(self, service_level=SERVICE_LEVEL, lead_time_days=LEAD_TIME_DAYS,
+                 order_cost=ORDER_COST, holding_rate=HOLDING_RATE, history_days=HISTORY_DAYS):
+        self.conn = get_connection()
+        self.today = pd.Timestamp.today().normalize()
+        self.service_level = service_level
+        self.lead_time_days = lead_time_days
+        self.order_cost = order_cost
+        self.holding_rate = holding_rate
+        self.history_days = history_days
 
-        avg_sales = sales.groupby('product_id')['quantity_sold'].sum().reset_index()
-        avg_sales['daily_avg'] = avg_sales['quantity_sold'] / span
+    def load_data(self):
+        products = pd.read_sql_query(
+            "SELECT product_id, product_name, unit_volume, cost_price, selling_price FROM products", self.conn
+        )
+        stock = get_stock_levels(self.conn)[['product_id', 'current_stock']]
+        # Ürün başına ilk depo bağlantısı; kapasite ve ad tek join ile gelir.
+        storage = pd.read_sql_query("""
+            SELECT l.product_id, l.storage_type, l.storage_id,
+                   COALESCE(s.name, f.name) AS storage_name,
+                   COALESCE(s.max_capacity, f.max_capacity) AS capacity
+            FROM product_storage_links l
+            LEFT JOIN shelves s ON l.storage_type = 'shelf' AND s.id = l.storage_id
+            LEFT JOIN fridges f ON l.storage_type = 'fridge' AND f.id = l.storage_id
+            ORDER BY l.product_id, l.storage_type, l.storage_id
+        """, self.conn).drop_duplicates('product_id')
+        return products, stock, storage
 
-        total_stock = stock.groupby('product_id')['quantity'].sum().reset_index()
-        total_stock.columns = ['product_id', 'current_stock']
+    def demand_stats(self):
+        # Son history_days günün günlük ortalaması ve standart sapması. Pencere
+        # son satış gününde biter; eski verili veritabanında da boş kalmaz.
+        demand = get_demand_matrix(self.conn)
+        end = min(self.today, demand.last_sales_day() or self.today)
+        start = end - pd.Timedelta(days=self.history_days - 1)
+        window = demand.window(start, end).astype(np.float64)
+        n = window.shape[1]
+        if n == 0:
+            zeros = np.zeros(len(demand.product_ids))
+            return pd.DataFrame({'product_id': demand.product_ids, 'daily_avg': zeros, 'daily_std': zeros})
+        mean = window.mean(axis=1)
+        std = window.std(axis=1, ddof=1) if n > 1 else np.zeros_like(mean)
+        return pd.DataFrame({'product_id': demand.product_ids, 'daily_avg': mean, 'daily_std': std})
 
-        df = pd.merge(products, avg_sales[['product_id', 'daily_avg']], on='product_id', how='left')
-        df = pd.merge(df, total_stock, on='product_id', how='left')
-        df = pd.merge(df, links, on='product_id', how='left')
+    def compute_plan(self, min_days=5):
+        products, stock, storage = self.load_data()
+        df = pd.merge(products, self.demand_stats(), on='product_id', how='left')
+        df = pd.merge(df, stock, on='product_id', how='left')
+        df = pd.merge(df, storage, on='product_id', how='left')
 
-        df['daily_avg'] = df['daily_avg'].fillna(0)
-        df['current_stock'] = df['current_stock'].fillna(0)
-        df['days_left'] = df.apply(lambda row: row['current_stock'] / row['daily_avg'] if row['daily_avg'] > 0 else float('inf'), axis=1)
+        mu = df['daily_avg'].fillna(0).to_numpy()
+        sigma = df['daily_std'].fillna(0).to_numpy()
+        on_hand = df['current_stock'].fillna(0).clip(lower=0).to_numpy()
+        volume = pd.to_numeric(df['unit_volume'], errors='coerce').fillna(1).to_numpy()
+        volume = np.where(volume > 0, volume, 1.0)
+        unit_cost = pd.to_numeric(df['cost_price'], errors='coerce').fillna(0).to_numpy()
+        unit_cost = np.where(unit_cost > 0, unit_cost,
+                             pd.to_numeric(df['selling_price'], errors='coerce').fillna(0).to_numpy())
+        lead = self.lead_time_days
 
-        suggestions = []
-        for _, row in df.iterrows():
-            if row['days_left'] <= min_days:
-                storage_type = row['storage_type']
-                sid = row['storage_id']
-                capacity = None
-                storage_name = "?"
+        z = NormalDist().inv_cdf(self.service_level)
+        safety_stock = z * sigma * np.sqrt(lead)
+        reorder_point = mu * lead + safety_stock
+        with np.errstate(divide='ignore', invalid='ignore'):
+            days_left = np.where(mu > 0, on_hand / mu, np.inf)
+            holding = self.holding_rate * unit_cost
+            eoq = np.where(holding > 0, np.sqrt(2 * mu * 365 * self.order_cost / holding), 0.0)
 
-                if storage_type == 'shelf':
-                    cap_row = shelves[shelves['id'] == sid]
-                    if not cap_row.empty:
-                        capacity = cap_row['max_capacity'].values[0]
-                        storage_name = cap_row['name'].values[0]
-                elif storage_type == 'fridge':
-                    cap_row = fridges[fridges['id'] == sid]
-                    if not cap_row.empty:
-                        capacity = cap_row['max_capacity'].values[0]
-                        storage_name = cap_row['name'].values[0]
+        needs_order = (mu > 0) & ((on_hand <= reorder_point) | (days_left <= min_days))
+        target = np.maximum(eoq, reorder_point + mu * min_days - on_hand)
+        order_qty = np.where(needs_order, np.ceil(np.maximum(target, 0)), 0.0)
 
-                used_space = row['current_stock'] * row.get('unit_volume', 1)
-                used_percent = f"{round((used_space / capacity) * 100, 1)}%" if capacity else "Bilinmiyor"
+        # Depo kapasitesi: depoyu paylaşan ürünlerin mevcut hacmi düşülür,
+        # kalan boş hacim siparişlere orantılı dağıtılır.
+        capacity = pd.to_numeric(df['capacity'], errors='coerce').to_numpy()
+        used = on_hand * volume
+        storage_key = df['storage_type'].astype(str) + ':' + df['storage_id'].astype(str)
+        has_capacity = ~np.isnan(capacity)
+        used_total = pd.Series(used).groupby(storage_key).transform('sum').to_numpy()
+        requested_total = pd.Series(order_qty * volume).groupby(storage_key).transform('sum').to_numpy()
+        free = np.maximum(np.where(has_capacity, capacity, 0) - used_total, 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scale = np.where(has_capacity & (requested_total > free), free / requested_total, 1.0)
+            used_pct = np.where(has_capacity & (capacity > 0), used_total / capacity * 100, np.nan)
+        scale = np.nan_to_num(scale, nan=1.0)
+        suggested = np.floor(order_qty * scale)
 
-                suggestions.append({
-                    "product_id": row['product_id'],
-                    "product_name": row['product_name'],
-                    "daily_avg": round(row['daily_avg'], 2),
-                    "stock_left": int(row['current_stock']),
-                    "days_left": round(row['days_left'], 1),
-                    "storage_type": storage_type,
-                    "storage_id": sid,
-                    "used_capacity": used_percent,
-                    "suggested_order": max(int(row['daily_avg'] * min_days) - int(row['current_stock']), 0)  
-                    })
+        return pd.DataFrame({
+            'product_id': df['product_id'].to_numpy(),
+            'product_name': df['product_name'].to_numpy(),
+            'daily_avg': mu.round(2),
+            'daily_std': sigma.round(2),
+            'stock_left': on_hand.astype(int),
+            'days_left': np.round(days_left, 1),
+            'safety_stock': np.ceil(safety_stock).astype(int),
+            'reorder_point': np.ceil(reorder_point).astype(int),
+            'eoq': np.ceil(eoq).astype(int),
+            'suggested_order': suggested.astype(int),
+            'capacity_limited': needs_order & (scale < 1),
+            'needs_order': needs_order,
+            'storage_type': df['storage_type'].to_numpy(),
+            'storage_id': df['storage_id'].to_numpy(),
+            'storage_name': df['storage_name'].fillna('?').to_numpy(),
+            'used_capacity': used_pct.round(1),
+        })
 
+    def compute_reorder_advice(self, min_days=5):
+        plan = self.compute_plan(min_days)
+        advice = plan[plan['needs_order']].drop(columns='needs_order')
+        return advice.sort_values('days_left').to_dict('records')
 
-        return suggestions
 
 if __name__ == "__main__":
     advisor = ReorderAdvisor()
     result = advisor.compute_reorder_advice()
     for r in result:
+        used = f"{r['used_capacity']}%" if pd.notna(r['used_capacity']) else "Bilinmiyor"
         print(f"\n🔄 {r['product_name']} (ID: {r['product_id']})")
-        print(f"  Kalan Gün: {r['days_left']} | Günlük Satış: {r['daily_avg']} | Stok: {r['stock_left']}")
-        print(f"  Depo: {r['storage_type']} - {r['storage_name']} | Alan Kullanımı: {r['used_capacity']}")
+        print(f"  Kalan Gün: {r['days_left']} | Günlük Satış: {r['daily_avg']} ± {r['daily_std']} | Stok: {r['stock_left']}")
+        print(f"  Emniyet Stoğu: {r['safety_stock']} | Yeniden Sipariş Noktası: {r['reorder_point']} | EOQ: {r['eoq']}")
+        print(f"  Önerilen Sipariş: {r['suggested_order']}{' (kapasite sınırlı)' if r['capacity_limited'] else ''}")
+        print(f"  Depo: {r['storage_type']} - {r['storage_name']} | Alan Kullanımı: {used}")
@@ -1,27 +1,17 @@
-import sqlite3
 import pandas as pd
 from datetime import datetime
-from modules.config import DB_PATH
+from modules.db.connection import get_connection
+from modules.db.demand_matrix import get_demand_matrix
+from modules.db.stock_lots import get_earliest_expiry
 
 def get_shelf_placement_suggestions():
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection()
 
     products = pd.read_sql_query("SELECT product_id, product_name FROM products", conn)
-    sales = pd.read_sql_query("SELECT product_id, quantity_sold, date FROM sales", conn)
-    stock = pd.read_sql_query("SELECT product_id, expiry_date FROM stock_transactions WHERE expiry_date IS NOT NULL", conn)
-
-    conn.close()
-
-    stock["expiry_date"] = pd.to_datetime(stock["expiry_date"], errors="coerce")
-    sales["date"] = pd.to_datetime(sales["date"], errors="coerce")
+    soonest_expiry = get_earliest_expiry(conn).dropna().reset_index()
     today = pd.Timestamp.today()
 
-    stock_valid = stock.dropna()
-    soonest_expiry = stock_valid.groupby("product_id")["expiry_date"].min().reset_index()
-
-    recent_sales = sales[sales["date"] >= today - pd.Timedelta(days=30)]
-    avg_sales = recent_sales.groupby("product_id")["quantity_sold"].mean().reset_index()
-    avg_sales.columns = ["product_id", "daily_avg"]
+    avg_sales = get_demand_matrix(conn).daily_average(30, today).rename_axis("product_id").reset_index()
 
     df = products.copy()
     df = pd.merge(df, avg_sales, on="product_id", how="left")
@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+from modules.db.connection import get_connection
+from modules.db.demand_matrix import get_demand_matrix
+from modules.logic.forecasting import forecast_matrix
+
+# Fire riski: her açık parti için SKT gününe kadar satılamayacak beklenen
+# miktar, tüm katalogda tek seferde.
+#  - Günlük talep, son HISTORY_DAYS günden forecasting.forecast_matrix ile
+#    tahmin edilir; ufuk dışındaki günler son tahmin değeriyle uzatılır.
+#  - D_i: partinin SKT gününe kadar (bugün dahil) beklenen toplam talep.
+#  - Partiler FEFO sırasıyla tüketilir; ilk i partiden satılan toplam
+#    C_i = min(C_{i-1} + kalan_i, D_i). Bu özyineleme
+#    C_i = R_i + min(0, min_{j<=i}(D_j - R_j)) biçiminde (R: kümülatif kalan)
+#    ürün gruplarında kümülatif minimumla hesaplanır.
+#  - Beklenen zarar = beklenen fire * birim maliyet.
+
+HISTORY_DAYS = 90
+MAX_HORIZON_DAYS = 365
+
+
+def _group_cumsum(values, starts):
+    # starts: her satırın ait olduğu grubun ilk satır indeksi.
+    total = np.cumsum(values)
+    return total - np.concatenate([[0], total])[starts]
+
+
+def _group_cummin(values, group):
+    # Gruplar ardışık olmalı. Her gruba öncekilerden büyük bir negatif kayma
+    # eklenir; böylece tek minimum.accumulate grup sınırında sıfırlanmış olur.
+    # values ikinci boyut taşıyabilir (parti × senaryo).
+    if not len(values):
+        return values
+    span = float(values.max() - values.min()) + 1.0
+    shift = group * span
+    if values.ndim == 2:
+        shift = shift[:, None]
+    return np.minimum.accumulate(values - shift, axis=0) + shift
+
+
+def fefo_expected_sold(remaining, demand_until, group):
+    # remaining: parti kalanları; demand_until: (parti,) ya da (parti, senaryo)
+    # SKT'ye kadarki kümülatif talep. Partiler ürün ve FEFO sırasına göre
+    # dizili olmalı. Döner: parti başına beklenen satış.
+    starts = np.searchsorted(group, group)
+    cum_remaining = _group_cumsum(remaining, starts)
+    first = np.arange(len(group)) == starts
+    if demand_until.ndim == 2:
+        cum_remaining = cum_remaining[:, None]
+        first = first[:, None]
+    sold_through = cum_remaining + np.minimum(_group_cummin(demand_until - cum_remaining, group), 0)
+    sold_before = np.where(first, 0.0, np.roll(sold_through, 1, axis=0))
+    return sold_through - sold_before
+
+
+class WasteRiskEngine:
+    def __init__(self, history_days=HISTORY_DAYS, max_horizon=MAX_HORIZON_DAYS, as_of=None):
+        self.conn = get_connection()
+        self.today = pd.Timestamp(as_of or pd.Timestamp.today()).normalize()
+        self.history_days = history_days
+        self.max_horizon = max_horizon
+
+    def load_lots(self):
+        # SKT'si olmayan partiler FEFO sırasında en sona düşer ve önceki
+        # partilerin tüketimini etkilemez; hesaba katılmaz.
+        return pd.read_sql_query("""
+            SELECT lot.lot_id, lot.product_id, p.product_name, lot.received_date, lot.expiry_date,
+                   lot.remaining, p.cost_price, p.selling_price
+            FROM stock_lots lot
+            JOIN products p ON p.product_id = lot.product_id
+            WHERE lot.remaining > 0 AND lot.expiry_date IS NOT NULL
+            ORDER BY lot.product_id, lot.expiry_date, lot.lot_id
+        """, self.conn)
+
+    def demand_forecast(self, product_ids, horizon):
+        # Döner: ürün × horizon günlük tahmin (bugünden başlayarak).
+        demand = get_demand_matrix(self.conn)
+        end = min(self.today, demand.last_sales_day() or self.today)
+        start = end - pd.Timedelta(days=self.history_days - 1)
+        rows = np.array([demand.product_index.get(int(pid), -1) for pid in product_ids], dtype=np.int64)
+        window = demand.window(start, end).astype(np.float64)
+        history = np.zeros((len(rows), window.shape[1]))
+        known = rows >= 0
+        history[known] = window[rows[known]]
+        if history.shape[1] == 0:
+            return np.zeros((len(rows), horizon))
+        forecast, _ = forecast_matrix(history, horizon)
+        return forecast
+
+    def lot_demand(self):
+        # Açık partiler FEFO sırasıyla; her partinin SKT'sine kadarki beklenen
+        # kümülatif talep (demand_until) ve ürün grubu (group) ile.
+        lots = self.load_lots()
+        expiry = pd.to_datetime(lots["expiry_date"], errors="coerce")
+        lots = lots[expiry.notna()].reset_index(drop=True)
+        lots["expiry_date"] = expiry[expiry.notna()].reset_index(drop=True)
+        lots["days_left"] = (lots["expiry_date"] - self.today).dt.days
+
+        product_ids, group = np.unique(lots["product_id"].to_numpy(), return_inverse=True)
+        sell_days = np.maximum(lots["days_left"].to_numpy() + 1, 0)
+        horizon = int(np.clip(sell_days.max() if len(lots) else 1, 1, self.max_horizon))
+        forecast = self.demand_forecast(product_ids, horizon)
+
+        # Partinin satılabileceği gün sayısına kadar kümülatif talep; ufkun
+        # ötesi son günün tahminiyle doğrusal uzatılır.
+        cumulative = np.concatenate([np.zeros((len(product_ids), 1)), np.cumsum(forecast, axis=1)], axis=1)
+        within = np.minimum(sell_days, horizon)
+        lots["demand_until"] = cumulative[group, within] + forecast[group, -1] * np.maximum(sell_days - horizon, 0)
+        lots["daily_forecast"] = forecast.mean(axis=1)[group] if len(lots) else np.zeros(0)
+        lots["group"] = group
+        return lots
+
+    def compute(self):
+        lots = self.lot_demand()
+        remaining = lots["remaining"].to_numpy(dtype=np.float64)
+        expected_sold = fefo_expected_sold(remaining, lots["demand_until"].to_numpy(), lots["group"].to_numpy())
+        expected_waste = np.maximum(remaining - expected_sold, 0)
+
+        unit_cost = pd.to_numeric(lots["cost_price"], errors="coerce").fillna(0).to_numpy()
+        unit_cost = np.where(unit_cost > 0, unit_cost,
+                             pd.to_numeric(lots["selling_price"], errors="coerce").fillna(0).to_numpy())
+
+        plan = pd.DataFrame({
+            "lot_id": lots["lot_id"].to_numpy(),
+            "product_id": lots["product_id"].to_numpy(),
+            "product_name": lots["product_name"].to_numpy(),
+            "received_date": pd.to_datetime(lots["received_date"], errors="coerce"),
+            "expiry_date": lots["expiry_date"],
+            "days_left": lots["days_left"].to_numpy(),
+            "remaining": remaining.astype(int),
+            "daily_forecast": lots["daily_forecast"].round(2).to_numpy(),
+            "expected_sold": expected_sold.round(1),
+            "expected_waste": expected_waste.round(1),
+            "waste_ratio": np.where(remaining > 0, expected_waste / np.maximum(remaining, 1) * 100, 0).round(1),
+            "unit_cost": unit_cost,
+            "expected_loss": (expected_waste * unit_cost).round(2),
+        })
+        return plan.sort_values(["expected_loss", "days_left"], ascending=[False, True], kind="stable").reset_index(drop=True)
+
+    def by_product(self, plan=None):
+        # Ürün başına toplam beklenen fire ve zarar; en yakın SKT ile.
+        if plan is None:
+            plan = self.compute()
+        summary = plan.groupby(["product_id", "product_name"], as_index=False).agg(
+            remaining=("remaining", "sum"),
+            expected_waste=("expected_waste", "sum"),
+            expected_loss=("expected_loss", "sum"),
+            earliest_expiry=("expiry_date", "min"),
+        )
+        return summary.sort_values("expected_loss", ascending=False, kind="stable").reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    engine = WasteRiskEngine()
+    plan = engine.compute()
+    at_risk = plan[plan["expected_waste"] > 0]
+    print(f"{len(at_risk)} partide fire bekleniyor, toplam zarar: {at_risk['expected_loss'].sum():.2f} TL")
+    print(at_risk.head(20).to_string(index=False))
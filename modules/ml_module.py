@@ -1,152 +1,252 @@
-import sqlite3
-import pandas as pd
+import argparse
+import os
+import threading
+from dataclasses import dataclass, field
 import numpy as np
+import pandas as pd
 import plotly.graph_objects as go
 import plotly.io as pio
-import os
-from datetime import datetime
 from prophet import Prophet
-from modules.config import DB_PATH
-
-conn = sqlite3.connect(DB_PATH)
-df_sales = pd.read_sql_query("SELECT date, product_id, quantity_sold FROM sales", conn)
-df_products = pd.read_sql_query("SELECT * FROM products", conn)
-df_stock = pd.read_sql_query("SELECT product_id, quantity FROM stock_transactions", conn)
-df_links = pd.read_sql_query("SELECT * FROM product_storage_links", conn)
-df_shelves = pd.read_sql_query("SELECT id, max_capacity FROM shelves", conn)
-df_fridges = pd.read_sql_query("SELECT id, max_capacity FROM fridges", conn)
-conn.close()
-
-today = pd.Timestamp.today()
-df_sales["date"] = pd.to_datetime(df_sales["date"], errors="coerce")
-df_products["discount_until"] = pd.to_datetime(df_products["discount_until"], errors="coerce")
-
-df_daily = df_sales.groupby("date")["quantity_sold"].sum().reset_index()
-df_prophet = df_daily.rename(columns={"date": "ds", "quantity_sold": "y"})
-
-model = Prophet(daily_seasonality=True, interval_width=0.6)
-model.fit(df_prophet)
-
-future = model.make_future_dataframe(periods=30)
-forecast = model.predict(future)
-forecast_30 = forecast[(forecast["ds"] > df_prophet["ds"].max()) & (forecast["ds"] <= today + pd.Timedelta(days=30))]
-total_forecast_qty = forecast_30["yhat"].sum()
-
-df_sales_sum = df_sales.groupby("product_id")["quantity_sold"].sum().reset_index()
-df_stock_sum = df_stock.groupby("product_id")["quantity"].sum().reset_index()
-
-df_summary = pd.merge(df_products, df_sales_sum, on="product_id", how="left").fillna(0).infer_objects()
-df_summary = pd.merge(df_summary, df_stock_sum, on="product_id", how="left").fillna(0).infer_objects()
-df_summary = pd.merge(df_summary, df_links, on="product_id", how="left")
-df_summary["current_stock"] = df_summary["quantity"] - df_summary["quantity_sold"]
-
-mask = (
-    pd.notna(df_summary["discount_price"]) &
-    pd.notna(df_summary["discount_until"]) &
-    (df_summary["discount_until"] >= today)
-)
-df_summary["effective_price"] = df_summary["selling_price"]
-df_summary.loc[mask, "effective_price"] = df_summary.loc[mask, "discount_price"]
-
-for col in ["effective_price", "cost_price", "quantity_sold", "quantity", "unit_volume"]:
-    df_summary[col] = pd.to_numeric(df_summary[col], errors="coerce").fillna(1.0 if col == "unit_volume" else 0.0)
-
-df_summary["weight"] = df_summary["quantity_sold"] / df_summary["quantity_sold"].sum()
-df_summary["forecasted_qty"] = df_summary["weight"] * total_forecast_qty
-df_summary["shortage"] = (df_summary["forecasted_qty"] - df_summary["current_stock"]).apply(lambda x: x if x > 0 else 0)
-
-df_summary["potential_revenue"] = df_summary["forecasted_qty"] * df_summary["effective_price"]
-df_summary["potential_cost"] = df_summary["forecasted_qty"] * df_summary["cost_price"]
-df_summary["potential_profit"] = df_summary["potential_revenue"] - df_summary["potential_cost"]
-
-def get_capacity(row):
-    try:
-        if row["storage_type"] == "shelf":
-            return df_shelves[df_shelves["id"] == row["storage_id"]]["max_capacity"].values[0]
-        elif row["storage_type"] == "fridge":
-            return df_fridges[df_fridges["id"] == row["storage_id"]]["max_capacity"].values[0]
-    except:
-        return None
-
-df_summary["storage_capacity"] = df_summary.apply(get_capacity, axis=1)
-df_summary["projected_volume"] = df_summary["forecasted_qty"] * df_summary["unit_volume"]
-df_summary["volume_overload"] = df_summary.apply(
-    lambda row: row["projected_volume"] > row["storage_capacity"] if pd.notna(row["storage_capacity"]) else False,
-    axis=1
-)
-
-total_profit = df_summary["potential_profit"].sum()
-total_revenue = df_summary["potential_revenue"].sum()
-total_shortage = df_summary["shortage"].sum()
-critical_items = df_summary[df_summary["shortage"] > 0]
-volume_issues = df_summary[df_summary["volume_overload"] == True]
-
-fig = go.Figure()
-
-fig.add_trace(go.Scatter(
-    x=df_prophet["ds"], y=df_prophet["y"],
-    mode='lines+markers',
-    name='Gerçek Satış',
-    line=dict(color='royalblue')
-))
-
-fig.add_trace(go.Scatter(
-    x=forecast_30["ds"], y=forecast_30["yhat"],
-    mode='lines',
-    name='Tahmin (30 Gün)',
-    line=dict(color='darkorange', dash='dash')
-))
-
-fig.add_trace(go.Scatter(
-    x=forecast_30["ds"].tolist() + forecast_30["ds"][::-1].tolist(),
-    y=forecast_30["yhat_upper"].tolist() + forecast_30["yhat_lower"][::-1].tolist(),
-    fill='toself',
-    fillcolor='rgba(255,165,0,0.2)',
-    line=dict(color='rgba(255,255,255,0)'),
-    hoverinfo="skip",
-    name='Tahmin Aralığı'
-))
-
-if not critical_items.empty:
-    warning_text = "<br>".join(
-        f"{row['product_name']}: {int(row['shortage'])} eksik"
-        for _, row in critical_items.iterrows()
+from modules.db.connection import get_connection
+from modules.db.stock_levels import get_stock_levels
+from modules.db.demand_matrix import get_demand_matrix
+from modules.db.data_versions import get_data_version
+from modules.db.forecast_cache import cached_forecast
+from modules.logic.pricing import PriceBook
+
+# Mağaza geneli N günlük görünüm: toplam satış Prophet ile tahmin edilir,
+# ürünlere geçmiş satış payına göre dağıtılır; açık, kâr ve depo hacmi
+# hesaplanır. Ara tablolar (ürün/fiyat/kapasite, satış payları) veri sürümü
+# (data_versions sayacı, talep matrisi sürümü) değişene kadar bellekte tutulur.
+
+OUTLOOK_PARAMS = {"daily_seasonality": True, "interval_width": 0.6}
+
+
+@dataclass
+class OutlookResult:
+    as_of: pd.Timestamp
+    horizon: int
+    data_version: tuple
+    history: pd.DataFrame
+    forecast: pd.DataFrame
+    products: pd.DataFrame
+    total_forecast_qty: float
+    total_revenue: float
+    total_cost: float
+    total_profit: float
+    total_shortage: float
+    html_path: str = None
+    critical_items: pd.DataFrame = field(init=False)
+    volume_issues: pd.DataFrame = field(init=False)
+
+    def __post_init__(self):
+        self.critical_items = self.products[self.products["shortage"] > 0]
+        self.volume_issues = self.products[self.products["volume_overload"]]
+
+    def summary(self):
+        return {
+            "total_forecast_qty": self.total_forecast_qty,
+            "total_revenue": self.total_revenue,
+            "total_profit": self.total_profit,
+            "total_shortage": self.total_shortage,
+            "critical_items": self.critical_items["product_name"].tolist(),
+            "volume_issues": self.volume_issues["product_name"].tolist(),
+        }
+
+    def to_figure(self):
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=self.history["ds"], y=self.history["y"],
+            mode='lines+markers',
+            name='Gerçek Satış',
+            line=dict(color='royalblue')
+        ))
+        fig.add_trace(go.Scatter(
+            x=self.forecast["ds"], y=self.forecast["yhat"],
+            mode='lines',
+            name=f'Tahmin ({self.horizon} Gün)',
+            line=dict(color='darkorange', dash='dash')
+        ))
+        fig.add_trace(go.Scatter(
+            x=self.forecast["ds"].tolist() + self.forecast["ds"][::-1].tolist(),
+            y=self.forecast["yhat_upper"].tolist() + self.forecast["yhat_lower"][::-1].tolist(),
+            fill='toself',
+            fillcolor='rgba(255,165,0,0.2)',
+            line=dict(color='rgba(255,255,255,0)'),
+            hoverinfo="skip",
+            name='Tahmin Aralığı'
+        ))
+
+        if not self.critical_items.empty:
+            warning_text = "<br>".join(
+                f"{name}: {int(shortage)} eksik"
+                for name, shortage in zip(self.critical_items["product_name"], self.critical_items["shortage"])
+            )
+            fig.add_annotation(
+                text=f"⚠️ Kritik Ürünler:<br>{warning_text}",
+                xref="paper", yref="paper",
+                x=1, y=0.1, showarrow=False,
+                bgcolor="lightyellow", bordercolor="red", borderwidth=1
+            )
+
+        if not self.volume_issues.empty:
+            overflow_text = "<br>".join(
+                f"{name} → Kapasite aşımı" for name in self.volume_issues["product_name"]
+            )
+            fig.add_annotation(
+                text=f"📦 Depo Yetersizliği:<br>{overflow_text}",
+                xref="paper", yref="paper",
+                x=1, y=0, showarrow=False,
+                bgcolor="mistyrose", bordercolor="darkred", borderwidth=1
+            )
+
+        fig.update_layout(
+            title=f"📈 Toplam Satış Tahmini – Gelecek {self.horizon} Gün",
+            xaxis_title="Tarih",
+            yaxis_title="Satış Adedi",
+            legend=dict(x=0.01, y=0.99),
+            template="plotly_white"
+        )
+        return fig
+
+    def write_html(self, output_dir=None):
+        self.html_path = os.path.join(output_dir or os.path.dirname(os.path.abspath(__file__)), "forecast_plot.html")
+        pio.write_html(self.to_figure(), file=self.html_path, auto_open=False)
+        return self.html_path
+
+
+# --- bellek içi ara sonuçlar ----------------------------------------------------
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+def _memoized(name, key, compute):
+    # Her ad için yalnızca son anahtar tutulur; eski sürümler işe yaramaz.
+    with _memo_lock:
+        cached = _memo.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+    value = compute()
+    with _memo_lock:
+        _memo[name] = (key, value)
+    return value
+
+
+def clear_outlook_cache():
+    with _memo_lock:
+        _memo.clear()
+
+
+def _catalog_frame(conn, as_of):
+    # Ürün, etkin fiyat, depo bağlantısı ve kapasite; satıştan bağımsızdır.
+    products = pd.read_sql_query(
+        "SELECT product_id, product_name, cost_price, unit_volume FROM products",
+        conn
     )
-    fig.add_annotation(
-        text=f"⚠️ Kritik Ürünler:<br>{warning_text}",
-        xref="paper", yref="paper",
-        x=1, y=0.1, showarrow=False,
-        bgcolor="lightyellow", bordercolor="red", borderwidth=1
+    links = pd.read_sql_query("SELECT * FROM product_storage_links", conn)
+    shelves = pd.read_sql_query("SELECT id AS storage_id, max_capacity FROM shelves", conn)
+    fridges = pd.read_sql_query("SELECT id AS storage_id, max_capacity FROM fridges", conn)
+
+    prices = PriceBook(conn).prices(products["product_id"], as_of)
+    products["effective_price"] = np.nan_to_num(prices)
+    products["cost_price"] = pd.to_numeric(products["cost_price"], errors="coerce").fillna(0.0)
+    products["unit_volume"] = pd.to_numeric(products["unit_volume"], errors="coerce").fillna(1.0)
+
+    capacities = pd.concat([
+        shelves.assign(storage_type="shelf"),
+        fridges.assign(storage_type="fridge"),
+    ], ignore_index=True)
+    df = pd.merge(products, links, on="product_id", how="left")
+    df = pd.merge(df, capacities, on=["storage_type", "storage_id"], how="left")
+    df = df.rename(columns={"max_capacity": "storage_capacity"})
+    return df[["product_id", "product_name", "effective_price", "cost_price", "unit_volume",
+               "storage_type", "storage_id", "storage_capacity"]]
+
+
+def _sales_weights(demand, as_of):
+    # Ürünlerin as_of tarihine kadarki toplam satış payı.
+    totals = demand.window(end=as_of).sum(axis=1, dtype=np.float64)
+    total = totals.sum()
+    weights = totals / total if total > 0 else np.zeros_like(totals)
+    return pd.DataFrame({"product_id": demand.product_ids, "weight": weights})
+
+
+def _total_forecast(history, as_of, horizon):
+    def compute():
+        model = Prophet(**OUTLOOK_PARAMS)
+        model.fit(history)
+        future = model.make_future_dataframe(periods=horizon)
+        forecast = model.predict(future)
+        return forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]]
+
+    forecast = cached_forecast("outlook_prophet", "all", horizon, OUTLOOK_PARAMS, history, compute)
+    return forecast[(forecast["ds"] > history["ds"].max()) & (forecast["ds"] <= as_of + pd.Timedelta(days=horizon))]
+
+
+def compute_30_day_outlook(as_of=None, horizon=30, conn=None):
+    conn = conn or get_connection()
+    as_of = pd.Timestamp(as_of or pd.Timestamp.today()).normalize()
+    demand = get_demand_matrix(conn)
+    catalog_version = get_data_version(conn, "catalog")
+    day = as_of.strftime("%Y-%m-%d")
+
+    catalog = _memoized("catalog", (catalog_version, day), lambda: _catalog_frame(conn, as_of))
+    weights = _memoized("weights", (demand.version, day), lambda: _sales_weights(demand, as_of))
+    history = _memoized(
+        "history", (demand.version, day),
+        lambda: demand.series(end=as_of).rename(columns={"date": "ds", "quantity_sold": "y"})
     )
-
-if not volume_issues.empty:
-    overflow_text = "<br>".join(
-        f"{row['product_name']} → Kapasite aşımı"
-        for _, row in volume_issues.iterrows()
-    )
-    fig.add_annotation(
-        text=f"📦 Depo Yetersizliği:<br>{overflow_text}",
-        xref="paper", yref="paper",
-        x=1, y=0, showarrow=False,
-        bgcolor="mistyrose", bordercolor="darkred", borderwidth=1
+    if history.empty:
+        raise ValueError("Tahmin için satış verisi yok.")
+    forecast = _total_forecast(history, as_of, horizon)
+    total_forecast_qty = float(forecast["yhat"].sum())
+
+    # Stok her çağrıda okunur; tek sorgudur.
+    stock = get_stock_levels(conn)[["product_id", "current_stock"]]
+    df = pd.merge(catalog, weights, on="product_id", how="left")
+    df = pd.merge(df, stock, on="product_id", how="left")
+    df["weight"] = df["weight"].fillna(0.0)
+    df["current_stock"] = df["current_stock"].fillna(0).clip(lower=0)
+
+    df["forecasted_qty"] = df["weight"] * total_forecast_qty
+    df["shortage"] = (df["forecasted_qty"] - df["current_stock"]).clip(lower=0)
+    df["potential_revenue"] = df["forecasted_qty"] * df["effective_price"]
+    df["potential_cost"] = df["forecasted_qty"] * df["cost_price"]
+    df["potential_profit"] = df["potential_revenue"] - df["potential_cost"]
+    df["projected_volume"] = df["forecasted_qty"] * df["unit_volume"]
+    # Depoya bağlı olmayan ürünlerde kapasite bilinmez; aşım sayılmaz.
+    df["volume_overload"] = (df["projected_volume"] > df["storage_capacity"].fillna(np.inf)).astype(bool)
+
+    return OutlookResult(
+        as_of=as_of,
+        horizon=horizon,
+        data_version=(demand.version, catalog_version),
+        history=history,
+        forecast=forecast.reset_index(drop=True),
+        products=df,
+        total_forecast_qty=total_forecast_qty,
+        total_revenue=float(df["potential_revenue"].sum()),
+        total_cost=float(df["potential_cost"].sum()),
+        total_profit=float(df["potential_profit"].sum()),
+        total_shortage=float(df["shortage"].sum()),
     )
 
-fig.update_layout(
-    title="📈 Toplam Satış Tahmini – Gelecek 30 Gün",
-    xaxis_title="Tarih",
-    yaxis_title="Satış Adedi",
-    legend=dict(x=0.01, y=0.99),
-    template="plotly_white"
-)
-
-html_path = os.path.join(os.getcwd(), "forecast_plot.html")
-pio.write_html(fig, file=html_path, auto_open=False)
-
-print("30 Günlük Tahmin:")
-print(f"  • Beklenen Toplam Satış: {total_forecast_qty:.0f} adet")
-print(f"  • Beklenen Gelir: {total_revenue:.2f} TL")
-print(f"  • Beklenen Kâr: {total_profit:.2f} TL")
-print(f"  • Stok Yetersiz Ürün Sayısı: {len(critical_items)} ürün")
-print(f"  • Toplam Açık Miktar: {total_shortage:.0f} adet")
-print(f"  • Kapasite Aşımı Olası Ürün Sayısı: {len(volume_issues)}")
-print(f"<<HTML_PATH>>{html_path}<<END>>")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mağaza geneli satış tahmini")
+    parser.add_argument("--as-of", default=None, help="YYYY-MM-DD (varsayılan: bugün)")
+    parser.add_argument("--horizon", type=int, default=30)
+    parser.add_argument("--output", default=None, help="HTML grafiğin yazılacağı klasör")
+    args = parser.parse_args()
+
+    outlook = compute_30_day_outlook(args.as_of, args.horizon)
+    html_path = outlook.write_html(args.output)
+    print(f"{outlook.horizon} Günlük Tahmin:")
+    print(f"  • Beklenen Toplam Satış: {outlook.total_forecast_qty:.0f} adet")
+    print(f"  • Beklenen Gelir: {outlook.total_revenue:.2f} TL")
+    print(f"  • Beklenen Kâr: {outlook.total_profit:.2f} TL")
+    print(f"  • Stok Yetersiz Ürün Sayısı: {len(outlook.critical_items)} ürün")
+    print(f"  • Toplam Açık Miktar: {outlook.total_shortage:.0f} adet")
+    print(f"  • Kapasite Aşımı Olası Ürün Sayısı: {len(outlook.volume_issues)}")
+    print(f"<<HTML_PATH>>{html_path}<<END>>")
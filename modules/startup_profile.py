@@ -0,0 +1,61 @@
+import builtins
+import sys
+import time
+
+# --profile-startup için basit içe aktarma profilleyici. builtins.__import__
+# sarılır; ilk kez yüklenen her modülün (alt içe aktarmalar dahil) süresi
+# kaydedilir. Ayrıca açılış aşamaları mark() ile işaretlenir.
+
+REPORT_LIMIT = 25
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.records = []
+        self.phases = []
+        self._original = None
+        self._depth = 0
+        self._started = None
+
+    def start(self):
+        if self._original is not None:
+            return
+        self._started = time.perf_counter()
+        self._original = builtins.__import__
+        builtins.__import__ = self._import
+
+    def stop(self):
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._original(name, globals, locals, fromlist, level)
+        depth = self._depth
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            self._depth -= 1
+            self.records.append((name, time.perf_counter() - start, depth))
+
+    def mark(self, phase):
+        if self._started is not None:
+            self.phases.append((phase, time.perf_counter() - self._started))
+
+    def report(self, limit=REPORT_LIMIT):
+        lines = ["=== Açılış profili ==="]
+        for phase, elapsed in self.phases:
+            lines.append(f"{elapsed * 1000:9.1f} ms  {phase}")
+
+        top_level = [r for r in self.records if r[2] == 0]
+        total = sum(r[1] for r in top_level)
+        lines.append(f"--- İçe aktarma: {len(self.records)} modül, üst seviye toplam {total * 1000:.1f} ms ---")
+        for name, elapsed, depth in sorted(self.records, key=lambda r: r[1], reverse=True)[:limit]:
+            lines.append(f"{elapsed * 1000:9.1f} ms  {'  ' * min(depth, 6)}{name}")
+        return "\n".join(lines)
+
+
+profiler = StartupProfiler()
@@ -1,9 +1,18 @@
-from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QTextEdit, QPushButton
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QTextEdit, QPushButton, QMessageBox
 from PyQt5.QtCore import Qt
 from modules.logic.ml_assistant import InventoryForecastAssistant
 from modules.logic.ai_suggestion_engine import AISuggestionEngine
+from modules.widgets.background_task import run_in_background, TaskProgressDialog
 from modules.lang.translator import Translator
 
+
+def _collect_reports(progress=None):
+    ml_assistant = InventoryForecastAssistant(enable_trends=False)
+    forecast_report = ml_assistant.run_analysis(progress=progress)
+    ops_report = AISuggestionEngine().analyze()
+    return forecast_report, ops_report
+
+
 class AISuggestionsWindow(QDialog):
     def __init__(self):
         super().__init__()
@@ -27,9 +36,23 @@ class AISuggestionsWindow(QDialog):
 
     def run_analysis(self):
         self.output_area.clear()
+        self.analyze_button.setEnabled(False)
 
-        ml_assistant = InventoryForecastAssistant(enable_trends=False)
-        forecast_report = ml_assistant.run_analysis()
+        self.task = run_in_background(
+            _collect_reports,
+            on_result=self.show_reports,
+            on_error=self.show_error,
+            on_cancel=lambda: self.analyze_button.setEnabled(True)
+        )
+        self.progress_dialog = TaskProgressDialog(self.task, self.t.tr("ai.title"), self)
+
+    def show_error(self, error):
+        self.analyze_button.setEnabled(True)
+        QMessageBox.critical(self, self.t.tr("error.title"), self.t.tr("task.failed").format(error=error))
+
+    def show_reports(self, reports):
+        self.analyze_button.setEnabled(True)
+        forecast_report, ops_report = reports
 
         forecast_suggestions = []
         if not forecast_report:
@@ -48,9 +71,6 @@ class AISuggestionsWindow(QDialog):
                 elif days > 60:
                     forecast_suggestions.append(self.t.tr("ai.too_much_stock").format(name=name, days=days))
 
-        engine = AISuggestionEngine()
-        ops_report = engine.analyze()
-
         ops_suggestions = []
         if not ops_report:
             ops_suggestions.append(self.t.tr("ai.no_data_operational"))
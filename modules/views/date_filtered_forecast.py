@@ -1,19 +1,30 @@
 from PyQt5.QtWidgets import (
     QDialog, QFormLayout, QComboBox, QPushButton, QDateEdit, QMessageBox, QFileDialog
 )
-import sqlite3
 import pandas as pd
-import tempfile
-import numpy as np
 import plotly.graph_objects as go
-from prophet import Prophet
-from statsmodels.tsa.arima.model import ARIMA
-from sklearn.metrics import mean_absolute_error, mean_squared_error
 from PyQt5.QtCore import QDate
-from modules.config import DB_PATH
+from modules.db.connection import get_connection
+from modules.db.sales_daily import get_product_ids
+from modules.db.demand_matrix import get_demand_matrix
+from modules.logic.forecasting import fit_prophet_arima_in_worker
+from modules.logic.downsample import TimeSeriesSampler, ZoomableFigure
 from modules.widgets.plotly_to_gui import PlotlyViewer
+from modules.widgets.background_task import run_in_background, TaskProgressDialog
 from modules.lang.translator import Translator
 
+
+def fit_date_range(product_name, start, end):
+    # Arka planda çalışır; model tahmin sürecinde kurulur.
+    conn = get_connection()
+    product_ids = get_product_ids(conn, "product_name", product_name)
+    df_grouped = get_demand_matrix(conn).series(product_ids, start, end)
+    if df_grouped.empty:
+        return None, None
+    df_prophet = df_grouped.rename(columns={"date": "ds", "quantity_sold": "y"})
+    return df_prophet, fit_prophet_arima_in_worker(df_prophet, 10, product_name, scope=f"{start}..{end}")
+
+
 class DateFilteredForecastWindow(QDialog):
     def __init__(self):
         super().__init__()
@@ -35,9 +46,7 @@ class DateFilteredForecastWindow(QDialog):
         self.end_date.setCalendarPopup(True)
 
         try:
-            conn = sqlite3.connect(DB_PATH)
-            df = pd.read_sql_query("SELECT DISTINCT product_name FROM products", conn)
-            conn.close()
+            df = pd.read_sql_query("SELECT DISTINCT product_name FROM products", get_connection())
             for name in df["product_name"].dropna().unique():
                 self.product_dropdown.addItem(name)
         except Exception as e:
@@ -58,50 +67,33 @@ class DateFilteredForecastWindow(QDialog):
         product_name = self.product_dropdown.currentText()
         start = self.start_date.date().toPyDate()
         end = self.end_date.date().toPyDate()
+        self.forecast_btn.setEnabled(False)
+        self.task = run_in_background(
+            lambda progress=None: fit_date_range(product_name, start, end),
+            on_result=lambda result: self.display_forecast(product_name, start, end, result),
+            on_error=self.display_error,
+            on_cancel=lambda: self.forecast_btn.setEnabled(True)
+        )
+        self.progress_dialog = TaskProgressDialog(self.task, self.t.tr("forecast.title"), self)
+
+    def display_error(self, error):
+        self.forecast_btn.setEnabled(True)
+        QMessageBox.critical(self, self.t.tr("error.title"), self.t.tr("forecast.error").format(error=str(error)))
+
+    def display_forecast(self, product_name, start, end, result):
+        self.forecast_btn.setEnabled(True)
+        df_prophet, fit = result
+        if df_prophet is None:
+            QMessageBox.warning(self, self.t.tr("info.title"), self.t.tr("forecast.no_data"))
+            self.last_fig = None
+            return
 
         try:
-            conn = sqlite3.connect(DB_PATH)
-            sales = pd.read_sql_query("SELECT * FROM sales", conn)
-            products = pd.read_sql_query("SELECT * FROM products", conn)
-            conn.close()
-
-            df = pd.merge(sales, products, on="product_id")
-            df = df[df["product_name"] == product_name]
-            df["date"] = pd.to_datetime(df["date"])
-            df = df[(df["date"] >= pd.Timestamp(start)) & (df["date"] <= pd.Timestamp(end))]
-
-            if df.empty:
-                QMessageBox.warning(self, self.t.tr("info.title"), self.t.tr("forecast.no_data"))
-                self.last_fig = None
-                return
-
-            df_grouped = df.groupby("date")["quantity_sold"].sum().reset_index()
-            df_prophet = df_grouped.rename(columns={"date": "ds", "quantity_sold": "y"})
-
-            # Prophet
-            model = Prophet(daily_seasonality=True)
-            model.fit(df_prophet)
-            future = model.make_future_dataframe(periods=10)
-            forecast = model.predict(future)
-            merged = pd.merge(df_prophet, forecast, on="ds", how="left")
-            mae_prophet = mean_absolute_error(merged["y"], merged["yhat"])
-            rmse_prophet = mean_squared_error(merged["y"], merged["yhat"]) ** 0.5
+            forecast = fit["forecast"]
             forecast_future = forecast[forecast["ds"] > df_prophet["ds"].max()]
-            forecast["yhat"] = forecast["yhat"].clip(lower=0)
-            forecast["yhat_upper"] = forecast["yhat_upper"].clip(lower=0)
-            forecast["yhat_lower"] = forecast["yhat_lower"].clip(lower=0)
-
-            # ARIMA
-            y = df_prophet["y"].values
-            order = (1, 1, 1) if len(y) > 5 else (0, 1, 0)
-            arima_model = ARIMA(y, order=order)
-            arima_fit = arima_model.fit()
-            arima_forecast = arima_fit.forecast(steps=10)
-            arima_index = pd.date_range(df_prophet["ds"].max() + pd.Timedelta(days=1), periods=10, freq="D")
-            arima_series = pd.Series(np.maximum(arima_forecast, 0), index=arima_index)
-            arima_in_sample = arima_fit.predict(start=0, end=len(y)-1)
-            mae_arima = mean_absolute_error(y, arima_in_sample)
-            rmse_arima = mean_squared_error(y, arima_in_sample) ** 0.5
+            arima_series = fit["arima_series"]
+            mae_prophet, rmse_prophet = fit["mae_prophet"], fit["rmse_prophet"]
+            mae_arima, rmse_arima = fit["mae_arima"], fit["rmse_arima"]
 
             fig = go.Figure()
             fig.add_trace(go.Scatter(
@@ -145,13 +137,9 @@ class DateFilteredForecastWindow(QDialog):
                 height=500
             )
 
-            # Geçici dosya ile gösterim için kaydet
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".html") as tmp_html:
-                fig.write_html(tmp_html.name)
-                html_path = tmp_html.name
-
+            fig = ZoomableFigure(fig, TimeSeriesSampler(df_prophet["ds"], {"y": df_prophet["y"]}), {0: "y"})
             self.last_fig = fig  # Kaydet butonunda kullanılacak
-            viewer = PlotlyViewer((html_path, f"{product_name} - {self.t.tr('forecast.title')}"))
+            viewer = PlotlyViewer((fig, f"{product_name} - {self.t.tr('forecast.title')}"))
             viewer.exec_()
 
             QMessageBox.information(
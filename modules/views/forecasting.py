@@ -1,11 +1,10 @@
 from PyQt5.QtWidgets import QDialog, QFormLayout, QComboBox, QPushButton, QMessageBox, QFileDialog
-import sqlite3
 import pandas as pd
-import tempfile
-from modules.config import DB_PATH
+from modules.db.connection import get_connection
 from modules.widgets.plotly_to_gui import PlotlyViewer
 from modules.lang.translator import Translator
 from modules.logic.forecasting import get_forecast_with_arima
+from modules.widgets.background_task import run_in_background, TaskProgressDialog
 
 class FilteredForecastWindow(QDialog):
     def __init__(self):
@@ -18,9 +17,7 @@ class FilteredForecastWindow(QDialog):
         self.product_dropdown = QComboBox()
 
         try:
-            conn = sqlite3.connect(DB_PATH)
-            df = pd.read_sql_query("SELECT DISTINCT product_name FROM products", conn)
-            conn.close()
+            df = pd.read_sql_query("SELECT DISTINCT product_name FROM products", get_connection())
             for name in df["product_name"].dropna().unique():
                 self.product_dropdown.addItem(name)
         except Exception as e:
@@ -42,7 +39,17 @@ class FilteredForecastWindow(QDialog):
 
     def show_forecast(self):
         product_name = self.product_dropdown.currentText()
-        result = get_forecast_with_arima(product_name)
+        self.forecast_btn.setEnabled(False)
+        self.task = run_in_background(
+            lambda progress=None: get_forecast_with_arima(product_name),
+            on_result=lambda result: self.display_forecast(product_name, result),
+            on_error=lambda error: self.display_forecast(product_name, None),
+            on_cancel=lambda: self.forecast_btn.setEnabled(True)
+        )
+        self.progress_dialog = TaskProgressDialog(self.task, self.t.tr("forecast.filtered_title"), self)
+
+    def display_forecast(self, product_name, result):
+        self.forecast_btn.setEnabled(True)
         if not result or result[0] is None or result[6] is None:
             QMessageBox.warning(self, self.t.tr("warning.title"), self.t.tr("forecast.no_data"))
             self.last_fig = None
@@ -51,12 +58,7 @@ class FilteredForecastWindow(QDialog):
         df_prophet, forecast, mae_prophet, rmse_prophet, mae_arima, rmse_arima, fig = result
         self.last_fig = fig  # figürü sakla
 
-        # Geçici dosya ile ön izleme
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".html") as tmp_html:
-            fig.write_html(tmp_html.name)
-            html_path = tmp_html.name
-
-        viewer = PlotlyViewer((html_path, f"{product_name} – {self.t.tr('forecast.title')}"))
+        viewer = PlotlyViewer((fig, f"{product_name} – {self.t.tr('forecast.title')}"))
         viewer.exec_()
 
         QMessageBox.information(
@@ -1,10 +1,10 @@
-import sqlite3
 import pandas as pd
 import plotly.graph_objects as go
-import tempfile
 from PyQt5.QtWidgets import QDialog, QFormLayout, QComboBox, QPushButton, QMessageBox
 from modules.widgets.plotly_to_gui import PlotlyViewer
-from modules.config import DB_PATH
+from modules.db.connection import get_connection
+from modules.db.sales_daily import get_daily_sales
+from modules.logic.downsample import TimeSeriesSampler, ZoomableFigure
 from modules.lang.translator import Translator
 
 class GraphWindow(QDialog):
@@ -50,11 +50,10 @@ class GraphWindow(QDialog):
 
     def update_target_list(self, filter_type):
         self.target_selector.clear()
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         products = pd.read_sql_query("SELECT * FROM products", conn)
         shelves = pd.read_sql_query("SELECT * FROM shelves", conn)
         fridges = pd.read_sql_query("SELECT * FROM fridges", conn)
-        conn.close()
 
         t = self.t
         mapping = {
@@ -78,16 +77,14 @@ class GraphWindow(QDialog):
         target = self.target_selector.currentText()
         display_mode = self.display_mode.currentText()
 
-        conn = sqlite3.connect(DB_PATH)
-        sales = pd.read_sql_query("SELECT * FROM sales WHERE quantity_sold > 0", conn)
-        products = pd.read_sql_query("SELECT * FROM products", conn)
+        conn = get_connection()
+        sales = get_daily_sales(conn)
+        products = pd.read_sql_query("SELECT product_id, product_name, brand, category, unit_volume FROM products", conn)
         links = pd.read_sql_query("SELECT * FROM product_storage_links", conn)
         fridges = pd.read_sql_query("SELECT * FROM fridges", conn)
         shelves = pd.read_sql_query("SELECT * FROM shelves", conn)
         ai_log = pd.read_sql_query("SELECT * FROM ai_suggestions_log", conn) if "ai_suggestions_log" in pd.read_sql("SELECT name FROM sqlite_master WHERE type='table'", conn)["name"].values else pd.DataFrame()
-        conn.close()
 
-        sales["date"] = pd.to_datetime(sales["date"])
         df = pd.merge(sales, products, on="product_id")
         df = pd.merge(df, links, on="product_id", how="left")
 
@@ -110,16 +107,6 @@ class GraphWindow(QDialog):
             QMessageBox.information(self, t.tr("info.title"), t.tr("graph.no_data"))
             return
 
-        df["effective_price"] = df.apply(
-            lambda row: float(row["discount_price"]) if (
-                pd.notna(row.get("discount_price")) and
-                pd.notna(row.get("discount_until")) and
-                row["date"] <= pd.to_datetime(row["discount_until"])
-            ) else float(row["selling_price"]), axis=1
-        )
-
-        df["revenue"] = df["quantity_sold"] * df["effective_price"]
-        df["cost"] = df["quantity_sold"] * df["cost_price"]
         df["profit"] = df["revenue"] - df["cost"]
         df["used_volume"] = df["quantity_sold"] * df["unit_volume"].fillna(1)
 
@@ -134,15 +121,21 @@ class GraphWindow(QDialog):
         df_grouped = df_grouped.set_index("date").reindex(full_range, fill_value=0).rename_axis("date").reset_index()
 
         fig = go.Figure()
+        zoom_traces = {}
+
+        def add_series(column, name):
+            # Noktalar ZoomableFigure tarafından görünen aralığa göre seyreltilerek doldurulur.
+            zoom_traces[len(fig.data)] = column
+            fig.add_trace(go.Scatter(x=[], y=[], mode="lines+markers", name=name))
 
         if display_mode in [t.tr("graph.sales_qty"), t.tr("graph.all")]:
-            fig.add_trace(go.Scatter(x=df_grouped["date"], y=df_grouped["quantity_sold"], mode="lines+markers", name=t.tr("graph.sales_qty")))
+            add_series("quantity_sold", t.tr("graph.sales_qty"))
 
         if display_mode in [t.tr("graph.revenue"), t.tr("graph.all")]:
-            fig.add_trace(go.Scatter(x=df_grouped["date"], y=df_grouped["revenue"], mode="lines+markers", name=t.tr("graph.revenue")))
+            add_series("revenue", t.tr("graph.revenue"))
 
         if display_mode in [t.tr("graph.profit"), t.tr("graph.all")]:
-            fig.add_trace(go.Scatter(x=df_grouped["date"], y=df_grouped["profit"], mode="lines+markers", name=t.tr("graph.profit")))
+            add_series("profit", t.tr("graph.profit"))
 
         if display_mode in [t.tr("graph.usage"), t.tr("graph.all")]:
             capacity = 1
@@ -153,7 +146,7 @@ class GraphWindow(QDialog):
                     capacity = fridges[fridges["name"] == target]["max_capacity"].values[0]
 
             df_grouped["usage_percent"] = (df_grouped["used_volume"] / capacity) * 100
-            fig.add_trace(go.Scatter(x=df_grouped["date"], y=df_grouped["usage_percent"], mode="lines+markers", name=t.tr("graph.usage")))
+            add_series("usage_percent", t.tr("graph.usage"))
 
         if not ai_log.empty and filter_type == t.tr("graph.by_product"):
             ai_log["timestamp"] = pd.to_datetime(ai_log["timestamp"])
@@ -170,9 +163,6 @@ class GraphWindow(QDialog):
             height=500
         )
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".html") as tmp:
-            fig.write_html(tmp.name)
-            html_path = tmp.name
-
-        viewer = PlotlyViewer((html_path, f"{target} – {display_mode}"))
+        sampler = TimeSeriesSampler(df_grouped["date"], {column: df_grouped[column] for column in zoom_traces.values()})
+        viewer = PlotlyViewer((ZoomableFigure(fig, sampler, zoom_traces), f"{target} – {display_mode}"))
         viewer.exec_()
@@ -1,4 +1,3 @@
-import sqlite3
 import hashlib
 import json
 from PyQt5.QtWidgets import (
@@ -6,49 +5,27 @@ from PyQt5.QtWidgets import (
     QFormLayout, QMessageBox, QComboBox
 )
 from PyQt5.QtCore import Qt
-from modules.config import DB_PATH
+from modules.db.connection import get_connection, transaction
 from modules.lang.translator import Translator
 
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
-def create_user_table():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE,
-            password_hash TEXT,
-            role TEXT CHECK(role IN ('admin', 'owner', 'worker')),
-            permissions TEXT
-        )
-    """)
-
-    cursor.execute("PRAGMA table_info(users)")
-    columns = [col[1] for col in cursor.fetchall()]
-
-    if "nickname" not in columns:
-        cursor.execute("ALTER TABLE users ADD COLUMN nickname TEXT DEFAULT ''")
-
-    if "owner_id" not in columns:
-        cursor.execute("ALTER TABLE users ADD COLUMN owner_id INTEGER")
-
+def ensure_default_admin():
+    # users tablosu modules/db/migrations.py içinde oluşturulur.
+    cursor = get_connection().cursor()
     cursor.execute("SELECT COUNT(*) FROM users WHERE username = 'Yigit'")
     if cursor.fetchone()[0] == 0:
-        cursor.execute("""
-            INSERT INTO users (username, password_hash, role, permissions, nickname, owner_id)
-            VALUES (?, ?, 'admin', ?, ?, NULL)
-        """, (
-            'Yigit',
-            hash_password('3535'),
-            json.dumps({}),
-            'Sistem Yöneticisi'
-        ))
-
-    conn.commit()
-    conn.close()
+        with transaction() as conn:
+            conn.execute("""
+                INSERT INTO users (username, password_hash, role, permissions, nickname, owner_id)
+                VALUES (?, ?, 'admin', ?, ?, NULL)
+            """, (
+                'Yigit',
+                hash_password('3535'),
+                json.dumps({}),
+                'Sistem Yöneticisi'
+            ))
 
 class LoginRegisterWindow(QDialog):
     def __init__(self):
@@ -61,7 +38,7 @@ class LoginRegisterWindow(QDialog):
         self.logged_in_nickname = None
         self.logged_in_user_id = None
 
-        create_user_table()
+        ensure_default_admin()
         self.init_ui()
 
     def init_ui(self):
@@ -125,11 +102,9 @@ class LoginRegisterWindow(QDialog):
             return
 
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
+            cursor = get_connection().cursor()
             cursor.execute("SELECT id, password_hash, role, permissions, nickname FROM users WHERE username = ?", (username,))
             result = cursor.fetchone()
-            conn.close()
         except Exception as e:
             QMessageBox.critical(self, self.translator.tr("error.title"), self.translator.tr("login.db_error").format(error=str(e)))
             return
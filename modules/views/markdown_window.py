@@ -0,0 +1,84 @@
+import math
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QCheckBox, QPushButton, QMessageBox
+from modules.logic.markdown_optimizer import apply_markdowns
+from modules.widgets.data_table import DataTableView
+from modules.lang.translator import Translator
+
+
+class MarkdownWindow(QDialog):
+    # plan: MarkdownOptimizer.optimize() çıktısı (fire beklenen ürünler).
+    def __init__(self, plan, elasticity=None):
+        super().__init__()
+        self.t = Translator()
+        self.plan = plan
+        self.setWindowTitle(self.t.tr("markdown.title"))
+        self.setMinimumSize(1000, 600)
+
+        layout = QVBoxLayout()
+
+        self.summary_label = QLabel()
+        self.summary_label.setStyleSheet("font-weight: bold; font-size: 12pt; margin: 8px 0;")
+        layout.addWidget(self.summary_label)
+
+        if elasticity is not None:
+            layout.addWidget(QLabel(self.t.tr("markdown.model").format(
+                uplift=round((math.exp(elasticity * 0.1) - 1) * 100)
+            )))
+
+        filter_layout = QHBoxLayout()
+        self.show_all_checkbox = QCheckBox(self.t.tr("markdown.show_all"))
+        self.show_all_checkbox.toggled.connect(self.refresh_table)
+        filter_layout.addWidget(self.show_all_checkbox)
+        filter_layout.addStretch()
+        layout.addLayout(filter_layout)
+
+        currency = self.t.currency_symbol
+        money = lambda v: f"{v:.2f}{currency}"
+        self.table = DataTableView(
+            ["product_name", "selling_price", "cost_price", "discount", "discount_price", "discount_until",
+             "waste_before", "waste_after", "gain"],
+            [self.t.tr("product.name"), self.t.tr("column.selling_price"), self.t.tr("column.cost_price"),
+             self.t.tr("column.discount"), self.t.tr("column.discount_price"), self.t.tr("column.discount_until"),
+             self.t.tr("column.waste_before"), self.t.tr("column.waste_after"), self.t.tr("column.gain")],
+            formatters={
+                "selling_price": money,
+                "cost_price": money,
+                "discount": lambda d: f"%{d * 100:.0f}",
+                "discount_price": money,
+                "discount_until": lambda d: d.strftime("%d.%m.%Y"),
+                "waste_before": "{:.1f}".format,
+                "waste_after": "{:.1f}".format,
+                "gain": money,
+            }
+        )
+        layout.addWidget(self.table)
+
+        self.apply_button = QPushButton(self.t.tr("markdown.apply"))
+        self.apply_button.clicked.connect(self.apply)
+        layout.addWidget(self.apply_button)
+        self.setLayout(layout)
+
+        self.refresh_table()
+
+    def refresh_table(self):
+        recommended = self.plan[self.plan["recommended"]]
+        self.summary_label.setText(self.t.tr("markdown.summary").format(
+            count=len(recommended), gain=recommended["gain"].sum(), currency=self.t.currency_symbol
+        ))
+        self.apply_button.setEnabled(not recommended.empty)
+        self.table.set_frame(self.plan if self.show_all_checkbox.isChecked() else recommended)
+
+    def apply(self):
+        count = int(self.plan["recommended"].sum())
+        reply = QMessageBox.question(self, self.t.tr("markdown.title"),
+                                     self.t.tr("markdown.confirm").format(count=count),
+                                     QMessageBox.Yes | QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+        try:
+            updated = apply_markdowns(self.plan)
+        except Exception as e:
+            QMessageBox.critical(self, self.t.tr("error.title"), self.t.tr("error.general").format(error=str(e)))
+            return
+        self.apply_button.setEnabled(False)
+        QMessageBox.information(self, self.t.tr("markdown.title"), self.t.tr("markdown.applied").format(count=updated))
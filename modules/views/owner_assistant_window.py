@@ -1,14 +1,19 @@
+from functools import partial
 from PyQt5.QtWidgets import (
-    QDialog, QVBoxLayout, QLabel, QScrollArea, QWidget, QHBoxLayout
+    QDialog, QVBoxLayout, QLabel, QScrollArea, QWidget, QHBoxLayout, QProgressBar, QComboBox
 )
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap
-import os
-import sqlite3
-from modules.config import DB_PATH
-from modules.logic.ml_assistant import InventoryForecastAssistant
+from modules.logic.ml_assistant import InventoryForecastAssistant, ENGINES
+from modules.widgets.background_task import run_in_background
+from modules.widgets.image_cache import get_image_paths, set_thumbnail
 from modules.lang.translator import Translator
 
+
+def _run_owner_analysis(engine="auto", progress=None):
+    assistant = InventoryForecastAssistant(engine=engine)
+    return assistant.run_analysis(progress=progress)
+
+
 class OwnerAssistantWindow(QDialog):
     def __init__(self):
         super().__init__()
@@ -17,65 +22,117 @@ class OwnerAssistantWindow(QDialog):
         self.setMinimumSize(800, 600)
 
         layout = QVBoxLayout()
+
+        engine_row = QHBoxLayout()
+        engine_row.addWidget(QLabel(self.t.tr("ai.engine_label")))
+        self.engine_combo = QComboBox()
+        for engine in ENGINES:
+            self.engine_combo.addItem(self.t.tr(f"ai.engine.{engine}"), engine)
+        engine_row.addWidget(self.engine_combo)
+        engine_row.addStretch()
+
         scroll = QScrollArea()
         content_widget = QWidget()
-        content_layout = QVBoxLayout()
-
-        assistant = InventoryForecastAssistant()
-        try:
-            results = assistant.run_analysis()
-            for row in results:
-                pname = row['product_name']
-                stock = row['stock']
-                forecast = row['forecast_avg']
-                days = row['days_to_depletion']
-                slow = row['is_slow']
-
-                icon = "🔻" if slow else "✅"
-                color = "red" if slow else "black"
-
-                hbox = QHBoxLayout()
-
-                # Görsel
-                image_label = QLabel()
-                image_label.setFixedSize(60, 60)
-                try:
-                    conn = sqlite3.connect(DB_PATH)
-                    c = conn.cursor()
-                    c.execute("SELECT image_path FROM products WHERE product_id = ?", (row['product_id'],))
-                    img_path = c.fetchone()
-                    conn.close()
-                    if img_path and img_path[0] and os.path.exists(img_path[0]):
-                        pixmap = QPixmap(img_path[0]).scaled(60, 60, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                        image_label.setPixmap(pixmap)
-                except:
-                    pass
-                hbox.addWidget(image_label)
-
-                text = self.t.tr("ai.owner_line").format(
-                    icon=icon,
-                    product=pname,
-                    stock=stock,
-                    forecast=forecast,
-                    days=days,
-                    color=color
-                )
-
-                label = QLabel(text)
-                label.setTextFormat(Qt.RichText)
-                label.setStyleSheet("font-size: 11pt; margin-left: 10px;")
-                label.setWordWrap(True)
-                hbox.addWidget(label)
-
-                container = QWidget()
-                container.setLayout(hbox)
-                content_layout.addWidget(container)
-        except Exception as e:
-            content_layout.addWidget(QLabel(self.t.tr("error.prefix") + str(e)))
-
-        content_widget.setLayout(content_layout)
+        self.content_layout = QVBoxLayout()
+
+        self.status_label = QLabel(self.t.tr("ai.owner_loading"))
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)
+
+        content_widget.setLayout(self.content_layout)
         scroll.setWidgetResizable(True)
         scroll.setWidget(content_widget)
 
+        layout.addLayout(engine_row)
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.progress_bar)
         layout.addWidget(scroll)
         self.setLayout(layout)
+
+        self.task = None
+        self.run_id = 0
+        self.engine_combo.currentIndexChanged.connect(self.start_analysis)
+        self.start_analysis()
+
+    def start_analysis(self):
+        # Prophet'e giden ürünler (seçilen ya da "auto" ile uzun ve yoğun
+        # seriler) süreç havuzunda kurulur ve uzun sürebilir; pencere hemen
+        # açılır, sonuçlar hazır olunca listelenir. Motor değişince önceki
+        # analiz iptal edilir, geç gelen sonuçları yok sayılır.
+        if self.task is not None:
+            self.task.cancel()
+        while self.content_layout.count():
+            self.content_layout.takeAt(0).widget().deleteLater()
+        self.status_label.setText(self.t.tr("ai.owner_loading"))
+        self.status_label.show()
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.show()
+
+        self.run_id += 1
+        self.task = run_in_background(
+            _run_owner_analysis, self.engine_combo.currentData(),
+            on_result=partial(self.show_results, self.run_id),
+            on_error=partial(self.show_error, self.run_id),
+            on_progress=partial(self.update_progress, self.run_id)
+        )
+
+    def update_progress(self, run, done, total, name):
+        if run != self.run_id:
+            return
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+        self.status_label.setText(self.t.tr("task.progress").format(done=done, total=total, name=name))
+
+    def show_error(self, run, error):
+        if run != self.run_id:
+            return
+        self.progress_bar.hide()
+        self.status_label.setText(self.t.tr("error.prefix") + error)
+
+    def show_results(self, run, results):
+        if run != self.run_id:
+            return
+        self.progress_bar.hide()
+        self.status_label.hide()
+        image_paths = get_image_paths(product_ids=[row['product_id'] for row in results])
+        for row in results:
+            pname = row['product_name']
+            stock = row['stock']
+            forecast = row['forecast_avg']
+            days = row['days_to_depletion']
+            slow = row['is_slow']
+
+            icon = "🔻" if slow else "✅"
+            color = "red" if slow else "black"
+
+            hbox = QHBoxLayout()
+
+            # Görsel
+            image_label = QLabel()
+            image_label.setFixedSize(60, 60)
+            set_thumbnail(image_label, image_paths.get(row['product_id']), 60)
+            hbox.addWidget(image_label)
+
+            text = self.t.tr("ai.owner_line").format(
+                icon=icon,
+                product=pname,
+                stock=stock,
+                forecast=forecast,
+                days=days,
+                color=color
+            )
+
+            label = QLabel(text)
+            label.setTextFormat(Qt.RichText)
+            label.setStyleSheet("font-size: 11pt; margin-left: 10px;")
+            label.setWordWrap(True)
+            hbox.addWidget(label)
+
+            container = QWidget()
+            container.setLayout(hbox)
+            self.content_layout.addWidget(container)
+
+    def done(self, result):
+        # Pencere kapanınca analiz boşuna sürmesin.
+        self.task.cancel()
+        super().done(result)
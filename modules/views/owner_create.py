@@ -6,7 +6,7 @@ from PyQt5.QtWidgets import (
     QFormLayout, QMessageBox
 )
 
-from modules.config import DB_PATH
+from modules.db.connection import transaction
 from modules.lang.translator import Translator
 
 def hash_password(password):
@@ -45,18 +45,15 @@ class OwnerCreateWindow(QDialog):
             return
 
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO users (username, password_hash, role, permissions)
-                VALUES (?, ?, 'owner', ?)
-            """, (
-                username,
-                hash_password(password),
-                json.dumps({})
-            ))
-            conn.commit()
-            conn.close()
+            with transaction() as conn:
+                conn.execute("""
+                    INSERT INTO users (username, password_hash, role, permissions)
+                    VALUES (?, ?, 'owner', ?)
+                """, (
+                    username,
+                    hash_password(password),
+                    json.dumps({})
+                ))
             QMessageBox.information(self, self.t.tr("success.title"), self.t.tr("owner_create.created").format(username=username))
             self.close()
         except sqlite3.IntegrityError:
@@ -1,20 +1,16 @@
-import sqlite3
 import pandas as pd
 import os
-import shutil
 from PyQt5.QtGui import QPixmap
 from PyQt5.QtWidgets import (
     QDialog, QFormLayout, QLineEdit, QComboBox, QPushButton, QLabel,
     QMessageBox, QDateEdit, QCompleter, QFileDialog
 )
-images_dir = os.path.abspath("images")
-os.makedirs(images_dir, exist_ok=True)
-from modules.config import DB_PATH
+from modules.db.connection import get_connection, transaction
+from modules.widgets.image_cache import store_image
 from PyQt5.QtWidgets import (
     QDialog, QFormLayout, QLineEdit, QComboBox, QPushButton, QLabel, QMessageBox, QDateEdit, QCompleter
 )
 from PyQt5.QtCore import QDate
-from modules.config import DB_PATH
 from modules.lang.translator import Translator
 
 class AddProductWindow(QDialog):
@@ -71,9 +67,7 @@ class AddProductWindow(QDialog):
         self.id_input.textChanged.connect(self.autofill_by_id)
 
         try:
-            conn = sqlite3.connect(DB_PATH)
-            df = pd.read_sql_query("SELECT * FROM products", conn)
-            conn.close()
+            df = pd.read_sql_query("SELECT * FROM products", get_connection())
             df_unique = df.drop_duplicates(subset="product_name", keep="first")
             self.product_lookup = df_unique.set_index("product_name").to_dict("index")
             self.product_lookup_by_id = df_unique.set_index("product_id").to_dict("index")
@@ -109,10 +103,7 @@ class AddProductWindow(QDialog):
     def choose_image(self):
         file_path, _ = QFileDialog.getOpenFileName(self, self.t.tr("product.select_image"), "", "Resim Dosyaları (*.png *.jpg *.jpeg *.bmp)")
         if file_path:
-            filename = os.path.basename(file_path)
-            target_path = os.path.join(images_dir, filename)
-            shutil.copy(file_path, target_path)
-            self.selected_image_path = target_path
+            self.selected_image_path = store_image(file_path)
             self.image_label.setText(os.path.basename(file_path))
 
     def handle_product(self):
@@ -132,53 +123,50 @@ class AddProductWindow(QDialog):
             discount_price = float(discount_raw) if discount_raw else None
             discount_until = self.discount_until_input.date().toString("yyyy-MM-dd") if discount_price is not None else None
 
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
+            cursor = get_connection().cursor()
             cursor.execute("SELECT * FROM products WHERE product_name = ? OR product_id = ?", (name, self.id_input.text()))
             existing = cursor.fetchone()
 
             if existing and mode == mode_tr:
                 product_id = existing[0]
-                cursor.execute("""
-                    INSERT INTO stock_transactions (product_id, date, quantity, note, expiry_date)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (product_id, today, stock_value, "Ek Stok Girişi", expiry_date))
+                with transaction() as conn:
+                    conn.execute("""
+                        INSERT INTO stock_transactions (product_id, date, quantity, note, expiry_date)
+                        VALUES (?, ?, ?, ?, ?)
+                    """, (product_id, today, stock_value, "Ek Stok Girişi", expiry_date))
                 QMessageBox.information(self, self.t.tr("success.title"), self.t.tr("product.stock_added").format(name=name))
 
             elif existing:
                 QMessageBox.warning(self, self.t.tr("error.title"), self.t.tr("product.already_exists"))
-                conn.close()
                 return
 
             elif not existing and mode == mode_tr:
                 QMessageBox.warning(self, self.t.tr("error.title"), self.t.tr("product.not_found"))
-                conn.close()
                 return
 
             else:
-                cursor.execute("""
-                    INSERT INTO products (
-                        product_id, product_name, brand, category,
-                        cost_price, selling_price, expiry_date,
-                        discount_price, discount_until, image_path
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    int(self.id_input.text()), name, self.brand_input.text(), self.category_input.text(),
-                    float(self.cost_input.text().replace(",", ".")),
-                    float(self.sell_input.text().replace(",", ".")),
-                    expiry_date, discount_price, discount_until,
-                    self.selected_image_path if self.selected_image_path else None
-                ))
-
-                cursor.execute("""
-                    INSERT INTO stock_transactions (product_id, date, quantity, note, expiry_date)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (int(self.id_input.text()), today, stock_value, "İlk Stok Girişi", expiry_date))
+                with transaction() as conn:
+                    conn.execute("""
+                        INSERT INTO products (
+                            product_id, product_name, brand, category,
+                            cost_price, selling_price, expiry_date,
+                            discount_price, discount_until, image_path
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (
+                        int(self.id_input.text()), name, self.brand_input.text(), self.category_input.text(),
+                        float(self.cost_input.text().replace(",", ".")),
+                        float(self.sell_input.text().replace(",", ".")),
+                        expiry_date, discount_price, discount_until,
+                        self.selected_image_path if self.selected_image_path else None
+                    ))
+
+                    conn.execute("""
+                        INSERT INTO stock_transactions (product_id, date, quantity, note, expiry_date)
+                        VALUES (?, ?, ?, ?, ?)
+                    """, (int(self.id_input.text()), today, stock_value, "İlk Stok Girişi", expiry_date))
 
                 QMessageBox.information(self, self.t.tr("success.title"), self.t.tr("product.saved").format(name=name))
 
-            conn.commit()
-            conn.close()
             self.close()
         except Exception as e:
             QMessageBox.critical(self, self.t.tr("error.title"), self.t.tr("product.failed").format(error=str(e)))
@@ -226,9 +214,7 @@ class ManageProductWindow(QDialog):
         self.setLayout(self.layout)
 
         try:
-            conn = sqlite3.connect(DB_PATH)
-            df = pd.read_sql_query("SELECT * FROM products", conn)
-            conn.close()
+            df = pd.read_sql_query("SELECT * FROM products", get_connection())
 
             self.products = df.set_index("product_name").to_dict("index")
             self.product_dropdown.addItems(self.products.keys())
@@ -270,11 +256,8 @@ class ManageProductWindow(QDialog):
     def select_new_image(self):
         file_path, _ = QFileDialog.getOpenFileName(self, self.t.tr("product.select_image"), "", "Resim Dosyaları (*.png *.jpg *.jpeg *.bmp)")
         if file_path:
-            filename = os.path.basename(file_path)
-            target_path = os.path.join(images_dir, filename)
-            shutil.copy(file_path, target_path)
-            self.image_path = target_path
-            pixmap = QPixmap(target_path)
+            self.image_path = store_image(file_path)
+            pixmap = QPixmap(self.image_path)
             self.image_label.setPixmap(pixmap.scaled(self.image_label.size()))
 
     def update_product(self):
@@ -285,25 +268,22 @@ class ManageProductWindow(QDialog):
             discount_price = float(discount_raw) if discount_raw else None
             discount_until = self.discount_until_input.date().toString("yyyy-MM-dd") if discount_price is not None else None
 
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE products SET 
-                    brand = ?, category = ?, cost_price = ?, selling_price = ?,
-                    discount_price = ?, discount_until = ?, image_path = ?
-                WHERE product_name = ?
-            """, (
-                self.brand_input.text(),
-                self.category_input.text(),
-                float(self.cost_input.text().replace(",", ".")),
-                float(self.sell_input.text().replace(",", ".")),
-                discount_price, discount_until,
-                self.image_path,
-                name
-            ))
-
-            conn.commit()
-            conn.close()
+            with transaction() as conn:
+                conn.execute("""
+                    UPDATE products SET 
+                        brand = ?, category = ?, cost_price = ?, selling_price = ?,
+                        discount_price = ?, discount_until = ?, image_path = ?
+                    WHERE product_name = ?
+                """, (
+                    self.brand_input.text(),
+                    self.category_input.text(),
+                    float(self.cost_input.text().replace(",", ".")),
+                    float(self.sell_input.text().replace(",", ".")),
+                    discount_price, discount_until,
+                    self.image_path,
+                    name
+                ))
+
             QMessageBox.information(self, self.t.tr("success.title"), self.t.tr("product.updated"))
             self.close()
         except Exception as e:
@@ -320,13 +300,12 @@ class ManageProductWindow(QDialog):
         if confirm == QMessageBox.Yes:
             try:
                 pid = self.products[name]["product_id"]
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM stock_transactions WHERE product_id = ?", (pid,))
-                cursor.execute("DELETE FROM sales WHERE product_id = ?", (pid,))
-                cursor.execute("DELETE FROM products WHERE product_id = ?", (pid,))
-                conn.commit()
-                conn.close()
+                with transaction() as conn:
+                    conn.execute("DELETE FROM stock_transactions WHERE product_id = ?", (pid,))
+                    conn.execute("DELETE FROM sales WHERE product_id = ?", (pid,))
+                    conn.execute("DELETE FROM stock_levels WHERE product_id = ?", (pid,))
+                    conn.execute("DELETE FROM price_periods WHERE product_id = ?", (pid,))
+                    conn.execute("DELETE FROM products WHERE product_id = ?", (pid,))
                 QMessageBox.information(self, self.t.tr("success.title"), self.t.tr("product.deleted").format(name=name))
                 self.close()
             except Exception as e:
@@ -0,0 +1,60 @@
+import numpy as np
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QCheckBox
+from modules.widgets.data_table import DataTableView
+from modules.lang.translator import Translator
+
+
+class ReorderAdviceWindow(QDialog):
+    # plan: ReorderAdvisor.compute_plan() çıktısı (tüm ürünler).
+    def __init__(self, plan, advisor=None, min_days=7):
+        super().__init__()
+        self.t = Translator()
+        self.plan = plan
+        self.setWindowTitle(self.t.tr("reorder.title"))
+        self.setMinimumSize(1000, 600)
+
+        layout = QVBoxLayout()
+
+        self.summary_label = QLabel()
+        self.summary_label.setStyleSheet("font-weight: bold; font-size: 12pt; margin: 8px 0;")
+        layout.addWidget(self.summary_label)
+
+        if advisor is not None:
+            layout.addWidget(QLabel(self.t.tr("reorder.params").format(
+                service=round(advisor.service_level * 100), lead=advisor.lead_time_days, days=min_days
+            )))
+
+        filter_layout = QHBoxLayout()
+        self.show_all_checkbox = QCheckBox(self.t.tr("reorder.show_all"))
+        self.show_all_checkbox.toggled.connect(self.refresh_table)
+        filter_layout.addWidget(self.show_all_checkbox)
+        filter_layout.addStretch()
+        layout.addLayout(filter_layout)
+
+        self.table = DataTableView(
+            ["product_name", "stock_left", "daily_avg", "daily_std", "days_left", "safety_stock",
+             "reorder_point", "eoq", "suggested_order", "storage_name", "used_capacity", "capacity_limited"],
+            [self.t.tr("product.name"), self.t.tr("column.stock"), self.t.tr("column.daily_avg"),
+             self.t.tr("column.daily_std"), self.t.tr("column.days_left"), self.t.tr("column.safety_stock"),
+             self.t.tr("column.reorder_point"), self.t.tr("column.eoq"), self.t.tr("column.suggested_order"),
+             self.t.tr("column.storage"), self.t.tr("column.used_capacity"), self.t.tr("column.capacity_limited")],
+            formatters={
+                "daily_avg": "{:.2f}".format,
+                "daily_std": "{:.2f}".format,
+                "days_left": lambda d: "∞" if np.isinf(d) else f"{d:.1f}",
+                "used_capacity": "{:.1f}".format,
+                "capacity_limited": lambda limited: "⚠️" if limited else "",
+            }
+        )
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+
+        self.refresh_table()
+
+    def refresh_table(self):
+        needs_order = self.plan[self.plan["needs_order"]]
+        self.summary_label.setText(self.t.tr("reorder.summary").format(
+            count=len(needs_order), qty=int(needs_order["suggested_order"].sum())
+        ))
+        df = self.plan if self.show_all_checkbox.isChecked() else needs_order
+        self.table.set_frame(df.sort_values("days_left"))
@@ -1,15 +1,17 @@
 from modules.logic.finance import get_profit_report
 from modules.widgets.plotly_to_gui import PlotlyViewer
-from modules.config import DB_PATH
+from modules.db.connection import get_connection
+from modules.db.query_builder import SelectQuery
+from modules.widgets.data_table import DataTableView
 from modules.lang.translator import Translator
 
 import os
-import sqlite3
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from PyQt5.QtWidgets import (
     QDialog, QLabel, QPushButton, QVBoxLayout, QFileDialog,
-    QMessageBox, QScrollArea, QWidget, QHBoxLayout,
+    QMessageBox, QHBoxLayout,
     QComboBox, QDateEdit
 )
 from PyQt5.QtCore import QDate
@@ -49,13 +51,13 @@ class ReportWindow(QDialog):
         filter_layout.addWidget(refresh_btn)
         layout.addLayout(filter_layout)
 
-        self.scroll = QScrollArea()
-        self.content = QWidget()
-        self.content_layout = QVBoxLayout()
-        self.content.setLayout(self.content_layout)
-        self.scroll.setWidgetResizable(True)
-        self.scroll.setWidget(self.content)
-        layout.addWidget(self.scroll)
+        self.table = DataTableView(
+            ["date", "product_name", "brand", "category", "quantity_sold"],
+            [self.t.tr("column.date"), self.t.tr("product.name"), self.t.tr("column.brand"),
+             self.t.tr("column.category"), self.t.tr("column.quantity")],
+            formatters={"date": lambda d: d.strftime("%d.%m.%Y")}
+        )
+        layout.addWidget(self.table)
 
         self.summary_label = QLabel()
         self.summary_label.setStyleSheet("font-weight: bold; font-size: 12pt; margin: 8px 0;")
@@ -75,9 +77,7 @@ class ReportWindow(QDialog):
 
     def load_filters(self):
         try:
-            conn = sqlite3.connect(DB_PATH)
-            df = pd.read_sql_query("SELECT DISTINCT brand, category FROM products", conn)
-            conn.close()
+            df = pd.read_sql_query("SELECT DISTINCT brand, category FROM products", get_connection())
             for brand in sorted(df["brand"].dropna().unique()):
                 self.brand_filter.addItem(brand)
             for cat in sorted(df["category"].dropna().unique()):
@@ -86,51 +86,37 @@ class ReportWindow(QDialog):
             pass
 
     def load_data(self):
-        for i in reversed(range(self.content_layout.count())):
-            widget_to_remove = self.content_layout.itemAt(i).widget()
-            if widget_to_remove:
-                widget_to_remove.setParent(None)
-
         try:
-            conn = sqlite3.connect(DB_PATH)
-            df = pd.read_sql_query("""
-                SELECT s.date, p.product_name, p.brand, p.category, s.quantity_sold
-                FROM sales s
-                JOIN products p ON s.product_id = p.product_id
-            """, conn)
-            conn.close()
-
-            df["date"] = pd.to_datetime(df["date"])
-            start = self.start_date.date().toPyDate()
-            end = self.end_date.date().toPyDate()
-            df = df[(df["date"] >= pd.Timestamp(start)) & (df["date"] <= pd.Timestamp(end))]
-
+            all_label = self.t.tr("filter.all")
             brand_val = self.brand_filter.currentText()
             cat_val = self.category_filter.currentText()
 
-            if brand_val != self.t.tr("filter.all"):
-                df = df[df["brand"] == brand_val]
-            if cat_val != self.t.tr("filter.all"):
-                df = df[df["category"] == cat_val]
+            df = (
+                SelectQuery("sales s")
+                .columns("s.date", "p.product_name", "p.brand", "p.category", "s.quantity_sold")
+                .join("products p", "s.product_id = p.product_id")
+                .where_between("s.date", self.start_date.date().toPyDate(), self.end_date.date().toPyDate())
+                .where_eq("p.brand", brand_val if brand_val != all_label else None)
+                .where_eq("p.category", cat_val if cat_val != all_label else None)
+                .order_by("s.date")
+                .read(parse_dates=["date"])
+            )
 
             if df.empty:
-                self.content_layout.addWidget(QLabel(self.t.tr("report.no_data")))
-                self.summary_label.setText("")
+                self.table.clear()
+                self.df_current = df
+                self.summary_label.setText(self.t.tr("report.no_data"))
                 return
 
             total_sold = df["quantity_sold"].sum()
             top_seller = df.groupby("product_name")["quantity_sold"].sum().idxmax()
             self.summary_label.setText(self.t.tr("report.top_seller").format(name=top_seller, qty=total_sold))
 
-            self.df_current = df.copy()
-
-            for _, row in df.iterrows():
-                label = QLabel(f"📅 {row['date'].strftime('%d.%m.%Y')} – {row['product_name']} → {row['quantity_sold']} {self.t.tr('unit.piece')}")
-                label.setStyleSheet("font-size: 11pt;")
-                self.content_layout.addWidget(label)
+            self.df_current = df
+            self.table.set_frame(df)
 
         except Exception as e:
-            self.content_layout.addWidget(QLabel(self.t.tr("error.general").format(error=str(e))))
+            self.summary_label.setText(self.t.tr("error.general").format(error=str(e)))
 
     def export_to_excel(self):
         if not hasattr(self, "df_current") or self.df_current.empty:
@@ -159,9 +145,7 @@ class ReportWindow(QDialog):
                 labels={"quantity_sold": self.t.tr("unit.piece"), "product_name": self.t.tr("product.name")}
             )
             fig.update_layout(xaxis_tickangle=-45)
-            html_path = "temp_sales_plot.html"
-            fig.write_html(html_path)
-            viewer = PlotlyViewer((html_path, self.t.tr("report.graph_title")))
+            viewer = PlotlyViewer((fig, self.t.tr("report.graph_title")))
             viewer.exec_()
         except Exception as e:
             QMessageBox.critical(self, self.t.tr("error.title"), self.t.tr("report.graph_failed").format(error=str(e)))
@@ -195,13 +179,16 @@ class ProfitReportWindow(QDialog):
         self.summary_label.setStyleSheet("font-weight: bold; font-size: 12pt; margin: 8px 0;")
         layout.addWidget(self.summary_label)
 
-        self.scroll = QScrollArea()
-        self.content = QWidget()
-        self.content_layout = QVBoxLayout()
-        self.content.setLayout(self.content_layout)
-        self.scroll.setWidgetResizable(True)
-        self.scroll.setWidget(self.content)
-        layout.addWidget(self.scroll)
+        self.table = DataTableView(
+            ["Product", "Quantity Sold", "Revenue", "Cost", "Profit", "Profit Margin (%)"],
+            [self.t.tr("product.name"), self.t.tr("column.quantity"), self.t.tr("column.revenue"),
+             self.t.tr("column.cost"), self.t.tr("column.profit"), self.t.tr("column.margin")],
+            formatters={
+                "Revenue": "{:.2f}".format, "Cost": "{:.2f}".format,
+                "Profit": "{:.2f}".format, "Profit Margin (%)": "{:.1f}".format
+            }
+        )
+        layout.addWidget(self.table)
 
         export_btn = QPushButton(self.t.tr("profit.export_excel"))
         export_btn.clicked.connect(self.export_csv)
@@ -215,57 +202,39 @@ class ProfitReportWindow(QDialog):
         self.load_data()
 
     def load_data(self):
-        for i in reversed(range(self.content_layout.count())):
-            widget_to_remove = self.content_layout.itemAt(i).widget()
-            if widget_to_remove:
-                widget_to_remove.setParent(None)
-
         try:
-            conn = sqlite3.connect(DB_PATH)
-            df_sales = pd.read_sql_query("SELECT * FROM sales", conn)
-            df_products = pd.read_sql_query("SELECT * FROM products", conn)
-            conn.close()
-
-            df_sales["date"] = pd.to_datetime(df_sales["date"])
-            start = self.start_date.date().toPyDate()
-            end = self.end_date.date().toPyDate()
-            df_sales = df_sales[(df_sales["date"] >= pd.Timestamp(start)) & (df_sales["date"] <= pd.Timestamp(end))]
-
-            df_merged = pd.merge(df_sales, df_products, on="product_id")
-            grouped = df_merged.groupby("product_name")
-
-            total_revenue = 0
-            total_cost = 0
-            self.report_data.clear()
-
-            for name, group in grouped:
-                total_qty = group["quantity_sold"].sum()
-                revenue = (group["quantity_sold"] * group["selling_price"]).sum()
-                cost = (group["quantity_sold"] * group["cost_price"]).sum()
-                profit = revenue - cost
-                profit_margin = (profit / revenue * 100) if revenue != 0 else 0
-
-                total_revenue += revenue
-                total_cost += cost
-
-                msg = self.t.tr("profit.line").format(
-                    name=name, qty=total_qty, revenue=revenue, cost=cost, profit=profit, margin=profit_margin
+            # Ciro ve maliyet sales_daily'de satış günündeki fiyatlarla
+            # (price_periods) tutulur; ham satışlar yeniden taranmaz.
+            df = (
+                SelectQuery("sales_daily d")
+                .columns(
+                    "p.product_name",
+                    "SUM(d.quantity) AS quantity_sold",
+                    "SUM(d.revenue) AS revenue",
+                    "SUM(d.cost) AS cost"
                 )
-                label = QLabel(msg)
-                label.setStyleSheet("font-size: 11pt;")
-                self.content_layout.addWidget(label)
-
-                self.report_data.append({
-                    "Product": name,
-                    "Quantity Sold": total_qty,
-                    "Revenue": revenue,
-                    "Cost": cost,
-                    "Profit": profit,
-                    "Profit Margin (%)": profit_margin
-                })
+                .join("products p", "d.product_id = p.product_id")
+                .where_between("d.day", self.start_date.date().toPyDate(), self.end_date.date().toPyDate())
+                .group_by("p.product_name")
+                .order_by("p.product_name")
+                .read()
+            )
+
+            df_rep = pd.DataFrame({
+                "Product": df["product_name"],
+                "Quantity Sold": df["quantity_sold"],
+                "Revenue": df["revenue"].fillna(0),
+                "Cost": df["cost"].fillna(0),
+            })
+            df_rep["Profit"] = df_rep["Revenue"] - df_rep["Cost"]
+            df_rep["Profit Margin (%)"] = (df_rep["Profit"] / df_rep["Revenue"].where(df_rep["Revenue"] != 0) * 100).fillna(0)
+
+            total_revenue = df_rep["Revenue"].sum()
+            total_cost = df_rep["Cost"].sum()
+            self.report_data = df_rep.to_dict("records")
+            self.table.set_frame(df_rep)
 
             if self.report_data:
-                df_rep = pd.DataFrame(self.report_data)
                 best_profit = df_rep.sort_values("Profit", ascending=False).iloc[0]
                 worst_profit = df_rep.sort_values("Profit").iloc[0]
 
@@ -281,7 +250,7 @@ class ProfitReportWindow(QDialog):
                 self.summary_label.setText(self.t.tr("profit.no_data"))
 
         except Exception as e:
-            self.content_layout.addWidget(QLabel(self.t.tr("error.general").format(error=str(e))))
+            self.summary_label.setText(self.t.tr("error.general").format(error=str(e)))
 
     def export_csv(self):
         if not self.report_data:
@@ -307,9 +276,7 @@ class ProfitReportWindow(QDialog):
             df = pd.DataFrame(self.report_data)
             fig = px.bar(df, x="Product", y="Profit", title=self.t.tr("profit.graph_title"), labels={"Profit": self.t.tr("unit.profit")})
             fig.update_layout(xaxis_tickangle=-45)
-            html_path = "temp_profit_plot.html"
-            fig.write_html(html_path)
-            viewer = PlotlyViewer((html_path, self.t.tr("profit.graph_title")))
+            viewer = PlotlyViewer((fig, self.t.tr("profit.graph_title")))
             viewer.exec_()
         except Exception as e:
             QMessageBox.critical(self, self.t.tr("error.title"), self.t.tr("profit.graph_failed").format(error=str(e)))
@@ -343,13 +310,17 @@ class ExpiryReportWindow(QDialog):
         self.summary_label.setStyleSheet("font-weight: bold; font-size: 12pt; margin: 8px 0;")
         layout.addWidget(self.summary_label)
 
-        self.scroll = QScrollArea()
-        self.content = QWidget()
-        self.content_layout = QVBoxLayout()
-        self.content.setLayout(self.content_layout)
-        self.scroll.setWidgetResizable(True)
-        self.scroll.setWidget(self.content)
-        layout.addWidget(self.scroll)
+        self.table = DataTableView(
+            ["Status", "Product", "Brand", "Category", "Purchase Date", "Quantity", "Expiry Date", "Days Left"],
+            [self.t.tr("column.status"), self.t.tr("product.name"), self.t.tr("column.brand"),
+             self.t.tr("column.category"), self.t.tr("column.received"), self.t.tr("column.quantity"),
+             self.t.tr("column.expiry"), self.t.tr("column.days_left")],
+            formatters={
+                "Purchase Date": lambda d: d.strftime("%d.%m.%Y") if pd.notna(d) else self.t.tr("expiry.unknown"),
+                "Expiry Date": lambda d: d.strftime("%d.%m.%Y")
+            }
+        )
+        layout.addWidget(self.table)
 
         export_btn = QPushButton(self.t.tr("expiry.export_excel"))
         export_btn.clicked.connect(self.export_to_csv)
@@ -363,21 +334,14 @@ class ExpiryReportWindow(QDialog):
         self.load_data()
 
     def load_data(self):
-        for i in reversed(range(self.content_layout.count())):
-            widget_to_remove = self.content_layout.itemAt(i).widget()
-            if widget_to_remove:
-                widget_to_remove.setParent(None)
-
         try:
-            conn = sqlite3.connect(DB_PATH)
             df = pd.read_sql_query("""
-                SELECT p.product_name, p.brand, p.category, st.date as stock_date,
-                       st.expiry_date, st.quantity
-                FROM stock_transactions st
-                JOIN products p ON st.product_id = p.product_id
-                WHERE st.expiry_date IS NOT NULL
-            """, conn)
-            conn.close()
+                SELECT p.product_name, p.brand, p.category, lot.received_date as stock_date,
+                       lot.expiry_date, lot.remaining as quantity
+                FROM stock_lots lot
+                JOIN products p ON lot.product_id = p.product_id
+                WHERE lot.remaining > 0 AND lot.expiry_date IS NOT NULL
+            """, get_connection())
 
             df["expiry_date"] = pd.to_datetime(df["expiry_date"], errors="coerce")
             df["stock_date"] = pd.to_datetime(df["stock_date"], errors="coerce")
@@ -387,59 +351,35 @@ class ExpiryReportWindow(QDialog):
             if self.only_critical_checkbox.currentText() == self.t.tr("expiry.critical_only"):
                 df = df[df["days_left"] <= 30]
 
-            total_critical = 0
-            total_quantity = 0
-
-            self.report_data.clear()
-
-            for _, row in df.iterrows():
-                name = row["product_name"]
-                brand = row["brand"]
-                category = row["category"]
-                expiry = row["expiry_date"].strftime("%d.%m.%Y")
-                stock_date = row["stock_date"].strftime("%d.%m.%Y") if pd.notna(row["stock_date"]) else self.t.tr("expiry.unknown")
-                quantity = int(row["quantity"])
-                days_left = int(row["days_left"])
-
-                if days_left <= 3:
-                    icon = "🔴"
-                elif days_left <= 10:
-                    icon = "🟡"
-                else:
-                    icon = "🟢"
-
-                msg = self.t.tr("expiry.line").format(
-                    icon=icon, name=name, brand=brand, cat=category,
-                    date=stock_date, qty=quantity, expiry=expiry, left=days_left
-                )
-
-                label = QLabel(msg)
-                label.setStyleSheet("font-size: 11pt;")
-                self.content_layout.addWidget(label)
-
-                self.report_data.append({
-                    "Product": name,
-                    "Brand": brand,
-                    "Category": category,
-                    "Purchase Date": stock_date,
-                    "Expiry Date": expiry,
-                    "Quantity": quantity,
-                    "Days Left": days_left
-                })
-
-                if days_left <= 10:
-                    total_critical += 1
-                    total_quantity += quantity
-
+            df = df.dropna(subset=["expiry_date"])
+            days_left = df["days_left"].astype(int)
+            df_rep = pd.DataFrame({
+                "Status": np.select([days_left <= 3, days_left <= 10], ["🔴", "🟡"], default="🟢"),
+                "Product": df["product_name"],
+                "Brand": df["brand"],
+                "Category": df["category"],
+                "Purchase Date": df["stock_date"],
+                "Quantity": df["quantity"].fillna(0).astype(int),
+                "Expiry Date": df["expiry_date"],
+                "Days Left": days_left
+            })
+            self.table.set_frame(df_rep)
+
+            export = df_rep.drop(columns=["Status"])
+            export["Purchase Date"] = export["Purchase Date"].dt.strftime("%d.%m.%Y").fillna(self.t.tr("expiry.unknown"))
+            export["Expiry Date"] = export["Expiry Date"].dt.strftime("%d.%m.%Y")
+            self.report_data = export.to_dict("records")
+
+            critical = df_rep[df_rep["Days Left"] <= 10]
             if self.report_data:
                 self.summary_label.setText(self.t.tr("expiry.summary").format(
-                    count=total_critical, qty=total_quantity
+                    count=len(critical), qty=int(critical["Quantity"].sum())
                 ))
             else:
                 self.summary_label.setText(self.t.tr("expiry.no_data"))
 
         except Exception as e:
-            self.content_layout.addWidget(QLabel(self.t.tr("error.general").format(error=str(e))))
+            self.summary_label.setText(self.t.tr("error.general").format(error=str(e)))
 
     def export_to_csv(self):
         if not self.report_data:
@@ -472,9 +412,7 @@ class ExpiryReportWindow(QDialog):
                 labels={"Days Left": self.t.tr("expiry.days_left"), "Quantity": self.t.tr("unit.piece")}
             )
             fig.update_layout(xaxis_title=self.t.tr("expiry.days_left"), yaxis_title=self.t.tr("unit.piece"), xaxis_tickmode="linear")
-            html_path = "temp_expiry_plot.html"
-            fig.write_html(html_path)
-            viewer = PlotlyViewer((html_path, self.t.tr("expiry.graph_title")))
+            viewer = PlotlyViewer((fig, self.t.tr("expiry.graph_title")))
             viewer.exec_()
         except Exception as e:
             QMessageBox.critical(self, self.t.tr("error.title"), self.t.tr("expiry.graph_failed").format(error=str(e)))
@@ -484,30 +422,18 @@ def check_stock_levels():
     t = Translator()
 
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
 
-        df_products = pd.read_sql_query("SELECT * FROM products", conn)
-        df_sales = pd.read_sql_query("SELECT product_id, quantity_sold FROM sales", conn)
-        df_stock = pd.read_sql_query("SELECT product_id, quantity FROM stock_transactions", conn)
+        df = pd.read_sql_query("""
+            SELECT p.product_name, MAX(COALESCE(sl.stock_in - sl.sold, 0), 0) AS current_stock
+            FROM products p
+            LEFT JOIN stock_levels sl ON sl.product_id = p.product_id
+        """, conn)
 
-        conn.close()
-
-        if df_products.empty:
+        if df.empty:
             QMessageBox.information(None, t.tr("info.title"), t.tr("stock.no_products"))
             return
 
-        df_sales_sum = df_sales.groupby("product_id")["quantity_sold"].sum().reset_index() if not df_sales.empty else pd.DataFrame(columns=["product_id", "quantity_sold"])
-        df_stock_sum = df_stock.groupby("product_id")["quantity"].sum().reset_index() if not df_stock.empty else pd.DataFrame(columns=["product_id", "quantity"])
-
-        df_stock_sum.columns = ["product_id", "total_stock"]
-        df_sales_sum.columns = ["product_id", "total_sold"]
-
-        df = pd.merge(df_products, df_sales_sum, on="product_id", how="left")
-        df = pd.merge(df, df_stock_sum, on="product_id", how="left")
-        df = df.fillna(0)
-
-        df["current_stock"] = (df["total_stock"] - df["total_sold"]).clip(lower=0)
-
         threshold = 3
         low_stock_items = df[df["current_stock"] < threshold]
 
@@ -528,7 +454,7 @@ def backup_all_data():
     t = Translator()
 
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
         folder = QFileDialog.getExistingDirectory(None, t.tr("backup.select_folder"))
@@ -1,12 +1,13 @@
-from modules.config import DB_PATH
+from modules.db.connection import get_connection, transaction
+from modules.logic.pricing import PriceBook
 from modules.lang.translator import Translator
-import sqlite3
+from modules.widgets.image_cache import set_thumbnail, clear_thumbnail
+import math
 import os
 from PyQt5.QtWidgets import (
     QDialog, QFormLayout, QLineEdit, QComboBox, QPushButton, QLabel,
     QDateEdit, QMessageBox, QTableWidget, QTableWidgetItem, QVBoxLayout, QCompleter, QFileDialog
 )
-from PyQt5.QtGui import QPixmap
 from PyQt5.QtCore import QDate
 
 t = Translator()
@@ -38,16 +39,12 @@ class AddSaleWindow(QDialog):
         self.date_input.setCalendarPopup(True)
         self.product_input.textChanged.connect(self.autofill_by_id)
 
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT product_id, product_name, selling_price, discount_price, discount_until, image_path FROM products")
+        cursor = get_connection().cursor()
+        cursor.execute("SELECT product_id, product_name, image_path FROM products")
         self.products = cursor.fetchall()
-        conn.close()
+        self.price_book = PriceBook()
 
-        self.product_map = {
-            name: (pid, price, discount_price, discount_until, img)
-            for pid, name, price, discount_price, discount_until, img in self.products
-        }
+        self.product_map = {name: (pid, img) for pid, name, img in self.products}
         self.id_to_name = {pid: name for pid, name, *_ in self.products}
         completer = QCompleter(list(self.product_map.keys()))
         completer.setCaseSensitivity(False)
@@ -105,13 +102,11 @@ class AddSaleWindow(QDialog):
                     self.product_input.setText(self.id_to_name[pid])
             else:
                 if text in self.product_map:
-                    _, _, _, _, img_path = self.product_map[text]
+                    _, img_path = self.product_map[text]
                     if img_path and os.path.exists(img_path):
-                        pixmap = QPixmap(img_path)
-                        self.image_preview.setPixmap(pixmap.scaled(self.image_preview.size()))
+                        set_thumbnail(self.image_preview, img_path, self.image_preview.width(), self.image_preview.height())
                     else:
-                        self.image_preview.setText(t.tr("common.no_image"))
-                        self.image_preview.setPixmap(QPixmap())
+                        clear_thumbnail(self.image_preview, t.tr("common.no_image"))
         except:
             pass
 
@@ -124,18 +119,12 @@ class AddSaleWindow(QDialog):
             return
 
         quantity = int(quantity_text)
-        pid, regular_price, discount_price, discount_until, img_path = self.product_map[product_name]
-
-        use_discount = False
-        if discount_price and discount_until:
-            try:
-                until_date = QDate.fromString(discount_until, "yyyy-MM-dd")
-                if QDate.currentDate() <= until_date:
-                    use_discount = True
-            except:
-                pass
-
-        price_used = discount_price if use_discount else regular_price
+        pid, img_path = self.product_map[product_name]
+        # Satış tarihindeki etkin fiyat (kampanya varsa kampanya fiyatı).
+        price_used = self.price_book.price_for(pid, self.date_input.date().toString("yyyy-MM-dd"))
+        if math.isnan(price_used):
+            QMessageBox.warning(self, t.tr("error.title"), t.tr("sale.invalid_entry"))
+            return
         total = float(price_used) * quantity
 
         for row in range(self.table.rowCount()):
@@ -162,9 +151,7 @@ class AddSaleWindow(QDialog):
         self.table.setItem(row_pos, 1, QTableWidgetItem(str(quantity)))
         self.table.setItem(row_pos, 2, QTableWidgetItem(f"{total:.2f}₺"))
         image_item = QLabel()
-        if img_path and os.path.exists(img_path):
-            pixmap = QPixmap(img_path).scaled(60, 60)
-            image_item.setPixmap(pixmap)
+        set_thumbnail(image_item, img_path, 60)
         self.table.setCellWidget(row_pos, 3, image_item)
         self.table.setRowHeight(row_pos, 65)
 
@@ -200,30 +187,20 @@ class AddSaleWindow(QDialog):
         discount = float(discount_text) if discount_text and discount_text.replace(".", "").isdigit() else 0.0
 
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-
-            cursor.execute("SELECT product_id FROM products")
-            all_products = [row[0] for row in cursor.fetchall()]
-            sold_products = {pid: qty for pid, qty, _ in self.sale_list}
+            sale_rows = [(date, pid, qty, self.user_id) for pid, qty, _ in self.sale_list if qty > 0]
+            total_amount = sum(qty * price_used for _, qty, price_used in self.sale_list)
 
-            total_amount = 0.0
-            for pid in all_products:
-                qty = sold_products.get(pid, 0)
-                price_used = next((p for p_pid, _, p in self.sale_list if p_pid == pid), 0)
-                cursor.execute("""
+            with transaction() as conn:
+                cursor = conn.cursor()
+                cursor.executemany("""
                     INSERT INTO sales (date, product_id, quantity_sold, user_id)
                     VALUES (?, ?, ?, ?)
-                """, (date, pid, qty, self.user_id))
-                total_amount += qty * price_used
-
-            cursor.execute("""
-                INSERT INTO sales_summary (date, user_id, total_sales)
-                VALUES (?, ?, ?)
-            """, (date, self.user_id, total_amount - discount))
+                """, sale_rows)
 
-            conn.commit()
-            conn.close()
+                cursor.execute("""
+                    INSERT INTO sales_summary (date, user_id, total_sales)
+                    VALUES (?, ?, ?)
+                """, (date, self.user_id, total_amount - discount))
 
             QMessageBox.information(self, t.tr("sale.success"),
                 f"{t.tr('sale.total').format(amount=self.total_price, currency=t.currency_symbol)}\n"
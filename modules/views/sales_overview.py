@@ -1,13 +1,11 @@
-import sqlite3
-import os
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem,
     QHeaderView, QComboBox, QDateEdit, QPushButton, QHBoxLayout, QWidget
 )
-from PyQt5.QtGui import QPixmap
 from PyQt5.QtCore import Qt, QDate
-from modules.config import DB_PATH
+from modules.db.connection import get_connection
 from modules.lang.translator import Translator
+from modules.widgets.image_cache import set_thumbnail
 
 t = Translator()
 
@@ -69,13 +67,11 @@ class SalesOverviewWindow(QDialog):
 
     def populate_product_filter(self):
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
+            cursor = get_connection().cursor()
             cursor.execute("SELECT DISTINCT product_id FROM sales")
             product_ids = cursor.fetchall()
             for pid_tuple in product_ids:
                 self.product_filter.addItem(str(pid_tuple[0]))
-            conn.close()
         except:
             pass
 
@@ -90,15 +86,14 @@ class SalesOverviewWindow(QDialog):
         selected_product = self.product_filter.currentText()
 
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
+            cursor = get_connection().cursor()
 
             base_query = """
                 SELECT u.nickname, s.product_id, s.quantity_sold, s.date, p.image_path
                 FROM sales s
                 JOIN users u ON s.user_id = u.id
                 JOIN products p ON s.product_id = p.product_id
-                WHERE s.date = ? AND s.quantity_sold > 0
+                WHERE s.date = ?
             """
             params = [date_str]
 
@@ -127,16 +122,13 @@ class SalesOverviewWindow(QDialog):
                 self.table.setItem(row_idx, 3, QTableWidgetItem(date))
 
                 image_label = QLabel()
-                if img_path and os.path.exists(img_path):
-                    pixmap = QPixmap(img_path).scaled(60, 60, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                    image_label.setPixmap(pixmap)
+                set_thumbnail(image_label, img_path, 60)
                 self.table.setCellWidget(row_idx, 4, image_label)
                 self.table.setRowHeight(row_idx, 65)
 
                 total_sales += int(qty)
 
             self.total_label.setText(t.tr("sales_overview.total_sales").format(count=total_sales))
-            conn.close()
 
         except Exception as e:
             self.table.setRowCount(1)
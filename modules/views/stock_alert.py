@@ -1,14 +1,12 @@
-import os
-import sqlite3
 import pandas as pd
 from PyQt5.QtWidgets import (
     QDialog, QLabel, QPushButton, QVBoxLayout, QFileDialog,
     QMessageBox, QScrollArea, QWidget, QHBoxLayout
 )
-from PyQt5.QtGui import QPixmap
 from PyQt5.QtCore import Qt
-from modules.config import DB_PATH
+from modules.db.connection import get_connection
 from modules.lang.translator import translator
+from modules.widgets.image_cache import set_thumbnail
 pd.set_option('future.no_silent_downcasting', True)
 
 class StockAlertWindow(QDialog):
@@ -24,32 +22,22 @@ class StockAlertWindow(QDialog):
         content_layout = QVBoxLayout()
 
         try:
-            conn = sqlite3.connect(DB_PATH)
-            df_products = pd.read_sql_query("SELECT * FROM products", conn)
-            df_sales = pd.read_sql_query("SELECT product_id, quantity_sold, date FROM sales", conn)
-            df_stock = pd.read_sql_query("SELECT product_id, quantity, expiry_date FROM stock_transactions", conn)
-            conn.close()
-
-            df_sales["date"] = pd.to_datetime(df_sales["date"], errors="coerce")
-            df_stock["expiry_date"] = pd.to_datetime(df_stock["expiry_date"], errors="coerce")
-
-            today = pd.Timestamp.today()
-            recent_sales = df_sales[df_sales["date"] >= (today - pd.Timedelta(days=30))]
-            days_span = 30 if not recent_sales.empty else 1
-
-            df_sales_sum = recent_sales.groupby("product_id")["quantity_sold"].sum().reset_index()
-            df_stock_sum = df_stock.groupby("product_id")["quantity"].sum().reset_index()
-
-            df_expiry = df_stock.dropna(subset=["expiry_date"]).copy()
-            df_expiry = df_expiry.groupby("product_id")["expiry_date"].min().reset_index()
-            df_expiry.columns = ["product_id", "earliest_expiry"]
-
-            df = df_products.copy()
-            df = pd.merge(df, df_sales_sum, on="product_id", how="left").fillna(0).infer_objects(copy=False)
-            df = pd.merge(df, df_stock_sum, on="product_id", how="left").fillna(0).infer_objects(copy=False)
-            df = pd.merge(df, df_expiry, on="product_id", how="left")
-
-            df["current_stock"] = (df["quantity"] - df["quantity_sold"]).clip(lower=0)
+            conn = get_connection()
+            since = (pd.Timestamp.today() - pd.Timedelta(days=30)).strftime("%Y-%m-%d")
+            df = pd.read_sql_query("""
+                SELECT p.product_name, p.image_path,
+                       COALESCE(sl.stock_in, 0) AS quantity,
+                       MAX(COALESCE(sl.stock_in - sl.sold, 0), 0) AS current_stock,
+                       COALESCE((SELECT SUM(s.quantity_sold) FROM sales s
+                                 WHERE s.product_id = p.product_id AND s.date >= ?), 0) AS quantity_sold,
+                       (SELECT MIN(lot.expiry_date) FROM stock_lots lot
+                        WHERE lot.product_id = p.product_id AND lot.remaining > 0
+                          AND lot.expiry_date IS NOT NULL) AS earliest_expiry
+                FROM products p
+                LEFT JOIN stock_levels sl ON sl.product_id = p.product_id
+            """, conn, params=(since,))
+
+            days_span = 30 if df["quantity_sold"].sum() > 0 else 1
             df["daily_avg"] = df["quantity_sold"] / days_span
             df["days_left"] = df.apply(
                 lambda row: row["current_stock"] / row["daily_avg"] if row["daily_avg"] > 0 else float("inf"),
@@ -76,9 +64,7 @@ class StockAlertWindow(QDialog):
                 hbox = QHBoxLayout()
                 image = QLabel()
                 image.setFixedSize(50, 50)
-                if img_path and os.path.exists(img_path):
-                    pixmap = QPixmap(img_path).scaled(50, 50, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                    image.setPixmap(pixmap)
+                set_thumbnail(image, img_path, 50)
                 hbox.addWidget(image)
 
                 text = QLabel(
@@ -2,8 +2,7 @@ from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QFormLayout, QLabel, QComboBox,
     QLineEdit, QPushButton, QMessageBox
 )
-import sqlite3
-from modules.config import DB_PATH
+from modules.db.connection import get_connection, transaction
 from modules.lang.translator import translator as _
 
 class ProductStorageSettingsWindow(QDialog):
@@ -38,11 +37,9 @@ class ProductStorageSettingsWindow(QDialog):
 
     def load_products(self):
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
+            cursor = get_connection().cursor()
             cursor.execute("SELECT product_id, product_name FROM products")
             products = cursor.fetchall()
-            conn.close()
             self.product_dropdown.clear()
             for pid, name in products:
                 self.product_dropdown.addItem(f"{name} ({pid})", pid)
@@ -52,11 +49,9 @@ class ProductStorageSettingsWindow(QDialog):
     def load_locations(self, location_type_text):
         try:
             location_type = "shelf" if location_type_text == _("storage_settings.shelf") else "fridge"
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
+            cursor = get_connection().cursor()
             cursor.execute("SELECT id, name FROM storage_units WHERE type = ?", (location_type,))
             locations = cursor.fetchall()
-            conn.close()
             self.location_id.clear()
             for lid, name in locations:
                 self.location_id.addItem(f"{name} ({lid})", lid)
@@ -71,14 +66,11 @@ class ProductStorageSettingsWindow(QDialog):
             location_id = self.location_id.currentData()
             unit_volume = float(self.unit_volume_input.text())
 
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO product_storage_settings (product_id, location_type, location_id, unit_volume)
-                VALUES (?, ?, ?, ?)
-            """, (product_id, location_type, location_id, unit_volume))
-            conn.commit()
-            conn.close()
+            with transaction() as conn:
+                conn.execute("""
+                    INSERT INTO product_storage_settings (product_id, location_type, location_id, unit_volume)
+                    VALUES (?, ?, ?, ?)
+                """, (product_id, location_type, location_id, unit_volume))
 
             QMessageBox.information(self, _("success.title"), _("storage_settings.success"))
             self.close()
@@ -2,8 +2,7 @@ from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QLabel, QPushButton, QTabWidget,
     QWidget, QFormLayout, QLineEdit, QComboBox, QHBoxLayout, QMessageBox, QListWidget, QTableWidgetItem
 )
-import sqlite3
-from modules.config import DB_PATH
+from modules.db.connection import get_connection, transaction
 from modules.lang.translator import translator as _
 
 class StorageUnitManageWindow(QDialog):
@@ -105,28 +104,7 @@ class StorageUnitManageWindow(QDialog):
         self.shelf_tab.setLayout(layout)
 
     def load_units(self):
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS fridges (
-                id INTEGER PRIMARY KEY,
-                name TEXT,
-                type TEXT,
-                max_capacity INTEGER,
-                location TEXT
-            )
-        """)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS shelves (
-                id INTEGER PRIMARY KEY,
-                name TEXT,
-                type TEXT,
-                max_capacity INTEGER,
-                location TEXT
-            )
-        """)
-        conn.commit()
-
+        cursor = get_connection().cursor()
         self.fridge_list.clear()
         cursor.execute("SELECT id, name, type, max_capacity, location FROM fridges")
         for row in cursor.fetchall():
@@ -137,16 +115,12 @@ class StorageUnitManageWindow(QDialog):
         for row in cursor.fetchall():
             self.shelf_list.addItem(f"[# {row[0]}] {row[1]} ({row[2]} - {row[3]} ürün) [{row[4]}]")
 
-        conn.close()
-
     def fill_fridge_form(self, item):
         try:
             id_ = int(item.text().split("[# ")[1].split("]")[0])
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
+            cursor = get_connection().cursor()
             cursor.execute("SELECT name, type, max_capacity, location FROM fridges WHERE id = ?", (id_,))
             result = cursor.fetchone()
-            conn.close()
             if result:
                 self.fridge_name.setText(result[0])
                 self.fridge_type.setCurrentText(result[1])
@@ -166,13 +140,10 @@ class StorageUnitManageWindow(QDialog):
                 cap = int(self.fridge_capacity.text())
                 loc = self.fridge_location.text()
 
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute("""
-                    UPDATE fridges SET name=?, type=?, max_capacity=?, location=? WHERE id=?
-                """, (name, t, cap, loc, id_))
-                conn.commit()
-                conn.close()
+                with transaction() as conn:
+                    conn.execute("""
+                        UPDATE fridges SET name=?, type=?, max_capacity=?, location=? WHERE id=?
+                    """, (name, t, cap, loc, id_))
                 self.load_units()
             except Exception as e:
                 QMessageBox.warning(self, _("error.title"), _("error.general").format(error=str(e)))
@@ -184,11 +155,8 @@ class StorageUnitManageWindow(QDialog):
             cap = int(self.fridge_capacity.text())
             loc = self.fridge_location.text()
 
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("INSERT INTO fridges (name, type, max_capacity, location) VALUES (?, ?, ?, ?)", (name, t, cap, loc))
-            conn.commit()
-            conn.close()
+            with transaction() as conn:
+                conn.execute("INSERT INTO fridges (name, type, max_capacity, location) VALUES (?, ?, ?, ?)", (name, t, cap, loc))
             self.load_units()
         except:
             QMessageBox.warning(self, _("error.title"), _("storage_manage.invalid_input"))
@@ -196,23 +164,19 @@ class StorageUnitManageWindow(QDialog):
     def delete_fridge(self):
         selected = self.fridge_list.currentRow()
         if selected >= 0:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("SELECT id FROM fridges")
-            ids = cursor.fetchall()
-            conn.execute("DELETE FROM fridges WHERE id = ?", (ids[selected][0],))
-            conn.commit()
-            conn.close()
+            with transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT id FROM fridges")
+                ids = cursor.fetchall()
+                conn.execute("DELETE FROM fridges WHERE id = ?", (ids[selected][0],))
             self.load_units()
 
     def fill_shelf_form(self, item):
         try:
             id_ = int(item.text().split("[# ")[1].split("]")[0])
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
+            cursor = get_connection().cursor()
             cursor.execute("SELECT name, type, max_capacity, location FROM shelves WHERE id = ?", (id_,))
             result = cursor.fetchone()
-            conn.close()
             if result:
                 self.shelf_name.setText(result[0])
                 self.shelf_type.setCurrentText(result[1])
@@ -232,13 +196,10 @@ class StorageUnitManageWindow(QDialog):
                 cap = int(self.shelf_capacity.text())
                 loc = self.shelf_location.text()
 
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute("""
-                    UPDATE shelves SET name=?, type=?, max_capacity=?, location=? WHERE id=?
-                """, (name, t, cap, loc, id_))
-                conn.commit()
-                conn.close()
+                with transaction() as conn:
+                    conn.execute("""
+                        UPDATE shelves SET name=?, type=?, max_capacity=?, location=? WHERE id=?
+                    """, (name, t, cap, loc, id_))
                 self.load_units()
             except Exception as e:
                 QMessageBox.warning(self, _("error.title"), _("error.general").format(error=str(e)))
@@ -250,11 +211,8 @@ class StorageUnitManageWindow(QDialog):
             cap = int(self.shelf_capacity.text())
             loc = self.shelf_location.text()
 
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("INSERT INTO shelves (name, type, max_capacity, location) VALUES (?, ?, ?, ?)", (name, t, cap, loc))
-            conn.commit()
-            conn.close()
+            with transaction() as conn:
+                conn.execute("INSERT INTO shelves (name, type, max_capacity, location) VALUES (?, ?, ?, ?)", (name, t, cap, loc))
             self.load_units()
         except:
             QMessageBox.warning(self, _("error.title"), _("storage_manage.invalid_input"))
@@ -262,11 +220,9 @@ class StorageUnitManageWindow(QDialog):
     def delete_shelf(self):
         selected = self.shelf_list.currentRow()
         if selected >= 0:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("SELECT id FROM shelves")
-            ids = cursor.fetchall()
-            conn.execute("DELETE FROM shelves WHERE id = ?", (ids[selected][0],))
-            conn.commit()
-            conn.close()
+            with transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT id FROM shelves")
+                ids = cursor.fetchall()
+                conn.execute("DELETE FROM shelves WHERE id = ?", (ids[selected][0],))
             self.load_units()
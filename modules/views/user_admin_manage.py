@@ -1,10 +1,9 @@
-import sqlite3
 import hashlib
 from PyQt5.QtWidgets import (
     QDialog, QLabel, QPushButton, QVBoxLayout, QFormLayout,
     QLineEdit, QGroupBox, QScrollArea, QWidget, QMessageBox, QComboBox
 )
-from modules.config import DB_PATH
+from modules.db.connection import get_connection, transaction
 from modules.lang.translator import translator as _
 
 def hash_password(password):
@@ -33,14 +32,12 @@ class UserAdminManageWindow(QDialog):
     def load_users(self):
         self.content_layout.setSpacing(15)
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
+            cursor = get_connection().cursor()
             cursor.execute("SELECT id, username, role, nickname, owner_id FROM users ORDER BY role DESC")
             users = cursor.fetchall()
 
             cursor.execute("SELECT id, username FROM users WHERE role = 'owner'")
             self.owners = cursor.fetchall()
-            conn.close()
         except Exception as e:
             self.content_layout.addWidget(QLabel(_("error.general").format(error=str(e))))
             return
@@ -95,21 +92,19 @@ class UserAdminManageWindow(QDialog):
             return
 
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
+            with transaction() as conn:
+                cursor = conn.cursor()
 
-            if new_pw:
-                hashed = hash_password(new_pw)
-                cursor.execute("UPDATE users SET password_hash = ? WHERE id = ?", (hashed, user_id))
+                if new_pw:
+                    hashed = hash_password(new_pw)
+                    cursor.execute("UPDATE users SET password_hash = ? WHERE id = ?", (hashed, user_id))
 
-            if new_nick:
-                cursor.execute("UPDATE users SET nickname = ? WHERE id = ?", (new_nick, user_id))
+                if new_nick:
+                    cursor.execute("UPDATE users SET nickname = ? WHERE id = ?", (new_nick, user_id))
 
-            if owner_combo is not None:
-                cursor.execute("UPDATE users SET owner_id = ? WHERE id = ?", (selected_owner_id, user_id))
+                if owner_combo is not None:
+                    cursor.execute("UPDATE users SET owner_id = ? WHERE id = ?", (selected_owner_id, user_id))
 
-            conn.commit()
-            conn.close()
             QMessageBox.information(self, _("success.title"), _("user_admin.updated"))
             self.refresh()
         except Exception as e:
@@ -123,11 +118,8 @@ class UserAdminManageWindow(QDialog):
         )
         if confirm == QMessageBox.Yes:
             try:
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
-                conn.commit()
-                conn.close()
+                with transaction() as conn:
+                    conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
                 QMessageBox.information(self, _("success.title"), _("user_admin.deleted").format(username=username))
                 self.refresh()
             except Exception as e:
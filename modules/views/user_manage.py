@@ -6,7 +6,7 @@ from PyQt5.QtWidgets import (
     QFormLayout, QCheckBox, QMessageBox, QGroupBox
 )
 from PyQt5.QtCore import Qt
-from modules.config import DB_PATH
+from modules.db.connection import transaction
 from modules.lang.translator import translator as _
 
 def hash_password(password):
@@ -77,20 +77,17 @@ class UserManageWindow(QDialog):
                     selected_perms.append("stock")
 
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO users (username, password_hash, role, permissions, nickname, owner_id)
-                VALUES (?, ?, 'worker', ?, ?, ?)
-            """, (
-                username,
-                hash_password(password),
-                json.dumps(selected_perms),
-                nickname,
-                self.owner_id
-            ))
-            conn.commit()
-            conn.close()
+            with transaction() as conn:
+                conn.execute("""
+                    INSERT INTO users (username, password_hash, role, permissions, nickname, owner_id)
+                    VALUES (?, ?, 'worker', ?, ?, ?)
+                """, (
+                    username,
+                    hash_password(password),
+                    json.dumps(selected_perms),
+                    nickname,
+                    self.owner_id
+                ))
             QMessageBox.information(self, _("success.title"), _("user_manage.created").format(name=nickname))
             self.close()
         except sqlite3.IntegrityError:
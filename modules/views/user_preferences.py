@@ -1,9 +1,8 @@
-import sqlite3
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QLabel, QPushButton, QComboBox, QCheckBox, QMessageBox
 )
 from PyQt5.QtCore import Qt, QDate
-from modules.config import DB_PATH
+from modules.db.connection import get_connection, transaction
 from modules.lang.translator import translator as _
 
 class UserPreferencesWindow(QDialog):
@@ -46,11 +45,9 @@ class UserPreferencesWindow(QDialog):
 
     def load_preferences(self):
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
+            cursor = get_connection().cursor()
             cursor.execute("SELECT theme, only_self_sales FROM users WHERE id = ?", (self.user_id,))
             row = cursor.fetchone()
-            conn.close()
 
             if row:
                 theme, only_self = row
@@ -62,8 +59,7 @@ class UserPreferencesWindow(QDialog):
 
     def load_sales_summary(self):
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
+            cursor = get_connection().cursor()
 
             today = QDate.currentDate().toString("yyyy-MM-dd")
             month_start = QDate.currentDate().addDays(-QDate.currentDate().day() + 1).toString("yyyy-MM-dd")
@@ -76,7 +72,6 @@ class UserPreferencesWindow(QDialog):
 
             self.daily_label.setText(f"{_('user_pref.daily_sales')}: {daily}")
             self.monthly_label.setText(f"{_('user_pref.monthly_sales')}: {monthly}")
-            conn.close()
         except Exception as e:
             self.daily_label.setText(f"{_('user_pref.daily_sales')}: {_('error.title')}")
             self.monthly_label.setText(f"{_('user_pref.monthly_sales')}: {_('error.title')}")
@@ -94,13 +89,10 @@ class UserPreferencesWindow(QDialog):
         only_self = int(self.only_self_checkbox.isChecked())
 
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE users SET theme = ?, only_self_sales = ? WHERE id = ?
-            """, (theme_raw, only_self, self.user_id))
-            conn.commit()
-            conn.close()
+            with transaction() as conn:
+                conn.execute("""
+                    UPDATE users SET theme = ?, only_self_sales = ? WHERE id = ?
+                """, (theme_raw, only_self, self.user_id))
 
             QMessageBox.information(self, _("success.title"), _("user_pref.saved"))
             self.close()
@@ -0,0 +1,57 @@
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QCheckBox
+from modules.widgets.data_table import DataTableView
+from modules.lang.translator import Translator
+
+
+class WasteRiskWindow(QDialog):
+    # plan: WasteRiskEngine.compute() çıktısı (parti başına, zarara göre sıralı).
+    def __init__(self, plan):
+        super().__init__()
+        self.t = Translator()
+        self.plan = plan
+        self.setWindowTitle(self.t.tr("waste.title"))
+        self.setMinimumSize(1000, 600)
+
+        layout = QVBoxLayout()
+
+        self.summary_label = QLabel()
+        self.summary_label.setStyleSheet("font-weight: bold; font-size: 12pt; margin: 8px 0;")
+        layout.addWidget(self.summary_label)
+
+        filter_layout = QHBoxLayout()
+        self.show_all_checkbox = QCheckBox(self.t.tr("waste.show_all"))
+        self.show_all_checkbox.toggled.connect(self.refresh_table)
+        filter_layout.addWidget(self.show_all_checkbox)
+        filter_layout.addStretch()
+        layout.addLayout(filter_layout)
+
+        currency = self.t.currency_symbol
+        self.table = DataTableView(
+            ["product_name", "received_date", "expiry_date", "days_left", "remaining", "daily_forecast",
+             "expected_sold", "expected_waste", "waste_ratio", "expected_loss"],
+            [self.t.tr("product.name"), self.t.tr("column.received"), self.t.tr("column.expiry"),
+             self.t.tr("column.days_left"), self.t.tr("column.stock"), self.t.tr("column.daily_forecast"),
+             self.t.tr("column.expected_sold"), self.t.tr("column.expected_waste"),
+             self.t.tr("column.waste_ratio"), self.t.tr("column.expected_loss")],
+            formatters={
+                "received_date": lambda d: d.strftime("%d.%m.%Y") if d == d else self.t.tr("expiry.unknown"),
+                "expiry_date": lambda d: d.strftime("%d.%m.%Y"),
+                "daily_forecast": "{:.2f}".format,
+                "expected_sold": "{:.1f}".format,
+                "expected_waste": "{:.1f}".format,
+                "waste_ratio": "{:.1f}".format,
+                "expected_loss": lambda v: f"{v:.2f}{currency}",
+            }
+        )
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+
+        self.refresh_table()
+
+    def refresh_table(self):
+        at_risk = self.plan[self.plan["expected_waste"] > 0]
+        self.summary_label.setText(self.t.tr("waste.summary").format(
+            count=len(at_risk), qty=round(at_risk["expected_waste"].sum()),
+            loss=at_risk["expected_loss"].sum(), currency=self.t.currency_symbol
+        ))
+        self.table.set_frame(self.plan if self.show_all_checkbox.isChecked() else at_risk)
@@ -1,11 +1,10 @@
-import sqlite3
 import hashlib
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem,
     QPushButton, QHBoxLayout, QMessageBox, QLineEdit, QHeaderView, QWidget
 )
 from PyQt5.QtCore import Qt
-from modules.config import DB_PATH
+from modules.db.connection import get_connection, transaction
 from modules.lang.translator import translator as _
 
 class WorkerManageWindow(QDialog):
@@ -32,14 +31,12 @@ class WorkerManageWindow(QDialog):
         self.load_workers()
 
     def load_workers(self):
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        cursor = get_connection().cursor()
         cursor.execute("""
             SELECT id, username, nickname FROM users
             WHERE role = 'worker' AND owner_id = ?
         """, (self.owner_id,))
         workers = cursor.fetchall()
-        conn.close()
 
         self.table.setRowCount(len(workers))
 
@@ -81,18 +78,16 @@ class WorkerManageWindow(QDialog):
             QMessageBox.warning(self, _("warning.title"), _("worker_manage.fill_at_least_one"))
             return
 
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        with transaction() as conn:
+            cursor = conn.cursor()
 
-        if new_pw:
-            hashed = hashlib.sha256(new_pw.encode()).hexdigest()
-            cursor.execute("UPDATE users SET password_hash = ? WHERE id = ?", (hashed, user_id))
+            if new_pw:
+                hashed = hashlib.sha256(new_pw.encode()).hexdigest()
+                cursor.execute("UPDATE users SET password_hash = ? WHERE id = ?", (hashed, user_id))
 
-        if new_nick:
-            cursor.execute("UPDATE users SET nickname = ? WHERE id = ?", (new_nick, user_id))
+            if new_nick:
+                cursor.execute("UPDATE users SET nickname = ? WHERE id = ?", (new_nick, user_id))
 
-        conn.commit()
-        conn.close()
         QMessageBox.information(self, _("success.title"), _("worker_manage.updated"))
         self.load_workers()
 
@@ -104,10 +99,7 @@ class WorkerManageWindow(QDialog):
             QMessageBox.Yes | QMessageBox.No
         )
         if confirm == QMessageBox.Yes:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
-            conn.commit()
-            conn.close()
+            with transaction() as conn:
+                conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
             QMessageBox.information(self, _("success.title"), _("worker_manage.deleted").format(username=username))
             self.load_workers()
@@ -0,0 +1,117 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt5.QtWidgets import QProgressDialog
+from modules.db.connection import close_connection
+from modules.lang.translator import translator
+
+# Uzun süren tahmin/analiz işlerini QThreadPool üzerinde çalıştırır.
+# İş fonksiyonu `progress(done, total, text)` geri çağrısını alır; iptal
+# istenmişse bu çağrı TaskCancelled fırlatır ve iş orada durur.
+# Sonuçlar sinyallerle ana thread'e döner.
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class TaskSignals(QObject):
+    progress = pyqtSignal(int, int, str)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class BackgroundTask(QRunnable):
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+        self._cancelled = False
+        self.setAutoDelete(False)
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def _report(self, done, total, text=""):
+        if self._cancelled:
+            raise TaskCancelled()
+        self.signals.progress.emit(int(done), int(total), str(text))
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, progress=self._report, **self.kwargs)
+            if self._cancelled:
+                self.signals.cancelled.emit()
+            else:
+                self.signals.finished.emit(result)
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            print(f"[background_task] Hata: {e}")
+            self.signals.failed.emit(str(e))
+        finally:
+            # Havuz thread'leri boşta kapanabilir; SQLite bağlantısı açık kalmasın.
+            close_connection()
+
+
+_running = set()
+
+
+def run_in_background(fn, *args, on_result=None, on_error=None, on_progress=None, on_cancel=None, **kwargs):
+    task = BackgroundTask(fn, *args, **kwargs)
+    if on_result:
+        task.signals.finished.connect(on_result)
+    if on_error:
+        task.signals.failed.connect(on_error)
+    if on_progress:
+        task.signals.progress.connect(on_progress)
+    if on_cancel:
+        task.signals.cancelled.connect(on_cancel)
+
+    # Çalışırken Python tarafında referans tutulmazsa görev toplanabilir.
+    _running.add(task)
+    for signal in (task.signals.finished, task.signals.failed, task.signals.cancelled):
+        signal.connect(lambda *_: _running.discard(task))
+
+    QThreadPool.globalInstance().start(task)
+    return task
+
+
+def cancel_all():
+    for task in list(_running):
+        task.cancel()
+    QThreadPool.globalInstance().waitForDone(3000)
+
+
+class TaskProgressDialog(QProgressDialog):
+    # Görevin ilerlemesini gösterir; İptal düğmesi görevi iptal eder.
+    def __init__(self, task, title, parent=None):
+        super().__init__(translator("task.running"), translator("task.cancel"), 0, 0, parent)
+        self.task = task
+        self.setWindowTitle(title)
+        self.setWindowModality(Qt.WindowModal)
+        self.setMinimumDuration(300)
+        self.setAutoClose(False)
+        self.setAutoReset(False)
+        self.canceled.connect(task.cancel)
+        task.signals.progress.connect(self.update_progress)
+        for signal in (task.signals.finished, task.signals.failed, task.signals.cancelled):
+            signal.connect(self.close_dialog)
+
+    def update_progress(self, done, total, text):
+        self.setMaximum(total)
+        self.setValue(done)
+        if text:
+            self.setLabelText(translator("task.progress").format(done=done, total=total, name=text))
+
+    def close_dialog(self, *_):
+        # closeEvent canceled sinyali yayar; biten görevi iptal etmesin.
+        try:
+            self.canceled.disconnect(self.task.cancel)
+        except TypeError:
+            pass
+        self.close()
@@ -0,0 +1,292 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from PyQt5.QtCore import QObject, QUrl, pyqtSlot
+from PyQt5.QtWebChannel import QWebChannel
+from PyQt5.QtWebEngineWidgets import QWebEngineView
+
+# Plotly grafikleri için ortak çizim yüzeyi.
+#  - plotly.js yerel bir dosyadan bir kez yüklenir; her grafik için
+#    megabaytlarca JS içeren HTML yazılmaz.
+#  - Sayfası önceden yüklenmiş QWebEngineView'lar havuzda bekler; grafik
+#    JSON'u runJavaScript ile gönderilir (Plotly.react).
+#  - Büyük figürler önbellek klasörüne yazılır ve sayfaya oradan yüklenir;
+#    klasör boyutu sınırlıdır, en eski dosyalar silinir.
+#  - zoom_update() sağlayan figürlerde (downsample.ZoomableFigure) x ekseni
+#    yakınlaştırması QWebChannel ile Python'a bildirilir; görünen aralık
+#    yeniden örneklenip Plotly.restyle ile gönderilir.
+
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "bitirmez_charts")
+FIGURES_DIR = os.path.join(CACHE_DIR, "figures")
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+INLINE_JSON_LIMIT = 1024 * 1024
+POOL_SIZE = 2
+
+HOST_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<script src="plotly.min.js"></script>
+<script src="qrc:///qtwebchannel/qwebchannel.js"></script>
+<style>html, body, #chart { margin: 0; width: 100%; height: 100%; overflow: hidden; }</style>
+</head>
+<body>
+<div id="chart"></div>
+<script>
+var bridge = null;
+new QWebChannel(qt.webChannelTransport, function (channel) {
+    bridge = channel.objects.bridge;
+});
+function watchZoom(chart) {
+    chart.removeAllListeners("plotly_relayout");
+    chart.on("plotly_relayout", function (ev) {
+        if (!bridge) return;
+        if (ev["xaxis.autorange"]) {
+            bridge.relayout("", "", chart.clientWidth);
+            return;
+        }
+        var x0 = ev["xaxis.range[0]"], x1 = ev["xaxis.range[1]"];
+        if (x0 === undefined && ev["xaxis.range"]) {
+            x0 = ev["xaxis.range"][0];
+            x1 = ev["xaxis.range"][1];
+        }
+        if (x0 !== undefined) bridge.relayout(String(x0), String(x1), chart.clientWidth);
+    });
+}
+function renderFigure(fig, zoomable) {
+    var layout = Object.assign({autosize: true}, fig.layout || {});
+    Plotly.react("chart", fig.data || [], layout, {responsive: true}).then(function (chart) {
+        if (zoomable) watchZoom(chart);
+    });
+}
+function loadFigure(src, zoomable) {
+    var script = document.createElement("script");
+    script.src = src;
+    script.onload = function () {
+        renderFigure(window.__figure, zoomable);
+        window.__figure = null;
+        script.remove();
+    };
+    document.head.appendChild(script);
+}
+function updateTraces(update) {
+    Plotly.restyle("chart", {x: update.x, y: update.y, name: update.name}, update.indices);
+}
+function clearFigure() {
+    Plotly.purge("chart");
+}
+</script>
+</body>
+</html>
+"""
+
+
+def _plotly_js_source():
+    import plotly
+    return os.path.join(os.path.dirname(plotly.__file__), "package_data", "plotly.min.js")
+
+
+def ensure_host_page():
+    # plotly.min.js ve sayfa önbellek klasörüne bir kez kopyalanır.
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    js_path = os.path.join(CACHE_DIR, "plotly.min.js")
+    source = _plotly_js_source()
+    if os.path.exists(source):
+        if not os.path.exists(js_path) or os.path.getsize(js_path) != os.path.getsize(source):
+            shutil.copyfile(source, js_path + ".tmp")
+            os.replace(js_path + ".tmp", js_path)
+    elif not os.path.exists(js_path):
+        from plotly.offline import get_plotlyjs
+        with open(js_path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(get_plotlyjs())
+        os.replace(js_path + ".tmp", js_path)
+
+    host_path = os.path.join(CACHE_DIR, "chart_host.html")
+    if not os.path.exists(host_path) or open(host_path, encoding="utf-8").read() != HOST_HTML:
+        with open(host_path, "w", encoding="utf-8") as f:
+            f.write(HOST_HTML)
+    return host_path
+
+
+class ChartCache:
+    def __init__(self, directory=FIGURES_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.evict()
+
+    def put(self, data, suffix):
+        # İçerik adresli: aynı veri tekrar yazılmaz, yalnızca tarihi yenilenir.
+        raw = data.encode("utf-8")
+        path = os.path.join(self.directory, hashlib.sha1(raw).hexdigest() + suffix)
+        if os.path.exists(path):
+            os.utime(path)
+        else:
+            with open(path + ".tmp", "wb") as f:
+                f.write(raw)
+            os.replace(path + ".tmp", path)
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep=None):
+        try:
+            entries = []
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        except OSError as e:
+            print(f"[chart_host] Hata: {e}")
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError as e:
+                print(f"[chart_host] Hata: {e}")
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+_cache = None
+
+
+def chart_cache():
+    global _cache
+    if _cache is None:
+        _cache = ChartCache()
+    return _cache
+
+
+class ChartBridge(QObject):
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+
+    @pyqtSlot(str, str, int)
+    def relayout(self, start, end, width_px):
+        self.view.on_zoom(start or None, end or None, width_px)
+
+
+class ChartView(QWebEngineView):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._ready = False
+        self._pending = None
+        self._zoomable = None
+        self._bridge = ChartBridge(self)
+        self._channel = QWebChannel(self.page())
+        self._channel.registerObject("bridge", self._bridge)
+        self.page().setWebChannel(self._channel)
+        self.loadFinished.connect(self._on_load)
+        self.load(QUrl.fromLocalFile(ensure_host_page()))
+
+    def _on_load(self, ok):
+        self._ready = ok
+        if not ok:
+            print("[chart_host] Hata: grafik sayfası yüklenemedi")
+            return
+        if self._pending is not None:
+            payload, self._pending = self._pending, None
+            self._push(payload)
+
+    def show_figure(self, figure):
+        # figure: plotly Figure, ZoomableFigure, dict ya da JSON metni.
+        self._zoomable = figure if hasattr(figure, "zoom_update") else None
+        if isinstance(figure, str):
+            payload = figure
+        elif isinstance(figure, dict):
+            import plotly.io as pio
+            payload = pio.to_json(figure, validate=False)
+        else:
+            payload = figure.to_json()
+        if self._ready:
+            self._push(payload)
+        else:
+            self._pending = payload
+
+    def _push(self, payload):
+        zoomable = "true" if self._zoomable is not None else "false"
+        if len(payload) > INLINE_JSON_LIMIT:
+            path = chart_cache().put(f"window.__figure = {payload};", ".js")
+            src = QUrl.fromLocalFile(path).toString()
+            self.page().runJavaScript(f"loadFigure({json.dumps(src)}, {zoomable});")
+        else:
+            self.page().runJavaScript(f"renderFigure({payload}, {zoomable});")
+
+    def on_zoom(self, start, end, width_px):
+        if self._zoomable is None:
+            return
+        try:
+            update = self._zoomable.zoom_update(start, end, width_px)
+        except Exception as e:
+            print(f"[chart_host] Hata: {e}")
+            return
+        self.page().runJavaScript(f"updateTraces({json.dumps(update)});")
+
+    def clear(self):
+        self._pending = None
+        self._zoomable = None
+        if self._ready:
+            self.page().runJavaScript("clearFigure();")
+
+
+class ChartViewPool:
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self._idle = []
+
+    def warm(self):
+        while len(self._idle) < self.size:
+            self._idle.append(ChartView())
+
+    def acquire(self, parent=None):
+        view = self._idle.pop() if self._idle else ChartView()
+        if parent is not None:
+            view.setParent(parent)
+        return view
+
+    def release(self, view):
+        view.clear()
+        view.setParent(None)
+        view.hide()
+        if len(self._idle) < self.size:
+            self._idle.append(view)
+        else:
+            view.deleteLater()
+
+
+_pool = None
+
+
+def chart_pool():
+    global _pool
+    if _pool is None:
+        _pool = ChartViewPool()
+    return _pool
+
+
+def warm_chart_pool():
+    try:
+        chart_pool().warm()
+    except Exception as e:
+        print(f"[chart_host] Hata: {e}")
+
+
+def shutdown_chart_pool():
+    # Bekleyen sayfalar web profilinden önce silinmeli; ebeveynsiz
+    # görünümler son Python referansı bırakılınca hemen silinir.
+    if _pool is not None:
+        _pool._idle.clear()
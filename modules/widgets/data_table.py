@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLineEdit, QTableView, QAbstractItemView, QHeaderView
+from modules.lang.translator import translator
+
+# Rapor pencerelerinin ortak tablosu. Veri satır başına widget yerine sütun
+# dizilerinde (numpy) tutulur; görünüm yalnızca ekrandaki satırları çizer ve
+# satırlar kaydırdıkça canFetchMore/fetchMore ile parça parça açılır.
+
+SORT_ROLE = Qt.UserRole
+
+
+class DataFrameTableModel(QAbstractTableModel):
+    def __init__(self, columns, headers=None, formatters=None, batch_size=500, parent=None):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self.headers = list(headers) if headers else list(columns)
+        self.formatters = formatters or {}
+        self.batch_size = batch_size
+        self._data = {col: np.empty(0, dtype=object) for col in self.columns}
+        self._order = np.arange(0)
+        self._loaded = 0
+
+    def set_frame(self, df):
+        self.beginResetModel()
+        # Tarih sütunları biçimlendiriciler için Timestamp nesnesi olarak tutulur.
+        self._data = {
+            col: df[col].astype(object).to_numpy() if pd.api.types.is_datetime64_any_dtype(df[col]) else df[col].to_numpy()
+            for col in self.columns
+        }
+        self._order = np.arange(len(df))
+        self._loaded = min(self.batch_size, len(df))
+        self.endResetModel()
+
+    def total_rows(self):
+        return len(self._order)
+
+    def raw_value(self, row, column):
+        return self._data[self.columns[column]][self._order[row]]
+
+    def to_frame(self):
+        # Dışa aktarma için tüm satırlar, görünen sırayla.
+        return pd.DataFrame({
+            header: self._data[col][self._order] for col, header in zip(self.columns, self.headers)
+        })
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self.raw_value(index.row(), index.column())
+        if role == Qt.DisplayRole:
+            if value is None or (isinstance(value, float) and np.isnan(value)):
+                return ""
+            formatter = self.formatters.get(self.columns[index.column()])
+            return formatter(value) if formatter else str(value)
+        if role == SORT_ROLE:
+            return value
+        if role == Qt.TextAlignmentRole and isinstance(value, (int, float, np.number)):
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section]
+        return str(section + 1)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self._order)
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(self.batch_size, len(self._order) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def fetch_all(self):
+        remaining = len(self._order) - self._loaded
+        if remaining > 0:
+            self.beginInsertRows(QModelIndex(), self._loaded, len(self._order) - 1)
+            self._loaded = len(self._order)
+            self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # Sıralama yüklenmiş satırlarla sınırlı kalmasın diye tüm sütun
+        # dizisi üzerinde yapılır.
+        if not len(self._order):
+            return
+        values = pd.Series(self._data[self.columns[column]])
+        sorted_idx = values.sort_values(
+            ascending=(order == Qt.AscendingOrder), kind="mergesort", na_position="last"
+        ).index.to_numpy()
+        self.beginResetModel()
+        self._order = sorted_idx
+        self._loaded = min(max(self._loaded, self.batch_size), len(sorted_idx))
+        self.endResetModel()
+
+
+class DataFrameFilterProxy(QSortFilterProxyModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._text = ""
+        self.setSortRole(SORT_ROLE)
+
+    def set_filter_text(self, text):
+        self._text = text.strip().lower()
+        if self._text:
+            # Arama yalnızca açılmış satırlarda kalmasın; satır sayacı açılır,
+            # çizim yine yalnızca görünen satırlar için yapılır.
+            self.sourceModel().fetch_all()
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not self._text:
+            return True
+        model = self.sourceModel()
+        return any(
+            self._text in str(model.raw_value(source_row, col)).lower()
+            for col in range(model.columnCount())
+        )
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # Sıralamayı kaynağa bırak; proxy yalnızca filtreler.
+        if column >= 0:
+            self.sourceModel().sort(column, order)
+
+
+class DataTableView(QWidget):
+    def __init__(self, columns, headers=None, formatters=None, batch_size=500, parent=None):
+        super().__init__(parent)
+        self.model = DataFrameTableModel(columns, headers, formatters, batch_size, self)
+        self.proxy = DataFrameFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+
+        self.search = QLineEdit()
+        self.search.setPlaceholderText(translator("table.search"))
+        self.search.textChanged.connect(self.proxy.set_filter_text)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setAlternatingRowColors(True)
+        self.table.verticalHeader().setDefaultSectionSize(24)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.table.horizontalHeader().setStretchLastSection(True)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.search)
+        layout.addWidget(self.table)
+
+    def set_frame(self, df):
+        self.model.set_frame(df)
+        self.table.resizeColumnsToContents()
+
+    def clear(self):
+        self.model.set_frame(pd.DataFrame(columns=self.model.columns))
+
+    def row_count(self):
+        return self.model.total_rows()
+
+    def to_frame(self):
+        return self.model.to_frame()
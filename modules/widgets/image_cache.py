@@ -0,0 +1,191 @@
+import hashlib
+import os
+import shutil
+import threading
+from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QImage, QPixmap, QPixmapCache
+from modules.db.connection import get_connection
+from modules.widgets.background_task import run_in_background
+
+# Ürün görselleri için küçük resim servisi.
+#  - Bellek: QPixmapCache (LRU), anahtar içerik özeti + boyut.
+#  - Disk: images/.thumbs/<sha1>_<w>x<h>.png; aynı içerikli dosyalar aynı
+#    küçük resmi paylaşır.
+#  - Dosya okuma, özet ve ölçekleme QThreadPool'da QImage ile yapılır;
+#    QPixmap'e çevirme ana thread'de olur.
+#  - Yeni görseller images/<sha1>.<uzantı> olarak saklanır; aynı dosya bir
+#    kez tutulur.
+
+IMAGES_DIR = os.path.abspath("images")
+THUMBS_DIR = os.path.join(IMAGES_DIR, ".thumbs")
+PIXMAP_CACHE_KB = 32 * 1024
+HASH_CHUNK = 1024 * 1024
+# Etikette son istenen görselin yolu; geç gelen eski sonuçlar bununla elenir.
+THUMB_PROPERTY = "thumbnail_path"
+
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+def file_digest(path):
+    # Özet dosya yolu + değişiklik zamanı + boyuta göre bellekte tutulur.
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _digests_lock:
+        digest = _digests.get(key)
+    if digest is None:
+        sha1 = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                sha1.update(chunk)
+        digest = sha1.hexdigest()
+        with _digests_lock:
+            _digests[key] = digest
+    return digest
+
+
+def _known_digest(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    with _digests_lock:
+        return _digests.get((path, stat.st_mtime_ns, stat.st_size))
+
+
+def _cache_key(digest, size):
+    return f"thumb:{digest}:{size.width()}x{size.height()}"
+
+
+def _thumb_path(digest, size):
+    return os.path.join(THUMBS_DIR, f"{digest}_{size.width()}x{size.height()}.png")
+
+
+def _load_thumbnail(path, size, progress=None):
+    # Arka planda çalışır: yalnızca QImage kullanılır.
+    digest = file_digest(path)
+    thumb_path = _thumb_path(digest, size)
+    image = QImage(thumb_path) if os.path.exists(thumb_path) else QImage()
+    if image.isNull():
+        source = QImage(path)
+        if source.isNull():
+            return digest, None
+        image = source.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        try:
+            os.makedirs(THUMBS_DIR, exist_ok=True)
+            tmp = f"{thumb_path}.{threading.get_ident()}.tmp"
+            if image.save(tmp, "PNG"):
+                os.replace(tmp, thumb_path)
+        except OSError as e:
+            print(f"[image_cache] Hata: {e}")
+    return digest, image
+
+
+class ImageService:
+    def __init__(self):
+        self._pending = {}
+        QPixmapCache.setCacheLimit(max(QPixmapCache.cacheLimit(), PIXMAP_CACHE_KB))
+
+    def cached_pixmap(self, path, size):
+        digest = _known_digest(path)
+        if digest is None:
+            return None
+        pixmap = QPixmapCache.find(_cache_key(digest, size))
+        return pixmap if pixmap is not None and not pixmap.isNull() else None
+
+    def request(self, path, size, callback=None):
+        # Hazırsa callback hemen çağrılır; değilse küçük resim arka planda
+        # üretilir ve hazır olunca ana thread'de çağrılır.
+        if not path or not os.path.exists(path):
+            return
+        pixmap = self.cached_pixmap(path, size)
+        if pixmap is not None:
+            if callback:
+                callback(pixmap)
+            return
+        job = (path, size.width(), size.height())
+        callbacks = self._pending.get(job)
+        if callbacks is not None:
+            if callback:
+                callbacks.append(callback)
+            return
+        self._pending[job] = [callback] if callback else []
+        run_in_background(
+            _load_thumbnail, path, size,
+            on_result=lambda result: self._finish(job, result),
+            on_error=lambda error: self._pending.pop(job, None)
+        )
+
+    def _finish(self, job, result):
+        callbacks = self._pending.pop(job, [])
+        digest, image = result
+        if image is None:
+            return
+        pixmap = QPixmap.fromImage(image)
+        QPixmapCache.insert(_cache_key(digest, QSize(job[1], job[2])), pixmap)
+        for callback in callbacks:
+            try:
+                callback(pixmap)
+            except RuntimeError:
+                # Satır/pencere bu arada kapanmış olabilir.
+                pass
+
+    def prefetch(self, paths, size):
+        for path in set(p for p in paths if p):
+            self.request(path, size)
+
+
+_service = None
+
+
+def image_service():
+    global _service
+    if _service is None:
+        _service = ImageService()
+    return _service
+
+
+def set_thumbnail(label, path, width, height=None):
+    size = QSize(width, height or width)
+    label.setProperty(THUMB_PROPERTY, path)
+
+    def apply(pixmap):
+        # Bu arada başka bir görsel istendiyse ya da görsel temizlendiyse
+        # sonuç atılır.
+        if label.property(THUMB_PROPERTY) == path:
+            label.setPixmap(pixmap)
+
+    image_service().request(path, size, apply)
+
+
+def clear_thumbnail(label, text=""):
+    label.setProperty(THUMB_PROPERTY, None)
+    label.setPixmap(QPixmap())
+    label.setText(text)
+
+
+def get_image_paths(conn=None, product_ids=None):
+    # Görsel yolları tek sorguda: {product_id: image_path}.
+    conn = conn or get_connection()
+    query = "SELECT product_id, image_path FROM products WHERE image_path IS NOT NULL AND image_path != ''"
+    params = ()
+    if product_ids is not None:
+        ids = [int(pid) for pid in product_ids]
+        if not ids:
+            return {}
+        query += f" AND product_id IN ({','.join('?' * len(ids))})"
+        params = tuple(ids)
+    return dict(conn.execute(query, params).fetchall())
+
+
+def store_image(source_path):
+    # İçerik adresli kayıt: aynı içerik ikinci kez kopyalanmaz.
+    os.makedirs(IMAGES_DIR, exist_ok=True)
+    digest = file_digest(source_path)
+    ext = os.path.splitext(source_path)[1].lower() or ".img"
+    target_path = os.path.join(IMAGES_DIR, f"{digest}{ext}")
+    if not os.path.exists(target_path):
+        tmp = f"{target_path}.tmp"
+        shutil.copyfile(source_path, tmp)
+        os.replace(tmp, target_path)
+    return target_path
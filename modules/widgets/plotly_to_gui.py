@@ -1,4 +1,5 @@
 import os
+import shutil
 import sys
 from PyQt5.QtWidgets import (
     QApplication, QDialog, QVBoxLayout, QPushButton, QMessageBox,
@@ -7,29 +8,37 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtWebEngineWidgets import QWebEngineView
 from PyQt5.QtCore import QUrl
 from modules.lang.translator import translator as translate
+from modules.widgets.chart_host import chart_pool
 
 class PlotlyViewer(QDialog):
-    def __init__(self, *html_paths_titles):
+    # Her sekme (figür, başlık) alır; figürler havuzdaki hazır görünümlerde
+    # çizilir. Eski kullanım için figür yerine HTML dosya yolu da verilebilir.
+    def __init__(self, *figures_titles):
         super().__init__()
         self.setWindowTitle(translate("plotly.title"))
         self.setMinimumSize(1000, 700)
         self.is_fullscreen = False
-        self.html_views = []
+        self.tab_sources = []
+        self.pooled_views = []
 
         self.tabs = QTabWidget()
-        for html_path, title in html_paths_titles:
-            abs_path = os.path.abspath(html_path)
-            if not os.path.exists(abs_path):
-                continue
-
-            web = QWebEngineView()
-            web.load(QUrl.fromLocalFile(abs_path))
+        for source, title in figures_titles:
+            if isinstance(source, str) and source.endswith(".html"):
+                source = os.path.abspath(source)
+                if not os.path.exists(source):
+                    continue
+                web = QWebEngineView()
+                web.load(QUrl.fromLocalFile(source))
+            else:
+                web = chart_pool().acquire()
+                web.show_figure(source)
+                self.pooled_views.append(web)
 
             container = QWidget()
             layout = QVBoxLayout(container)
             layout.addWidget(web)
             self.tabs.addTab(container, os.path.basename(title))
-            self.html_views.append((web, abs_path))
+            self.tab_sources.append(source)
 
         self.save_btn = QPushButton(translate("plotly.save_html"))
         self.fullscreen_btn = QPushButton(translate("plotly.fullscreen"))
@@ -47,8 +56,7 @@ class PlotlyViewer(QDialog):
 
     def save_as_html(self):
         try:
-            index = self.tabs.currentIndex()
-            web, html_path = self.html_views[index]
+            source = self.tab_sources[self.tabs.currentIndex()]
 
             file_dialog = QFileDialog(self)
             file_path, _ = file_dialog.getSaveFileName(
@@ -60,15 +68,31 @@ class PlotlyViewer(QDialog):
             if file_path:
                 if not file_path.endswith(".html"):
                     file_path += ".html"
-                # HTML dosyasını kopyala
-                with open(html_path, "rb") as src, open(file_path, "wb") as dst:
-                    dst.write(src.read())
+                if isinstance(source, str) and source.endswith(".html"):
+                    shutil.copyfile(source, file_path)
+                else:
+                    # Kaydedilen dosya tek başına açılabilmeli; plotly.js gömülür.
+                    import plotly.io as pio
+                    if isinstance(source, str):
+                        figure = pio.from_json(source)
+                    elif hasattr(source, "full_figure"):
+                        figure = source.full_figure()
+                    else:
+                        figure = source
+                    pio.write_html(figure, file=file_path, include_plotlyjs=True, auto_open=False)
                 QMessageBox.information(self, translate("success.title"),
                                         translate("plotly.html_saved").format(path=file_path))
         except Exception as e:
             QMessageBox.critical(self, translate("error.title"),
                                  translate("plotly.html_exception").format(error=e))
 
+    def done(self, result):
+        # Görünümler diyalogla birlikte silinmez, havuza geri döner.
+        for web in self.pooled_views:
+            chart_pool().release(web)
+        self.pooled_views = []
+        super().done(result)
+
     def toggle_fullscreen(self):
         if self.is_fullscreen:
             self.showNormal()
@@ -79,10 +103,10 @@ class PlotlyViewer(QDialog):
         self.is_fullscreen = not self.is_fullscreen
 
 if __name__ == "__main__":
+    import plotly.graph_objects as go
     app = QApplication(sys.argv)
     viewer = PlotlyViewer(
-        ("temp_forecast_plot.html", "Tahmin Grafiği"),
-        ("trend_graph.html", "Trend Analizi"),
-        ("summary_graph.html", "Sistem Özeti")
+        (go.Figure(go.Scatter(x=[1, 2, 3], y=[3, 1, 2])), "Örnek Grafik"),
+        (go.Figure(go.Bar(x=["a", "b"], y=[2, 5])), "Örnek Çubuk")
     )
     viewer.exec_()
@@ -0,0 +1,29 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import modules.db.connection as connection
+from modules.db.connection import close_connection, transaction
+from modules.db.migrations import MIGRATIONS
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # Her test boş, geçici bir veritabanıyla başlar.
+    close_connection()
+    monkeypatch.setattr(connection, "DB_PATH", str(tmp_path / "inventory.db"))
+    yield connection.get_connection()
+    close_connection()
+
+
+def migrate_to(version):
+    # Eski bir şema sürümünden yükseltmeyi sınamak için migration'lar
+    # belirli bir sürüme kadar uygulanır.
+    for number, migrate in MIGRATIONS:
+        if number > version:
+            break
+        with transaction() as conn:
+            migrate(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
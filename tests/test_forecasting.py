@@ -0,0 +1,51 @@
+import numpy as np
+from modules.logic.forecasting import classify_demand, forecast_matrix, CROSTON_ALPHA
+
+
+def _intermittent(days=60, every=3, size=4.0):
+    y = np.zeros(days)
+    y[::every] = size
+    return y
+
+
+def test_classify_demand():
+    days = 60
+    short = np.zeros(days)
+    short[-5:] = 5.0
+    lumpy = _intermittent(days, size=1.0)
+    lumpy[::6] = 9.0
+    single = np.zeros(days)
+    single[-1] = 3.0
+    Y = np.vstack([
+        np.full(days, 5.0),  # her gün, sabit -> holt
+        short,               # her gün ama kısa geçmiş -> ses
+        _intermittent(days), # aralıklı, sabit büyüklük -> croston
+        lumpy,               # aralıklı, değişken büyüklük -> sba
+        single,              # tek satış -> mean
+    ])
+    assert classify_demand(Y).tolist() == ["holt", "ses", "croston", "sba", "mean"]
+
+
+def test_forecast_matrix_shapes_and_levels():
+    Y = np.vstack([np.full(300, 5.0), _intermittent(300)])
+    forecast, engines = forecast_matrix(Y, horizon=7)
+    assert forecast.shape == (2, 7)
+    assert engines.tolist() == ["holt", "croston"]
+    np.testing.assert_allclose(forecast[0], 5.0)
+    # Her 3 günde 4 adet: günlük oran ~4/3.
+    np.testing.assert_allclose(forecast[1], 4 / 3, rtol=0.01)
+
+
+def test_manual_engine_overrides_auto():
+    Y = _intermittent(30)[None, :]
+    croston, _ = forecast_matrix(Y, 3, ["croston"])
+    sba, engines = forecast_matrix(Y, 3, ["sba"])
+    assert engines.tolist() == ["sba"]
+    np.testing.assert_allclose(sba, croston * (1 - CROSTON_ALPHA / 2))
+    _, engines = forecast_matrix(Y, 3, ["prophet"])
+    assert engines.tolist() == ["croston"]
+
+
+def test_empty_matrix():
+    forecast, engines = forecast_matrix(np.zeros((0, 10)), 7)
+    assert forecast.shape == (0, 7) and len(engines) == 0
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+from modules.db.connection import transaction
+from modules.db.migrations import run_migrations
+from modules import ml_module
+from modules.ml_module import compute_30_day_outlook, clear_outlook_cache
+
+
+@pytest.fixture
+def store(db):
+    # 60 gün: ürün 1 günde 2, ürün 2 günde 1 adet. Ürün 1 küçük bir rafta.
+    clear_outlook_cache()
+    run_migrations()
+    with transaction() as conn:
+        conn.execute("INSERT INTO products (product_id, product_name, selling_price, cost_price, unit_volume) VALUES (1, 'a', 10, 4, 1)")
+        conn.execute("INSERT INTO products (product_id, product_name, selling_price, cost_price, unit_volume) VALUES (2, 'b', 5, 2, 1)")
+        conn.execute("INSERT INTO shelves (id, name, max_capacity) VALUES (1, 'raf', 5)")
+        conn.execute("INSERT INTO product_storage_links (product_id, storage_type, storage_id) VALUES (1, 'shelf', 1)")
+        conn.execute("INSERT INTO stock_transactions (product_id, date, quantity) VALUES (1, date('now', 'localtime', '-60 days'), 130)")
+        conn.execute("INSERT INTO stock_transactions (product_id, date, quantity) VALUES (2, date('now', 'localtime', '-60 days'), 500)")
+        for day in range(1, 61):
+            for pid, qty in ((1, 2), (2, 1)):
+                conn.execute(
+                    "INSERT INTO sales (date, product_id, quantity_sold) VALUES (date('now', 'localtime', ?), ?, ?)",
+                    (f"-{day} days", pid, qty)
+                )
+    yield db
+    clear_outlook_cache()
+
+
+def test_outlook_totals(store):
+    outlook = compute_30_day_outlook()
+    df = outlook.products.set_index("product_id")
+
+    assert outlook.horizon == 30
+    assert len(outlook.forecast) == 30
+    assert outlook.forecast["ds"].min() > outlook.history["ds"].max()
+    assert outlook.total_forecast_qty == pytest.approx(df["forecasted_qty"].sum())
+    assert df.loc[1, "forecasted_qty"] == pytest.approx(2 * df.loc[2, "forecasted_qty"])
+    np.testing.assert_allclose(df["shortage"], (df["forecasted_qty"] - df["current_stock"]).clip(lower=0))
+    assert df["current_stock"].to_dict() == {1: 10, 2: 440}
+    assert df.loc[1, "potential_profit"] == pytest.approx(df.loc[1, "forecasted_qty"] * 6)
+    assert outlook.volume_issues["product_id"].tolist() == [1]
+    assert outlook.summary()["critical_items"] == ["a"]
+
+
+def test_catalog_memo_follows_edits(store):
+    first = compute_30_day_outlook()
+    catalog = ml_module._memo["catalog"][1]
+    compute_30_day_outlook()
+    assert ml_module._memo["catalog"][1] is catalog
+
+    # Fiyat takası toplamları değiştirmez; eski toplam tabanlı anahtar bunu kaçırıyordu.
+    with transaction() as conn:
+        conn.execute("UPDATE products SET selling_price = CASE product_id WHEN 1 THEN 5 ELSE 10 END")
+    second = compute_30_day_outlook()
+    prices = second.products.set_index("product_id")["effective_price"].to_dict()
+    assert prices == {1: 5.0, 2: 10.0}
+    assert second.data_version != first.data_version
+
+
+def test_outlook_without_sales(db):
+    clear_outlook_cache()
+    run_migrations()
+    with pytest.raises(ValueError):
+        compute_30_day_outlook()
@@ -0,0 +1,47 @@
+import numpy as np
+from modules.db.connection import transaction
+from modules.db.migrations import run_migrations
+from modules.logic.pricing import PriceBook
+
+
+def _setup():
+    run_migrations()
+    with transaction() as conn:
+        conn.execute("INSERT INTO products (product_id, product_name, selling_price, cost_price) VALUES (1, 'a', 12, 6)")
+        conn.execute("INSERT INTO products (product_id, product_name, selling_price, cost_price) VALUES (2, 'b', 7, 3)")
+        # Ürün 1 için elle yazılmış geçmiş; ürün 2 dönemsiz kalır (products yedeği).
+        conn.execute("DELETE FROM price_periods")
+        conn.executemany(
+            "INSERT INTO price_periods (product_id, kind, price, valid_from, valid_to) VALUES (?, ?, ?, ?, ?)",
+            [
+                (1, "regular", 10.0, "2024-01-01", "2024-01-31"),
+                (1, "regular", 12.0, "2024-02-01", None),
+                (1, "promo", 8.0, "2024-02-10", "2024-02-12"),
+                (1, "cost", 5.0, "2024-01-01", "2024-01-31"),
+                (1, "cost", 6.0, "2024-02-01", None),
+            ]
+        )
+
+
+def test_prices_follow_periods_and_keep_input_order(db):
+    _setup()
+    book = PriceBook(db)
+    dates = ["2024-02-11", "2023-12-01", "2024-01-15", "2024-02-13", "2024-02-11", "2024-02-11"]
+    prices = book.prices([1, 1, 1, 1, 2, 99], dates)
+    # Kampanya, ilk dönemden önceki satış, eski liste fiyatı, kampanya sonrası,
+    # dönemsiz ürün, bilinmeyen ürün.
+    np.testing.assert_array_equal(prices, [8.0, 10.0, 10.0, 12.0, 7.0, np.nan])
+
+
+def test_list_prices_and_costs_ignore_promotions(db):
+    _setup()
+    book = PriceBook(db)
+    np.testing.assert_array_equal(book.prices([1], ["2024-02-11"], promotions=False), [12.0])
+    np.testing.assert_array_equal(book.costs([1, 1, 2], ["2024-01-20", "2024-02-11", "2024-02-11"]), [5.0, 6.0, 3.0])
+
+
+def test_single_date_applies_to_all_rows(db):
+    _setup()
+    book = PriceBook(db)
+    np.testing.assert_array_equal(book.prices([2, 1], "2024-01-05"), [7.0, 10.0])
+    assert book.current_prices("2024-02-10").to_dict() == {1: 8.0, 2: 7.0}
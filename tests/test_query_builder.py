@@ -0,0 +1,39 @@
+from modules.db.connection import transaction
+from modules.db.query_builder import SelectQuery
+
+
+def test_none_filters_are_left_out():
+    query = SelectQuery("sales").columns("id").where_eq("user_id", None).where_in("product_id", None)
+    query.where_between("date", None, None)
+    assert query.build() == ("SELECT id\nFROM sales", [])
+
+
+def test_clauses_and_params_keep_their_order():
+    query = (SelectQuery("sales s")
+             .columns("s.product_id", "SUM(s.quantity_sold) AS qty")
+             .left_join("products p", "p.product_id = s.product_id")
+             .where_between("s.date", "2024-01-01", "2024-01-31")
+             .where_eq("p.brand", "X")
+             .where_in("s.product_id", [3, 1])
+             .group_by("s.product_id")
+             .order_by("qty DESC")
+             .limit(5))
+    sql, params = query.build()
+    assert sql == (
+        "SELECT s.product_id, SUM(s.quantity_sold) AS qty\n"
+        "FROM sales s\n"
+        "LEFT JOIN products p ON p.product_id = s.product_id\n"
+        "WHERE s.date >= ? AND s.date <= ? AND p.brand = ? AND s.product_id IN (?, ?)\n"
+        "GROUP BY s.product_id\n"
+        "ORDER BY qty DESC\n"
+        "LIMIT 5"
+    )
+    assert params == ["2024-01-01", "2024-01-31", "X", 3, 1]
+
+
+def test_empty_in_list_matches_nothing(db):
+    db.execute("CREATE TABLE t (x INTEGER)")
+    with transaction() as conn:
+        conn.executemany("INSERT INTO t VALUES (?)", [(1,), (2,)])
+    assert SelectQuery("t").where_in("x", []).read(db).empty
+    assert SelectQuery("t").where_in("x", [2]).read(db)["x"].tolist() == [2]
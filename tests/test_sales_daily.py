@@ -0,0 +1,61 @@
+import pytest
+from conftest import migrate_to
+from modules.db.connection import transaction
+from modules.db.migrations import run_migrations
+from modules.db.sales_daily import verify_sales_daily, rebuild_sales_daily
+
+
+def _rollup(conn):
+    return conn.execute("SELECT product_id, day, quantity, revenue, cost FROM sales_daily ORDER BY product_id").fetchall()
+
+
+@pytest.mark.parametrize("version", [6, 8])
+def test_upgrade_keeps_legacy_promo_revenue(db, version):
+    migrate_to(version)
+    with transaction() as conn:
+        conn.execute("""
+            INSERT INTO products (product_id, product_name, cost_price, selling_price, discount_price, discount_until)
+            VALUES (1, 'a', 5, 10, 8, '2030-01-01')
+        """)
+        conn.execute("INSERT INTO sales (date, product_id, quantity_sold) VALUES ('2020-05-01', 1, 2)")
+
+    run_migrations()
+
+    assert _rollup(db) == [(1, "2020-05-01", 2, 16.0, 10.0)]
+    assert verify_sales_daily().empty
+    rebuild_sales_daily()
+    assert _rollup(db) == [(1, "2020-05-01", 2, 16.0, 10.0)]
+
+
+def test_upgrade_revalues_prices_missing_from_history(db):
+    # Migration 6-9 arasındaki fiyat değişikliğinin dönemi yoktur; satır
+    # dönemlere göre yeniden değerlenir ve doğrulama temiz kalır.
+    migrate_to(8)
+    with transaction() as conn:
+        conn.execute("INSERT INTO products (product_id, product_name, cost_price, selling_price) VALUES (1, 'a', 3, 7)")
+        conn.execute("INSERT INTO sales (date, product_id, quantity_sold) VALUES ('2020-05-01', 1, 1)")
+        conn.execute("UPDATE products SET selling_price = 9 WHERE product_id = 1")
+
+    run_migrations()
+
+    assert _rollup(db) == [(1, "2020-05-01", 1, 9.0, 3.0)]
+    assert verify_sales_daily().empty
+
+
+def test_same_day_price_change_matches_rebuild(db):
+    run_migrations()
+    with transaction() as conn:
+        conn.execute("INSERT INTO products (product_id, product_name, cost_price, selling_price) VALUES (1, 'a', 4, 10)")
+        conn.execute("INSERT INTO sales (date, product_id, quantity_sold) VALUES (date('now', 'localtime'), 1, 3)")
+        conn.execute("UPDATE products SET selling_price = 12, cost_price = 5 WHERE product_id = 1")
+
+    assert verify_sales_daily().empty
+    before = _rollup(db)
+    rebuild_sales_daily()
+    assert _rollup(db) == before
+    assert before[0][3:] == (36.0, 15.0)
+
+
+def test_verify_empty_rollup(db):
+    run_migrations()
+    assert verify_sales_daily().empty
@@ -0,0 +1,51 @@
+from modules.db.connection import transaction
+from modules.db.migrations import run_migrations
+from modules.db.stock_lots import verify_stock_lots
+
+
+def _remaining(conn):
+    return conn.execute("SELECT lot_id, remaining FROM stock_lots ORDER BY lot_id").fetchall()
+
+
+def _receive(conn, quantity, expiry):
+    conn.execute(
+        "INSERT INTO stock_transactions (product_id, date, quantity, expiry_date) VALUES (1, '2024-01-01', ?, ?)",
+        (quantity, expiry)
+    )
+
+
+def _sell(conn, quantity):
+    return conn.execute(
+        "INSERT INTO sales (date, product_id, quantity_sold) VALUES ('2024-01-02', 1, ?)", (quantity,)
+    ).lastrowid
+
+
+def test_sales_deplete_fefo_and_deletes_restore(db):
+    run_migrations()
+    with transaction() as conn:
+        conn.execute("INSERT INTO products (product_id, product_name) VALUES (1, 'a')")
+        _receive(conn, 5, "2024-03-01")
+        _receive(conn, 5, "2024-02-01")
+        sale = _sell(conn, 7)
+    assert _remaining(db) == [(1, 3), (2, 0)]
+
+    with transaction() as conn:
+        conn.execute("UPDATE sales SET quantity_sold = 4 WHERE id = ?", (sale,))
+    assert _remaining(db) == [(1, 5), (2, 1)]
+
+    with transaction() as conn:
+        conn.execute("DELETE FROM sales WHERE id = ?", (sale,))
+    assert _remaining(db) == [(1, 5), (2, 5)]
+    assert verify_stock_lots().empty
+
+
+def test_shortfall_is_taken_from_later_receipts(db):
+    run_migrations()
+    with transaction() as conn:
+        conn.execute("INSERT INTO products (product_id, product_name) VALUES (1, 'a')")
+        _receive(conn, 2, "2024-02-01")
+        _sell(conn, 5)
+        _receive(conn, 10, "2024-03-01")
+    assert _remaining(db) == [(1, 0), (2, 7)]
+    assert db.execute("SELECT stock_in - sold FROM stock_levels WHERE product_id = 1").fetchone()[0] == 7
+    assert verify_stock_lots().empty
@@ -0,0 +1,43 @@
+import numpy as np
+from modules.logic.waste_risk import fefo_expected_sold
+
+
+def _reference(remaining, demand_until, group):
+    # C_i = min(C_{i-1} + kalan_i, D_i), her üründe sıfırdan.
+    sold = np.zeros(len(remaining))
+    cumulative = 0.0
+    for i in range(len(remaining)):
+        if i == 0 or group[i] != group[i - 1]:
+            cumulative = 0.0
+        through = min(cumulative + remaining[i], demand_until[i])
+        sold[i] = through - cumulative
+        cumulative = through
+    return sold
+
+
+def test_fefo_expected_sold_small_case():
+    remaining = np.array([5.0, 5.0, 4.0])
+    demand_until = np.array([3.0, 20.0, 1.0])
+    group = np.array([0, 0, 1])
+    np.testing.assert_allclose(fefo_expected_sold(remaining, demand_until, group), [3.0, 5.0, 1.0])
+
+
+def test_fefo_expected_sold_matches_recursion():
+    rng = np.random.default_rng(0)
+    group = np.sort(rng.integers(0, 20, 200))
+    remaining = rng.integers(1, 30, 200).astype(float)
+    demand_until = np.zeros(200)
+    for g in np.unique(group):
+        rows = group == g
+        demand_until[rows] = np.cumsum(rng.uniform(0, 25, rows.sum()))
+    np.testing.assert_allclose(
+        fefo_expected_sold(remaining, demand_until, group),
+        _reference(remaining, demand_until, group)
+    )
+
+
+def test_fefo_expected_sold_scenarios():
+    remaining = np.array([5.0, 5.0])
+    demand_until = np.array([[2.0, 10.0], [6.0, 30.0]])
+    sold = fefo_expected_sold(remaining, demand_until, np.array([0, 0]))
+    np.testing.assert_allclose(sold, [[2.0, 5.0], [4.0, 5.0]])